@@ -0,0 +1,125 @@
+"""
+Per-page decode and build cost of HH /vacancies responses.
+
+Usage:
+    python -m benchmarks.bench_decode --pages 200 --per-page 100
+
+Compares the standard library dict path with orjson and msgspec, for
+the JSON libraries that are installed, each building a VacancyBatch as
+the archive replay does. The msgspec-struct path decodes straight into
+the typed structs of hh_structs, as the replay does with msgspec.
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.synthetic_data import SyntheticCatalog
+from vacolector_hh.hh_structs import HAS_STRUCTS, batch_from_items
+from vacolector_hh.json_codec import msgspec, orjson
+from vacolector_hh.parser_hh import HHParser
+from vacolector_hh.vacancy_batch import VacancyBatch
+
+
+def make_bodies(pages: int, per_page: int, seed: int) -> List[bytes]:
+    """
+    Encode synthetic /vacancies response pages as sent by the API.
+
+    Args:
+        pages (int): Number of pages.
+        per_page (int): Vacancies per page.
+        seed (int): Random seed.
+
+    Returns:
+        List[bytes]: Response bodies.
+    """
+    catalog = SyntheticCatalog(1, pages * per_page, seed)
+    items = catalog.vacancies['1']
+    return [
+        json.dumps({
+            'found': len(items),
+            'pages': pages,
+            'page': page,
+            'per_page': per_page,
+            'items': items[page * per_page:(page + 1) * per_page],
+        }, ensure_ascii=False).encode()
+        for page in range(pages)
+    ]
+
+
+def dict_path(
+        loads: Callable[[bytes], dict]
+) -> Tuple[Callable, Callable]:
+    """
+    Return the decode and build functions of a path through dicts.
+    """
+    def decode(body: bytes) -> dict:
+        return loads(body)
+
+    def build(response: dict) -> VacancyBatch:
+        return HHParser.build_vacancy_batch(response['items'])
+
+    return decode, build
+
+
+def measure(
+        bodies: List[bytes], decode: Callable, build: Callable, repeat: int
+) -> Tuple[float, float]:
+    """
+    Return the best per-page decode and build time in microseconds.
+    """
+    best_decode = best_build = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        decoded = [decode(body) for body in bodies]
+        decoded_at = time.perf_counter()
+        for response in decoded:
+            build(response)
+        built_at = time.perf_counter()
+        best_decode = min(best_decode, decoded_at - started)
+        best_build = min(best_build, built_at - decoded_at)
+    return (
+        best_decode / len(bodies) * 1e6,
+        best_build / len(bodies) * 1e6,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    bodies = make_bodies(args.pages, args.per_page, args.seed)
+    paths: Dict[str, Tuple[Callable, Callable]] = {
+        'json': dict_path(json.loads),
+    }
+    if orjson is not None:
+        paths['orjson'] = dict_path(orjson.loads)
+    if msgspec is not None:
+        paths['msgspec-dict'] = dict_path(msgspec.json.decode)
+    if HAS_STRUCTS:
+        from vacolector_hh.hh_structs import VacanciesPage
+        paths['msgspec-struct'] = (
+            msgspec.json.Decoder(VacanciesPage).decode,
+            lambda page: batch_from_items(page.items),
+        )
+
+    size = sum(map(len, bodies)) / len(bodies)
+    print(f'{args.pages} pages of {args.per_page} vacancies, '
+          f'{size / 1024:,.1f} KiB each')
+    print(f'{"path":<16}{"decode us":>12}{"build us":>12}{"total us":>12}'
+          f'{"speedup":>10}')
+    baseline = None
+    for name, (decode, build) in paths.items():
+        decode_us, build_us = measure(bodies, decode, build, args.repeat)
+        total = decode_us + build_us
+        baseline = baseline or total
+        print(f'{name:<16}{decode_us:>12,.0f}{build_us:>12,.0f}'
+              f'{total:>12,.0f}{baseline / total:>9.2f}x')
+
+
+if __name__ == '__main__':
+    main()
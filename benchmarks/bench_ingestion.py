@@ -0,0 +1,68 @@
+"""
+Compare row-by-row INSERT ingestion with COPY-based bulk loading.
+
+Usage:
+    python -m benchmarks.bench_ingestion --rows 50000
+
+The benchmark truncates the employers and vacancies tables of the
+database configured in database.ini.
+"""
+import argparse
+import time
+
+from benchmarks.synthetic_data import make_vacancies
+from vacolector_hh.data_classes import Employer
+from vacolector_hh.db_manager import DBManager
+
+BENCH_EMPLOYER = Employer(
+    id=1,
+    name='Benchmark Employer',
+    alternate_url='https://hh.ru/employer/1',
+    open_vacancies=0,
+)
+
+
+def measure(db_manager: DBManager, method, vacancies: list) -> float:
+    """
+    Reset the tables and time a single ingestion call.
+
+    Args:
+        db_manager (DBManager): Database manager.
+        method: Bound ingestion method taking a list of vacancies.
+        vacancies (list): Vacancies to load.
+
+    Returns:
+        float: Elapsed seconds.
+    """
+    db_manager.delete_employer()
+    db_manager.set_employers([BENCH_EMPLOYER])
+
+    started = time.perf_counter()
+    method(vacancies)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    db_manager = DBManager()
+    vacancies = make_vacancies(args.rows, BENCH_EMPLOYER.id)
+
+    paths = (
+        ('INSERT per row', db_manager.set_vacancies),
+        ('COPY FROM STDIN', db_manager.copy_vacancies),
+    )
+    for title, method in paths:
+        elapsed = measure(db_manager, method, vacancies)
+        print(
+            f'{title:<16} {args.rows} rows in {elapsed:.2f}s '
+            f'({args.rows / elapsed:,.0f} rows/s)'
+        )
+
+    db_manager.delete_employer()
+
+
+if __name__ == '__main__':
+    main()
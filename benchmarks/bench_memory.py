@@ -0,0 +1,155 @@
+"""
+Memory held by parsed vacancies in each in-memory representation.
+
+Usage:
+    python -m benchmarks.bench_memory --employers 50 --vacancies 2000
+
+Decodes synthetic /vacancies pages, builds their vacancies and reports
+the memory still allocated once the decoded pages are dropped, so the
+strings kept alive by every representation are counted too. Compares
+a plain dataclass with a per-instance __dict__, the slotted Vacancy
+with and without interned currencies and employer IDs, and the
+columnar VacancyBatch.
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from benchmarks.synthetic_data import SyntheticCatalog
+from vacolector_hh.data_classes import Vacancy, intern_value
+from vacolector_hh.json_codec import loads
+from vacolector_hh.parser_hh import HHParser
+from vacolector_hh.vacancy_batch import VacancyBatch
+
+PlainVacancy = make_dataclass(
+    'PlainVacancy', [(field.name, field.type) for field in fields(Vacancy)]
+)
+
+
+def make_bodies(employers: int, vacancies: int, seed: int) -> List[bytes]:
+    """
+    Encode the vacancies of a synthetic catalog as response pages of
+    100 vacancies.
+
+    Args:
+        employers (int): Number of employers.
+        vacancies (int): Vacancies per employer.
+        seed (int): Random seed.
+
+    Returns:
+        List[bytes]: Response bodies.
+    """
+    catalog = SyntheticCatalog(employers, vacancies, seed)
+    return [
+        json.dumps({'items': items[start:start + 100]},
+                   ensure_ascii=False).encode()
+        for items in catalog.vacancies.values()
+        for start in range(0, len(items), 100)
+    ]
+
+
+def object_builder(
+        cls: type, intern: bool
+) -> Callable[[Iterable[list]], list]:
+    """
+    Return a builder of a list with one object per vacancy item.
+
+    Args:
+        cls (type): Class with the fields of Vacancy.
+        intern (bool): Whether to intern currencies and employer IDs.
+    """
+    def keep(value):
+        return value
+
+    wrap = intern_value if intern else keep
+
+    def build(pages: Iterable[list]) -> list:
+        vacancies = []
+        for vacancy in (item for items in pages for item in items):
+            salary = vacancy['salary'] or {}
+            snippet = vacancy['snippet']
+            vacancies.append(cls(
+                id=vacancy['id'],
+                name=vacancy['name'],
+                salary_from=salary.get('from', 0),
+                salary_to=salary.get('to', 0),
+                currency=wrap(salary.get('currency', '')),
+                alternate_url=vacancy['alternate_url'],
+                published_at=vacancy['published_at'],
+                requirement=snippet.get('requirement', ''),
+                responsibility=snippet.get('responsibility', ''),
+                employer_id=wrap(vacancy['employer']['id']),
+            ))
+        return vacancies
+
+    return build
+
+
+def build_batch(pages: Iterable[list]) -> VacancyBatch:
+    """
+    Build one VacancyBatch from all pages, as a sync batch is filled.
+    """
+    batch = VacancyBatch()
+    for items in pages:
+        batch.extend(HHParser.build_vacancy_batch(items))
+    return batch
+
+
+def measure(
+        bodies: List[bytes], build: Callable[[Iterable[list]], object]
+) -> Tuple[int, int, float]:
+    """
+    Build the vacancies of all pages, decoding one page at a time, and
+    measure them.
+
+    Returns:
+        Tuple[int, int, float]: Retained bytes, peak bytes and build
+        seconds.
+    """
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    built = build(loads(body)['items'] for body in bodies)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del built
+    return retained, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--employers', type=int, default=50)
+    parser.add_argument('--vacancies', type=int, default=2000,
+                        help='Vacancies per employer')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    bodies = make_bodies(args.employers, args.vacancies, args.seed)
+    count = args.employers * args.vacancies
+    representations: Dict[str, Callable[[Iterable[list]], object]] = {
+        'dataclass': object_builder(PlainVacancy, intern=False),
+        'slots': object_builder(Vacancy, intern=False),
+        'slots+intern': object_builder(Vacancy, intern=True),
+        'VacancyBatch': build_batch,
+    }
+
+    print(f'{count:,} vacancies in {len(bodies)} pages')
+    print(f'{"representation":<16}{"retained MiB":>14}{"bytes/row":>11}'
+          f'{"peak MiB":>10}{"build s":>9}{"saving":>9}')
+    baseline = None
+    for name, build in representations.items():
+        retained, peak, elapsed = measure(bodies, build)
+        baseline = baseline or retained
+        print(f'{name:<16}{retained / 2 ** 20:>14,.1f}'
+              f'{retained / count:>11,.0f}{peak / 2 ** 20:>10,.1f}'
+              f'{elapsed:>9.2f}{1 - retained / baseline:>8.0%} ')
+
+
+if __name__ == '__main__':
+    main()
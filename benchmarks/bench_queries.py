@@ -0,0 +1,259 @@
+"""
+Benchmark the DBManager analytics queries on generated datasets.
+
+Usage:
+    python -m benchmarks.bench_queries --employers 10000 \
+        --vacancies 1000000 --plans-dir bench_plans
+
+The employers and vacancies tables of the database configured in
+database.ini are truncated and reseeded unless --skip-seed is given.
+
+Every query is timed once "cold" and --repeat times warm, and its
+EXPLAIN (ANALYZE, BUFFERS) plan is written to --plans-dir. A cold run
+starts on a fresh connection, so plan and catalog caches are empty.
+Shared buffers and the OS page cache stay warm unless --cold-cmd
+restarts Postgres and drops caches, e.g.
+"sudo systemctl restart postgresql && sync && echo 3 |
+sudo tee /proc/sys/vm/drop_caches".
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import time
+from datetime import date, timedelta
+
+from benchmarks.synthetic_data import CURRENCIES, SKILLS, TITLES
+from vacolector_hh.db_copy import EMPLOYER_COLUMNS, VACANCY_COLUMNS, copy_rows
+from vacolector_hh.db_cursor import InstrumentedCursor
+from vacolector_hh.db_manager import DBManager
+
+QUERIES = (
+    ('companies_and_vacancies_count', 'get_companies_and_vacancies_count'),
+    ('avg_salary', 'get_avg_salary'),
+    ('vacancies_with_higher_salary', 'get_vacancies_with_higher_salary'),
+    ('vacancies_with_keyword', 'get_vacancies_with_keyword'),
+)
+
+
+class RecordingCursor(InstrumentedCursor):
+    """
+    Cursor remembering the statements it executed, with parameters
+    bound, so they can be explained afterwards.
+    """
+
+    statements = []
+
+    def execute(self, query, vars=None):
+        result = super().execute(query, vars)
+        RecordingCursor.statements.append(self.query.decode())
+        return result
+
+
+def employer_seed_rows(count: int):
+    """
+    Generate employer rows ordered as EMPLOYER_COLUMNS.
+
+    Args:
+        count (int): Number of employers.
+
+    Yields:
+        tuple: Employer row.
+    """
+    for employer_id in range(1, count + 1):
+        yield (
+            employer_id,
+            f'Employer {employer_id}',
+            0,
+            f'https://hh.ru/employer/{employer_id}',
+        )
+
+
+def vacancy_seed_rows(count: int, employers: int, seed: int):
+    """
+    Generate vacancy rows ordered as VACANCY_COLUMNS.
+
+    Args:
+        count (int): Number of vacancies.
+        employers (int): Number of employers to spread them over.
+        seed (int): Random seed.
+
+    Yields:
+        tuple: Vacancy row.
+    """
+    rng = random.Random(seed)
+    start = date.today() - timedelta(days=365)
+    for vacancy_id in range(1, count + 1):
+        salary_from = rng.choice((0, 0, rng.randrange(30, 400) * 1000))
+        salary_to = rng.choice((0, salary_from + rng.randrange(0, 200) * 1000))
+        yield (
+            vacancy_id,
+            f'{rng.choice(TITLES)} #{vacancy_id}',
+            salary_from,
+            salary_to,
+            rng.choice(CURRENCIES),
+            start + timedelta(days=rng.randrange(365)),
+            f'https://hh.ru/vacancy/{vacancy_id}',
+            rng.randrange(1, employers + 1),
+            ', '.join(rng.sample(SKILLS, 4)),
+            ', '.join(rng.sample(SKILLS, 3)),
+        )
+
+
+def seed(db_manager: DBManager, employers: int, vacancies: int) -> None:
+    """
+    Replace the tables' content with generated data through COPY.
+
+    Args:
+        db_manager (DBManager): Database manager.
+        employers (int): Number of employers.
+        vacancies (int): Number of vacancies.
+    """
+    pool = db_manager.get_pool()
+    conn = pool.getconn()
+    started = time.perf_counter()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("TRUNCATE TABLE employers CASCADE;")
+                copy_rows(
+                    cur,
+                    'employers',
+                    EMPLOYER_COLUMNS,
+                    employer_seed_rows(employers)
+                )
+                copy_rows(
+                    cur,
+                    'vacancies',
+                    VACANCY_COLUMNS,
+                    vacancy_seed_rows(vacancies, employers, 0)
+                )
+                cur.execute(
+                    """
+                    UPDATE employers e SET open_vacancies = v.count
+                    FROM (
+                        SELECT employer_id, COUNT(*) AS count
+                        FROM vacancies
+                        GROUP BY employer_id
+                    ) v
+                    WHERE v.employer_id = e.id;
+                    """
+                )
+                cur.execute("REFRESH MATERIALIZED VIEW salary_stats;")
+                cur.execute("ANALYZE employers, vacancies;")
+    finally:
+        pool.putconn(conn)
+
+    elapsed = time.perf_counter() - started
+    print(f'Seeded {employers} employers and {vacancies} vacancies in '
+          f'{elapsed:.1f}s ({vacancies / elapsed:,.0f} rows/s)')
+
+
+def explain(db_manager: DBManager, statement: str) -> str:
+    """
+    Run EXPLAIN (ANALYZE, BUFFERS) for a statement.
+
+    Args:
+        db_manager (DBManager): Database manager.
+        statement (str): SQL statement with parameters bound.
+
+    Returns:
+        str: Query plan.
+    """
+    pool = db_manager.get_pool()
+    conn = pool.getconn()
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute(f"EXPLAIN (ANALYZE, BUFFERS) {statement}")
+                return '\n'.join(row[0] for row in cur.fetchall())
+    finally:
+        pool.putconn(conn)
+
+
+def measure(db_manager: DBManager, method_name: str, args: tuple) -> float:
+    """
+    Time one call of a DBManager query method.
+
+    Args:
+        db_manager (DBManager): Database manager.
+        method_name (str): Name of the method.
+        args (tuple): Method arguments.
+
+    Returns:
+        float: Elapsed seconds.
+    """
+    started = time.perf_counter()
+    getattr(db_manager, method_name)(*args)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--employers', type=int, default=10000)
+    parser.add_argument('--vacancies', type=int, default=1000000)
+    parser.add_argument('--keyword', default='python')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--plans-dir', default='bench_plans')
+    parser.add_argument('--skip-seed', action='store_true')
+    parser.add_argument('--cold-cmd',
+                        help='Shell command run before every cold query')
+    args = parser.parse_args()
+
+    db_manager = DBManager()
+    db_manager.create_database()
+    if not db_manager.is_tables_existing():
+        db_manager.create_tables()
+    db_manager.upgrade_tables()
+    db_manager.cursor_factory = RecordingCursor
+
+    if not args.skip_seed:
+        seed(db_manager, args.employers, args.vacancies)
+
+    os.makedirs(args.plans_dir, exist_ok=True)
+    results = {}
+    for name, method_name in QUERIES:
+        method_args = (args.keyword,) if 'keyword' in method_name else ()
+
+        db_manager.close()
+        if args.cold_cmd:
+            subprocess.run(args.cold_cmd, shell=True, check=True)
+        RecordingCursor.statements.clear()
+        cold = measure(db_manager, method_name, method_args)
+        statement = RecordingCursor.statements[-1]
+
+        warm = [
+            measure(db_manager, method_name, method_args)
+            for _ in range(args.repeat)
+        ]
+
+        with open(os.path.join(args.plans_dir, f'{name}.txt'), 'w') as f:
+            f.write(statement.strip() + '\n\n')
+            f.write(explain(db_manager, statement) + '\n')
+
+        results[name] = {
+            'cold_ms': round(cold * 1000, 2),
+            'warm_min_ms': round(min(warm) * 1000, 2),
+            'warm_median_ms': round(statistics.median(warm) * 1000, 2),
+        }
+        print(f'{name:<32} cold {results[name]["cold_ms"]:>10.2f} ms   '
+              f'warm min {results[name]["warm_min_ms"]:>10.2f} ms   '
+              f'median {results[name]["warm_median_ms"]:>10.2f} ms')
+
+    with open(os.path.join(args.plans_dir, 'results.json'), 'w') as f:
+        json.dump(
+            {
+                'employers': args.employers,
+                'vacancies': args.vacancies,
+                'queries': results,
+            },
+            f,
+            indent=4
+        )
+    db_manager.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Replay benchmark: parse and load archived vacancy pages without network.
+
+Usage:
+    python -m benchmarks.bench_replay --employers 50 --vacancies 2000 \
+        --processes 1 2 4
+
+Writes a synthetic page archive to a temporary directory and replays it
+once per --processes value. Without --no-db the employers and vacancies
+tables of the database configured in database.ini are truncated and
+refilled.
+"""
+import argparse
+import math
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic_data import SyntheticCatalog
+from vacolector_hh.archive import ResponseArchive
+from vacolector_hh.replay import ArchiveReplay
+
+PER_PAGE = 100
+
+
+def write_archive(catalog: SyntheticCatalog, archive: ResponseArchive) -> int:
+    """
+    Archive the catalog vacancies as /vacancies response pages.
+
+    Args:
+        catalog (SyntheticCatalog): Catalog to archive.
+        archive (ResponseArchive): Target archive.
+
+    Returns:
+        int: Number of archived pages.
+    """
+    pages = 0
+    for employer_id, items in catalog.vacancies.items():
+        count = math.ceil(len(items) / PER_PAGE)
+        for page in range(count):
+            archive.append(int(employer_id), {
+                'found': len(items),
+                'pages': count,
+                'page': page,
+                'per_page': PER_PAGE,
+                'items': items[page * PER_PAGE:(page + 1) * PER_PAGE],
+            })
+            pages += 1
+    archive.close()
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--employers', type=int, default=20)
+    parser.add_argument('--vacancies', type=int, default=2000,
+                        help='Vacancies per employer')
+    parser.add_argument('--processes', type=int, nargs='+',
+                        default=[1, os.cpu_count() or 1])
+    parser.add_argument('--segment-mb', type=float, default=4,
+                        help='Uncompressed segment size in MiB')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-db', action='store_true',
+                        help='Parse only, skip the database')
+    args = parser.parse_args()
+
+    catalog = SyntheticCatalog(args.employers, args.vacancies, args.seed)
+    db_manager = None
+    if not args.no_db:
+        from vacolector_hh.db_manager import DBManager
+
+        db_manager = DBManager()
+        db_manager.delete_employer()
+        db_manager.copy_employers(catalog.employer_objects)
+
+    with tempfile.TemporaryDirectory() as directory:
+        archive = ResponseArchive(
+            directory, segment_bytes=int(args.segment_mb * 2 ** 20)
+        )
+        started = time.perf_counter()
+        pages = write_archive(catalog, archive)
+        elapsed = time.perf_counter() - started
+        size = sum(
+            entry.stat().st_size for entry in os.scandir(directory)
+        )
+        print(f'Catalog:     {catalog.vacancies_count} vacancies of '
+              f'{args.employers} employers')
+        print(f'Archive:     {pages} pages, {size / 2 ** 20:,.2f} MiB, '
+              f'written in {elapsed:.2f}s')
+
+        try:
+            for processes in args.processes:
+                result = ArchiveReplay(
+                    archive, db_manager, processes=processes
+                ).run()
+                print(f'{processes:>2} processes: {result.elapsed:.2f}s, '
+                      f'{result.pages / result.elapsed:,.1f} pages/s, '
+                      f'{result.parsed / result.elapsed:,.0f} vacancies/s')
+        finally:
+            if db_manager is not None:
+                db_manager.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""
+End-to-end sync benchmark against the local fake HH API.
+
+Usage:
+    python -m benchmarks.bench_sync --employers 50 --vacancies 1000 \
+        --latency 0.05 --throttle-every 200 --throttle-burst 5
+
+With --http-cache and --passes 2 the second pass revalidates every
+page against the cache filled by the first one.
+
+Without --no-db the employers and vacancies tables of the database
+configured in database.ini are truncated and refilled.
+"""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_hh_server import (
+    add_server_arguments,
+    server_from_arguments,
+)
+from vacolector_hh.constants import FETCH_CONCURRENCY, SYNC_WORKERS
+from vacolector_hh.http_cache import ResponseCache
+from vacolector_hh.parser_hh import HHParser
+
+
+def fetch_only(hh_parser: HHParser, employer_ids: list, workers: int) -> int:
+    """
+    Fetch and parse vacancies of all employers without storing them.
+
+    Args:
+        hh_parser (HHParser): Parser pointed at the fake server.
+        employer_ids (list): Employer IDs.
+        workers (int): Employers fetched in parallel.
+
+    Returns:
+        int: Number of parsed vacancies.
+    """
+    def count(employer_id):
+        return sum(
+            len(page) for page in hh_parser.iter_vacancy_pages(employer_id)
+        )
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(count, employer_ids))
+
+
+def sync_to_db(hh_parser: HHParser, catalog, workers: int):
+    """
+    Run a full VacancySync of the catalog employers into the database.
+
+    Args:
+        hh_parser (HHParser): Parser pointed at the fake server.
+        catalog (SyntheticCatalog): Served catalog.
+        workers (int): Employers fetched in parallel.
+
+    Returns:
+        SyncResult: Result of the sync.
+    """
+    from vacolector_hh.db_manager import DBManager
+    from vacolector_hh.sync import VacancySync
+
+    db_manager = DBManager()
+    db_manager.delete_employer()
+    db_manager.copy_employers(catalog.employer_objects)
+    try:
+        return VacancySync(
+            hh_parser, workers, db_manager, checkpoints=False
+        ).run(
+            [employer['id'] for employer in catalog.employers],
+            incremental=False
+        )
+    finally:
+        db_manager.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_server_arguments(parser)
+    parser.add_argument('--workers', type=int, default=SYNC_WORKERS)
+    parser.add_argument('--concurrency', type=int, default=FETCH_CONCURRENCY)
+    parser.add_argument('--no-db', action='store_true',
+                        help='Fetch and parse only, skip the database')
+    parser.add_argument('--http-cache', action='store_true',
+                        help='Cache responses in a temporary directory')
+    parser.add_argument('--passes', type=int, default=1,
+                        help='Number of consecutive syncs')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir, \
+            server_from_arguments(args) as server:
+        hh_parser = HHParser(
+            concurrency=args.concurrency,
+            max_concurrency=args.concurrency * args.workers,
+            response_cache=ResponseCache(cache_dir)
+            if args.http_cache else None
+        )
+        hh_parser.vacancy_url = f'{server.url}/vacancies'
+        hh_parser.employer_url = f'{server.url}/employers'
+
+        print(f'Catalog:     {server.catalog.vacancies_count} vacancies of '
+              f'{args.employers} employers')
+        for number in range(1, args.passes + 1):
+            before = server.stats()
+            started = time.perf_counter()
+            if args.no_db:
+                fetched = fetch_only(
+                    hh_parser,
+                    [int(employer['id'])
+                     for employer in server.catalog.employers],
+                    args.workers
+                )
+                written = 0
+            else:
+                result = sync_to_db(hh_parser, server.catalog, args.workers)
+                fetched = result.fetched
+                written = result.stats.inserted + result.stats.updated
+                if result.errors:
+                    print(f'Failed employers: {result.failed_employers}')
+            elapsed = time.perf_counter() - started
+            stats = {
+                key: value - before[key]
+                for key, value in server.stats().items()
+            }
+            print_pass(number, elapsed, stats, fetched, written, args.no_db)
+        if args.http_cache:
+            print(f'Cache:       {hh_parser.response_cache.stats()}')
+
+
+def print_pass(
+        number: int,
+        elapsed: float,
+        stats: dict,
+        fetched: int,
+        written: int,
+        no_db: bool
+) -> None:
+    """
+    Print the throughput of one pass.
+
+    Args:
+        number (int): Pass number.
+        elapsed (float): Duration in seconds.
+        stats (dict): Fake server counters of the pass.
+        fetched (int): Parsed vacancies.
+        written (int): Inserted or updated vacancies.
+        no_db (bool): Whether the database was skipped.
+    """
+    print(f'Pass {number}:')
+    print(f'Elapsed:     {elapsed:.2f}s')
+    print(f'Requests:    {stats["requests"]} '
+          f'({stats["throttled"]} throttled, {stats["errors"]} errors, '
+          f'{stats["not_modified"]} not modified)')
+    print(f'Pages/s:     {stats["pages_served"] / elapsed:,.1f}')
+    print(f'MB/s:        {stats["bytes_served"] / elapsed / 2 ** 20:,.2f}')
+    print(f'Vacancies/s: {fetched / elapsed:,.0f}')
+    if not no_db:
+        print(f'DB rows/s:   {written / elapsed:,.0f}')
+
+if __name__ == '__main__':
+    main()
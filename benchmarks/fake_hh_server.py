@@ -0,0 +1,360 @@
+"""
+Local stand-in for the HH API /vacancies and /employers endpoints.
+
+Usage:
+    python -m benchmarks.fake_hh_server --port 8000 --employers 50 \
+        --vacancies 300 --latency 0.05 --error-rate 0.01
+
+Point HHParser.vacancy_url and HHParser.employer_url at
+http://127.0.0.1:<port>/vacancies and /employers.
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from benchmarks.synthetic_data import SyntheticCatalog
+from vacolector_hh.constants import HH_DATE_FORMAT, HH_MAX_RESULTS
+
+
+class FakeHHServer:
+    """
+    Threaded HTTP server serving a SyntheticCatalog like the HH API.
+
+    Failure injection:
+        latency: Seconds added to every response.
+        error_rate: Share of requests answered with 500.
+        throttle_every, throttle_burst: After every ``throttle_every``
+        requests the next ``throttle_burst`` ones get 429 with
+        Retry-After ``retry_after``, or without the header if it is
+        None.
+
+    Successful responses carry an ETag and a matching If-None-Match
+    is answered with 304 Not Modified.
+    """
+
+    def __init__(
+            self,
+            catalog: SyntheticCatalog,
+            latency: float = 0.0,
+            error_rate: float = 0.0,
+            throttle_every: int = 0,
+            throttle_burst: int = 0,
+            retry_after: Optional[int] = 1,
+            host: str = '127.0.0.1',
+            port: int = 0,
+            seed: int = 0
+    ):
+        self.catalog = catalog
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_every = throttle_every
+        self.throttle_burst = throttle_burst
+        self.retry_after = retry_after
+        self.requests = 0
+        self.pages_served = 0
+        self.bytes_served = 0
+        self.errors = 0
+        self.throttled = 0
+        self.not_modified = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """
+        Return the base URL of the server.
+
+        Returns:
+            str: Base URL without a trailing slash.
+        """
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakeHHServer':
+        """
+        Start serving in a background thread.
+
+        Returns:
+            FakeHHServer: The server itself.
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """
+        Serve in the calling thread until interrupted.
+        """
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self) -> None:
+        """
+        Stop the server and close its socket.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeHHServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def stats(self) -> dict:
+        """
+        Return request counters.
+
+        Returns:
+            dict: Requests, served pages and bytes, injected errors,
+            throttled requests and 304 answers.
+        """
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'pages_served': self.pages_served,
+                'bytes_served': self.bytes_served,
+                'errors': self.errors,
+                'throttled': self.throttled,
+                'not_modified': self.not_modified,
+            }
+
+    def _injected_failure(self):
+        """
+        Decide whether the current request fails.
+
+        Returns:
+            Optional[int]: Status code to answer with, or None.
+        """
+        with self._lock:
+            self.requests += 1
+            if self.throttle_every and self.throttle_burst:
+                cycle = self.throttle_every + self.throttle_burst
+                if (self.requests - 1) % cycle >= self.throttle_every:
+                    self.throttled += 1
+                    return 429
+            if self._rng.random() < self.error_rate:
+                self.errors += 1
+                return 500
+        return None
+
+    def vacancies_page(self, query: dict) -> dict:
+        """
+        Build a /vacancies response.
+
+        Args:
+            query (dict): Parsed query string.
+
+        Returns:
+            dict: Response body.
+        """
+        items = self.catalog.vacancies.get(query.get('employer_id', ''), [])
+        if 'date_from' in query or 'date_to' in query:
+            date_from = query.get('date_from')
+            date_to = query.get('date_to')
+            date_from = date_from and datetime.strptime(
+                date_from, HH_DATE_FORMAT
+            )
+            date_to = date_to and datetime.strptime(date_to, HH_DATE_FORMAT)
+            items = [
+                item for item in items
+                if (not date_from or date_from <= self._published_at(item))
+                and (not date_to or self._published_at(item) <= date_to)
+            ]
+        return self._paginate(items, query)
+
+    def employers_page(self, query: dict) -> dict:
+        """
+        Build an /employers response.
+
+        Args:
+            query (dict): Parsed query string.
+
+        Returns:
+            dict: Response body.
+        """
+        text = query.get('text', '').lower()
+        items = [
+            item for item in self.catalog.employers
+            if text in item['name'].lower()
+        ]
+        return self._paginate(items, query)
+
+    def employer(self, employer_id: str) -> Optional[dict]:
+        """
+        Build an /employers/{id} response.
+
+        Args:
+            employer_id (str): Employer ID.
+
+        Returns:
+            Optional[dict]: Response body or None if there is no such
+            employer.
+        """
+        for item in self.catalog.employers:
+            if item['id'] == employer_id:
+                return item
+        return None
+
+    @staticmethod
+    def _published_at(item: dict) -> datetime:
+        return datetime.strptime(item['published_at'], HH_DATE_FORMAT)
+
+    @staticmethod
+    def _paginate(items: list, query: dict) -> dict:
+        per_page = int(query.get('per_page', 20))
+        page = int(query.get('page', 0))
+        reachable = items[:HH_MAX_RESULTS]
+        return {
+            'found': len(items),
+            'pages': math.ceil(len(reachable) / per_page),
+            'page': page,
+            'per_page': per_page,
+            'items': reachable[page * per_page:(page + 1) * per_page],
+        }
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                if server.latency:
+                    time.sleep(server.latency)
+
+                parts = urlsplit(self.path)
+                query = {
+                    key: values[-1]
+                    for key, values in parse_qs(parts.query).items()
+                }
+
+                status = server._injected_failure()
+                if status is not None:
+                    self._send(status, {'errors': [{'type': str(status)}]})
+                elif parts.path == '/vacancies':
+                    self._send(200, server.vacancies_page(query), page=True)
+                elif parts.path == '/employers':
+                    self._send(200, server.employers_page(query), page=True)
+                elif parts.path.startswith('/employers/'):
+                    employer = server.employer(parts.path.rsplit('/', 1)[1])
+                    if employer is None:
+                        self._send(404, {'errors': [{'type': 'not_found'}]})
+                    else:
+                        self._send(200, employer)
+                else:
+                    self._send(404, {'errors': [{'type': 'not_found'}]})
+
+            def _send(self, status, body, page=False):
+                payload = json.dumps(body, ensure_ascii=False).encode()
+                etag = f'"{hashlib.md5(payload).hexdigest()}"'
+                if status == 200 \
+                        and self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    with server._lock:
+                        server.not_modified += 1
+                    self.end_headers()
+                    return
+
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                if status == 200:
+                    self.send_header('ETag', etag)
+                if status == 429 and server.retry_after is not None:
+                    self.send_header('Retry-After', str(server.retry_after))
+                self.end_headers()
+                # Counted before answering, so a client that has read
+                # the response sees it in stats().
+                with server._lock:
+                    server.bytes_served += len(payload)
+                    if page:
+                        server.pages_served += 1
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Add catalog and failure injection options to an argument parser.
+
+    Args:
+        parser (argparse.ArgumentParser): Parser to extend.
+    """
+    parser.add_argument('--employers', type=int, default=20)
+    parser.add_argument('--vacancies', type=int, default=500,
+                        help='Vacancies per employer')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds added to every response')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of requests answered with 500')
+    parser.add_argument('--throttle-every', type=int, default=0,
+                        help='Requests between bursts of 429 responses')
+    parser.add_argument('--throttle-burst', type=int, default=0,
+                        help='Length of every burst of 429 responses')
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def server_from_arguments(args, port: int = 0) -> FakeHHServer:
+    """
+    Create a server from parsed add_server_arguments() options.
+
+    Args:
+        args: Parsed arguments.
+        port (int, optional): Port to listen on, 0 for any free one.
+        Defaults to 0.
+
+    Returns:
+        FakeHHServer: The server, not started yet.
+    """
+    catalog = SyntheticCatalog(args.employers, args.vacancies, args.seed)
+    return FakeHHServer(
+        catalog,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_every=args.throttle_every,
+        throttle_burst=args.throttle_burst,
+        retry_after=args.retry_after,
+        port=port,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_server_arguments(parser)
+    parser.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    server = server_from_arguments(args, args.port)
+    print(f'Serving {server.catalog.vacancies_count} vacancies of '
+          f'{args.employers} employers on {server.url}')
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
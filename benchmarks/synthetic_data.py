@@ -0,0 +1,219 @@
+""" Synthetic HH API payloads and domain objects for benchmarks. """
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from vacolector_hh.constants import HH_DATE_FORMAT
+from vacolector_hh.data_classes import Employer, Vacancy
+
+CURRENCIES = ('RUR', 'RUR', 'RUR', 'USD', 'EUR', 'KZT')
+TITLES = (
+    'Python developer',
+    'Backend разработчик',
+    'Data engineer',
+    'QA инженер',
+    'DevOps engineer',
+    'Аналитик данных',
+    'Frontend developer',
+    'Системный администратор',
+)
+SKILLS = (
+    'Python', 'Django', 'PostgreSQL', 'SQL', 'Docker', 'Kubernetes',
+    'Linux', 'Git', 'REST API', 'Kafka', 'Redis', 'опыт от 3 лет',
+    'английский язык', 'FastAPI', 'asyncio', 'CI/CD',
+)
+
+
+def make_salary(rng: random.Random) -> Optional[Dict]:
+    """
+    Build a salary object as returned by the HH API.
+
+    Args:
+        rng (random.Random): Random generator.
+
+    Returns:
+        Optional[Dict]: Salary or None for vacancies without one.
+    """
+    kind = rng.random()
+    if kind < 0.3:
+        return None
+    low = rng.randrange(30, 400) * 1000
+    return {
+        'from': low if kind < 0.8 else None,
+        'to': low + rng.randrange(0, 200) * 1000 if kind > 0.5 else None,
+        'currency': rng.choice(CURRENCIES),
+        'gross': rng.random() < 0.5,
+    }
+
+
+def make_vacancy_item(
+        vacancy_id: int,
+        employer_id: int,
+        published_at: datetime,
+        rng: random.Random
+) -> Dict:
+    """
+    Build a vacancy item as returned by the HH /vacancies endpoint.
+
+    Args:
+        vacancy_id (int): Vacancy ID.
+        employer_id (int): Employer ID.
+        published_at (datetime): Publication time.
+        rng (random.Random): Random generator.
+
+    Returns:
+        Dict: Vacancy item.
+    """
+    return {
+        'id': str(vacancy_id),
+        'premium': False,
+        'name': f'{rng.choice(TITLES)} #{vacancy_id}',
+        'department': None,
+        'has_test': False,
+        'area': {'id': '1', 'name': 'Москва'},
+        'salary': make_salary(rng),
+        'type': {'id': 'open', 'name': 'Открытая'},
+        'published_at': published_at.strftime(HH_DATE_FORMAT),
+        'created_at': published_at.strftime(HH_DATE_FORMAT),
+        'archived': False,
+        'url': f'https://api.hh.ru/vacancies/{vacancy_id}',
+        'alternate_url': f'https://hh.ru/vacancy/{vacancy_id}',
+        'employer': {
+            'id': str(employer_id),
+            'name': f'Employer {employer_id}',
+            'url': f'https://api.hh.ru/employers/{employer_id}',
+            'alternate_url': f'https://hh.ru/employer/{employer_id}',
+            'trusted': True,
+        },
+        'snippet': {
+            'requirement': ', '.join(rng.sample(SKILLS, 4)),
+            'responsibility': 'Разработка и поддержка сервисов. '
+                              + ', '.join(rng.sample(SKILLS, 3)),
+        },
+        'schedule': {'id': 'remote', 'name': 'Удаленная работа'},
+        'working_days': [],
+        'professional_roles': [{'id': '96', 'name': 'Программист'}],
+        'experience': {'id': 'between1And3', 'name': 'От 1 года до 3 лет'},
+        'employment': {'id': 'full', 'name': 'Полная занятость'},
+    }
+
+
+def make_employer_item(employer_id: int, open_vacancies: int) -> Dict:
+    """
+    Build an employer item as returned by the HH /employers endpoint.
+
+    Args:
+        employer_id (int): Employer ID.
+        open_vacancies (int): Number of open vacancies.
+
+    Returns:
+        Dict: Employer item.
+    """
+    return {
+        'id': str(employer_id),
+        'name': f'Employer {employer_id}',
+        'url': f'https://api.hh.ru/employers/{employer_id}',
+        'alternate_url': f'https://hh.ru/employer/{employer_id}',
+        'logo_urls': None,
+        'vacancies_url': f'https://api.hh.ru/vacancies?employer_id='
+                         f'{employer_id}',
+        'open_vacancies': open_vacancies,
+    }
+
+
+class SyntheticCatalog:
+    """
+    In-memory set of employers and their vacancies shaped like HH API
+    items.
+    """
+
+    def __init__(
+            self,
+            employers: int,
+            vacancies_per_employer: int,
+            seed: int = 0,
+            window_days: int = 30
+    ):
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        self.employers: List[Dict] = []
+        self.vacancies: Dict[str, List[Dict]] = {}
+
+        vacancy_id = 1
+        for employer_id in range(1, employers + 1):
+            self.employers.append(
+                make_employer_item(employer_id, vacancies_per_employer)
+            )
+            items = []
+            for _ in range(vacancies_per_employer):
+                published_at = now - timedelta(
+                    seconds=rng.randrange(window_days * 24 * 3600)
+                )
+                items.append(
+                    make_vacancy_item(vacancy_id, employer_id, published_at, rng)
+                )
+                vacancy_id += 1
+            items.sort(key=lambda item: item['published_at'], reverse=True)
+            self.vacancies[str(employer_id)] = items
+
+    @property
+    def employer_objects(self) -> List[Employer]:
+        """
+        Return the catalog employers as Employer objects.
+
+        Returns:
+            List[Employer]: Employers.
+        """
+        return [
+            Employer(
+                id=int(item['id']),
+                name=item['name'],
+                alternate_url=item['alternate_url'],
+                open_vacancies=item['open_vacancies'],
+            )
+            for item in self.employers
+        ]
+
+    @property
+    def vacancies_count(self) -> int:
+        """
+        Return the number of vacancies in the catalog.
+
+        Returns:
+            int: Number of vacancies.
+        """
+        return sum(len(items) for items in self.vacancies.values())
+
+
+def make_vacancies(count: int, employer_id: int = 1, seed: int = 0) -> list:
+    """
+    Build synthetic Vacancy objects of one employer.
+
+    Args:
+        count (int): Number of vacancies.
+        employer_id (int, optional): Employer ID. Defaults to 1.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        list: List of Vacancy objects.
+    """
+    rng = random.Random(seed)
+    vacancies = []
+    for index in range(1, count + 1):
+        salary = make_salary(rng) or {}
+        vacancies.append(
+            Vacancy(
+                id=index,
+                name=f'{rng.choice(TITLES)} #{index}',
+                salary_from=salary.get('from') or 0,
+                salary_to=salary.get('to') or 0,
+                currency=salary.get('currency', ''),
+                published_at=date(2023, 7, 1 + index % 28),
+                alternate_url=f'https://hh.ru/vacancy/{index}',
+                employer_id=employer_id,
+                requirement=', '.join(rng.sample(SKILLS, 4)),
+                responsibility='Разработка и поддержка "сервисов", '
+                               + ', '.join(rng.sample(SKILLS, 3)),
+            )
+        )
+    return vacancies
@@ -0,0 +1,96 @@
+""" Fixtures shared by the end-to-end tests. """
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fake_hh_server import FakeHHServer
+from benchmarks.synthetic_data import SyntheticCatalog
+from vacolector_hh import rate_limiter
+from vacolector_hh.parser_hh import HHParser
+from vacolector_hh.rate_limiter import TokenBucket
+
+TEST_DSN_VARIABLE = 'VACOLECTOR_TEST_DSN'
+
+
+@pytest.fixture
+def hh_server():
+    """
+    Start fake HH API servers and stop them after the test.
+
+    Returns a function taking the number of employers, the number of
+    vacancies per employer and FakeHHServer options, which returns a
+    running server.
+    """
+    servers = []
+
+    def start(employers: int, vacancies: int, **options) -> FakeHHServer:
+        server = FakeHHServer(SyntheticCatalog(employers, vacancies),
+                              **options)
+        servers.append(server.start())
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def hh_parser():
+    """
+    Return a function building an HHParser that requests a fake HH API
+    server without the production rate limit.
+    """
+    def build(server: FakeHHServer, **options) -> HHParser:
+        options.setdefault('token_bucket', TokenBucket(10_000))
+        parser = HHParser(**options)
+        parser.vacancy_url = f'{server.url}/vacancies'
+        parser.employer_url = f'{server.url}/employers'
+        return parser
+
+    return build
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Replace the clock of the rate limiters with one that only moves
+    when they sleep or the test advances it.
+    """
+    now = [1000.0]
+
+    def advance(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(rate_limiter, 'time', SimpleNamespace(
+        monotonic=lambda: now[0],
+        sleep=advance,
+    ))
+    return SimpleNamespace(now=lambda: now[0], advance=advance)
+
+
+@pytest.fixture
+def db_manager(monkeypatch):
+    """
+    Return a DBManager connected to the PostgreSQL database given as a
+    libpq connection string in VACOLECTOR_TEST_DSN, with freshly
+    created tables. The tests using it are skipped without one.
+
+    The tables of that database are dropped and recreated for every
+    test, so point it at a scratch database.
+    """
+    dsn = os.environ.get(TEST_DSN_VARIABLE)
+    if not dsn:
+        pytest.skip(f'{TEST_DSN_VARIABLE} is not set')
+
+    from psycopg2.extensions import parse_dsn
+
+    from vacolector_hh import db_manager as db_module
+
+    params = parse_dsn(dsn)
+    monkeypatch.setattr(db_module, 'config', lambda: dict(params))
+    manager = db_module.DBManager()
+    manager.db_name = params['dbname']
+    manager.create_tables()
+    yield manager
+    manager.close()
@@ -0,0 +1,147 @@
+""" In-memory stand-in for DBManager used by the sync tests. """
+import copy
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from vacolector_hh.constants import CHECKPOINT_DONE
+from vacolector_hh.data_classes import SyncState, UpsertStats
+
+
+class FakeDBManager:
+    """
+    Keeps employers' open vacancy counts, vacancies, sync states, sync
+    runs and checkpoints in dictionaries, with the semantics of the
+    DBManager methods that VacancySync and RefreshScheduler call.
+
+    A transaction restores everything written inside it when the block
+    raises, like a rollback. Setting ``fail_on_upsert`` to N makes the
+    N-th call of upsert_vacancies() raise ConnectionError, to interrupt
+    a sync.
+    """
+
+    def __init__(self):
+        self.employers = {}
+        self.vacancies = {}
+        self.sync_states = {}
+        self.runs = {}
+        self.checkpoints = {}
+        self.upserts = 0
+        self.fail_on_upsert = None
+        self.salary_stats_refreshes = 0
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self):
+        self._depth += 1
+        saved = self._save() if self._depth == 1 else None
+        try:
+            yield
+        except BaseException:
+            if saved is not None:
+                self._restore(saved)
+            raise
+        finally:
+            self._depth -= 1
+
+    def get_employers(self) -> list:
+        return list(self.employers)
+
+    def update_open_vacancies(self, employer_id, open_vacancies) -> None:
+        self.employers[employer_id] = open_vacancies
+
+    def upsert_vacancies(self, vacancy_list) -> UpsertStats:
+        self.upserts += 1
+        if self.upserts == self.fail_on_upsert:
+            raise ConnectionError('connection lost')
+        stats = UpsertStats()
+        for row in vacancy_list.rows():
+            stored = self.vacancies.get(row[0])
+            if stored is None:
+                stats.inserted += 1
+            elif stored != row:
+                stats.updated += 1
+            else:
+                stats.unchanged += 1
+            self.vacancies[row[0]] = row
+        return stats
+
+    def delete_stale_vacancies(self, employer_id, keep_ids) -> int:
+        keep_ids = {int(vacancy_id) for vacancy_id in keep_ids}
+        stale = [
+            vacancy_id for vacancy_id, row in self.vacancies.items()
+            if row[7] == employer_id and vacancy_id not in keep_ids
+        ]
+        for vacancy_id in stale:
+            del self.vacancies[vacancy_id]
+        return len(stale)
+
+    def get_sync_states(self) -> dict:
+        return dict(self.sync_states)
+
+    def set_sync_states(self, states) -> None:
+        for state in states:
+            stored = self.sync_states.get(state.employer_id)
+            if stored is None:
+                self.sync_states[state.employer_id] = state
+                continue
+            published = [
+                value for value in (
+                    stored.last_published_at, state.last_published_at
+                ) if value is not None
+            ]
+            self.sync_states[state.employer_id] = SyncState(
+                employer_id=state.employer_id,
+                last_published_at=max(published) if published else None,
+                last_synced_at=state.last_synced_at
+                or stored.last_synced_at,
+                last_full_sync_at=state.last_full_sync_at
+                or stored.last_full_sync_at,
+            )
+
+    def begin_sync_run(self, incremental, max_age) -> tuple:
+        now = datetime.now(timezone.utc)
+        for run in self.runs.values():
+            if run['finished_at'] is None and (
+                    run['incremental'] != incremental
+                    or run['started_at'] < now - max_age
+            ):
+                run['status'] = 'abandoned'
+                run['finished_at'] = now
+        unfinished = [
+            run_id for run_id, run in self.runs.items()
+            if run['finished_at'] is None
+        ]
+        if unfinished:
+            run_id = unfinished[-1]
+            return run_id, dict(self.checkpoints.get(run_id, {}))
+
+        run_id = len(self.runs) + 1
+        self.runs[run_id] = {
+            'incremental': incremental,
+            'started_at': now,
+            'finished_at': None,
+            'status': None,
+        }
+        return run_id, {}
+
+    def set_sync_checkpoints(self, run_id, checkpoints) -> None:
+        stored = self.checkpoints.setdefault(run_id, {})
+        for checkpoint in checkpoints:
+            stored[checkpoint.employer_id] = checkpoint
+
+    def finish_sync_run(self, run_id, status=CHECKPOINT_DONE) -> None:
+        self.runs[run_id]['status'] = status
+        self.runs[run_id]['finished_at'] = datetime.now(timezone.utc)
+        self.checkpoints.pop(run_id, None)
+
+    def refresh_salary_stats(self) -> None:
+        self.salary_stats_refreshes += 1
+
+    def _save(self) -> tuple:
+        return copy.deepcopy(
+            (self.vacancies, self.sync_states, self.runs, self.checkpoints)
+        )
+
+    def _restore(self, saved: tuple) -> None:
+        (self.vacancies, self.sync_states, self.runs,
+         self.checkpoints) = saved
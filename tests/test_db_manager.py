@@ -0,0 +1,246 @@
+""" Tests of DBManager against a scratch PostgreSQL database. """
+import threading
+from datetime import datetime, timedelta, timezone
+
+from vacolector_hh.constants import CHECKPOINT_DONE, CHECKPOINT_RUNNING
+from vacolector_hh.data_classes import (
+    Employer,
+    SyncCheckpoint,
+    SyncState,
+    UpsertStats,
+    Vacancy,
+)
+
+
+def make_vacancy(vacancy_id, employer_id=1, name='Python developer',
+                 salary_from=100_000, salary_to=None, currency='RUR',
+                 requirement='Python', responsibility='Backend'):
+    return Vacancy(
+        id=vacancy_id,
+        name=name,
+        salary_from=salary_from,
+        salary_to=salary_to,
+        currency=currency,
+        published_at=datetime(2024, 5, 1, 12, 0),
+        alternate_url=f'https://hh.ru/vacancy/{vacancy_id}',
+        employer_id=employer_id,
+        requirement=requirement,
+        responsibility=responsibility,
+    )
+
+
+def add_employers(db_manager, *employer_ids):
+    db_manager.upsert_employers(
+        Employer(employer_id, f'Employer {employer_id}',
+                 f'https://hh.ru/employer/{employer_id}', 0)
+        for employer_id in employer_ids
+    )
+
+
+def query(db_manager, sql, params=None):
+    pool = db_manager.get_pool()
+    conn = pool.getconn()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(sql, params)
+            return cur.fetchall()
+    finally:
+        pool.putconn(conn)
+
+
+def test_keyword_search_matches_substrings(db_manager):
+    add_employers(db_manager, 1)
+    db_manager.upsert_vacancies([
+        make_vacancy(1, name='Senior Developer'),
+        make_vacancy(2, name='Analyst', requirement='Some devops'),
+        make_vacancy(3, name='Analyst', responsibility='DEVELOP services'),
+        make_vacancy(4, name='Designer'),
+    ])
+
+    found = db_manager.get_vacancies_with_keyword('dev')
+
+    assert sorted(row[5] for row in found) == [
+        f'https://hh.ru/vacancy/{vacancy_id}' for vacancy_id in (1, 2, 3)
+    ]
+    assert len(db_manager.get_vacancies_with_keyword('dev', limit=2)) == 2
+    assert db_manager.get_vacancies_with_keyword('%') == []
+
+
+def test_upsert_counts_inserted_updated_and_unchanged(db_manager):
+    add_employers(db_manager, 1)
+    vacancies = [make_vacancy(vacancy_id) for vacancy_id in (1, 2, 3)]
+    versions = "SELECT id, xmin::text FROM vacancies ORDER BY id;"
+
+    assert db_manager.upsert_vacancies(vacancies) == \
+        UpsertStats(inserted=3)
+    stored = query(db_manager, versions)
+    assert db_manager.upsert_vacancies(vacancies) == \
+        UpsertStats(unchanged=3)
+    # Unchanged rows are not rewritten.
+    assert query(db_manager, versions) == stored
+
+    changed = make_vacancy(2, salary_from=150_000)
+    stats = db_manager.upsert_vacancies(
+        [vacancies[0], changed, make_vacancy(4), make_vacancy(4)]
+    )
+
+    assert stats == UpsertStats(inserted=1, updated=1, unchanged=1)
+    assert query(
+        db_manager, "SELECT id, salary_from FROM vacancies ORDER BY id;"
+    ) == [(1, 100_000), (2, 150_000), (3, 100_000), (4, 100_000)]
+
+
+def test_salary_stats_are_refreshed_without_blocking_readers(db_manager):
+    add_employers(db_manager, 1)
+    db_manager.upsert_vacancies([
+        make_vacancy(1, salary_from=100_000, salary_to=200_000),
+        make_vacancy(2, salary_from=None, salary_to=90_000),
+        make_vacancy(3, salary_from=60_000),
+        make_vacancy(4, salary_from=None),
+    ])
+    assert db_manager.get_avg_salary() is None
+
+    # A reader in the middle of a transaction on the cached average.
+    pool = db_manager.get_pool()
+    reader = pool.getconn()
+    try:
+        with reader.cursor() as cur:
+            cur.execute("SELECT avg_salary FROM salary_stats;")
+        refresh = threading.Thread(target=db_manager.refresh_salary_stats)
+        refresh.start()
+        refresh.join(timeout=5)
+        assert not refresh.is_alive()
+    finally:
+        reader.rollback()
+        pool.putconn(reader)
+        refresh.join()
+
+    assert db_manager.get_avg_salary() == 100_000
+    assert [
+        row[5] for row in db_manager.get_vacancies_with_higher_salary()
+    ] == ['https://hh.ru/vacancy/1']
+
+
+def test_vacancies_are_streamed_through_a_server_side_cursor(db_manager):
+    add_employers(db_manager, 1)
+    db_manager.upsert_vacancies(
+        make_vacancy(vacancy_id) for vacancy_id in range(1, 11)
+    )
+    expected = sorted(db_manager.get_all_vacancies())
+
+    rows = db_manager.iter_all_vacancies(itersize=3)
+    first = next(rows)
+    # The rows are fetched from a named cursor, three at a time, on a
+    # connection held until the stream ends.
+    assert db_manager.pool_stats()['in_use'] == 1
+    [(last_statement,)] = query(
+        db_manager,
+        """
+        SELECT query FROM pg_stat_activity
+        WHERE datname = current_database() AND pid <> pg_backend_pid()
+            AND state = 'idle in transaction';
+        """
+    )
+    assert last_statement.startswith('FETCH FORWARD 3 FROM')
+    assert sorted([first, *rows]) == expected
+    assert db_manager.pool_stats()['in_use'] == 0
+
+    rows = db_manager.iter_all_vacancies(itersize=3)
+    next(rows)
+    rows.close()
+    assert db_manager.pool_stats()['in_use'] == 0
+
+    with db_manager.transaction():
+        assert sorted(db_manager.iter_all_vacancies(itersize=3)) == expected
+
+
+def test_sync_state_watermark_never_moves_backwards(db_manager):
+    add_employers(db_manager, 1, 2)
+    published = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    synced = datetime(2024, 5, 2, 8, 0, tzinfo=timezone.utc)
+    db_manager.set_sync_states([
+        SyncState(1, published, synced, synced),
+        SyncState(2, published, synced),
+    ])
+
+    later = synced + timedelta(hours=1)
+    db_manager.set_sync_states([
+        SyncState(1, published - timedelta(days=1), later),
+        SyncState(2, None, None, later),
+    ])
+
+    assert db_manager.get_sync_states() == {
+        1: SyncState(1, published, later, synced),
+        2: SyncState(2, published, synced, later),
+    }
+
+
+def test_unfinished_sync_run_is_resumed_with_its_checkpoints(db_manager):
+    max_age = timedelta(hours=12)
+    run_id, checkpoints = db_manager.begin_sync_run(True, max_age)
+    assert checkpoints == {}
+
+    db_manager.set_sync_checkpoints(run_id, [
+        SyncCheckpoint(1, CHECKPOINT_RUNNING, 1),
+        SyncCheckpoint(2, CHECKPOINT_RUNNING, 0),
+    ])
+    db_manager.set_sync_checkpoints(
+        run_id, [SyncCheckpoint(1, CHECKPOINT_DONE, 3)]
+    )
+
+    assert db_manager.begin_sync_run(True, max_age) == (run_id, {
+        1: SyncCheckpoint(1, CHECKPOINT_DONE, 3),
+        2: SyncCheckpoint(2, CHECKPOINT_RUNNING, 0),
+    })
+
+    db_manager.finish_sync_run(run_id)
+
+    assert query(
+        db_manager, "SELECT status FROM sync_runs WHERE id = %s;", (run_id,)
+    ) == [(CHECKPOINT_DONE,)]
+    assert query(db_manager, "SELECT * FROM sync_checkpoints;") == []
+    next_run_id, checkpoints = db_manager.begin_sync_run(True, max_age)
+    assert next_run_id != run_id
+    assert checkpoints == {}
+
+
+def test_other_kind_or_old_sync_runs_are_abandoned(db_manager):
+    max_age = timedelta(hours=12)
+    incremental_run, _ = db_manager.begin_sync_run(True, max_age)
+    db_manager.set_sync_checkpoints(
+        incremental_run, [SyncCheckpoint(1, CHECKPOINT_DONE, 1)]
+    )
+
+    full_run, checkpoints = db_manager.begin_sync_run(False, max_age)
+    assert full_run != incremental_run
+    assert checkpoints == {}
+
+    old_run_replacement, _ = db_manager.begin_sync_run(False, timedelta(0))
+    assert old_run_replacement != full_run
+
+    assert query(
+        db_manager, "SELECT id, status FROM sync_runs ORDER BY id;"
+    ) == [
+        (incremental_run, 'abandoned'),
+        (full_run, 'abandoned'),
+        (old_run_replacement, CHECKPOINT_RUNNING),
+    ]
+
+
+def test_deleting_an_employer_deletes_its_vacancies(db_manager):
+    add_employers(db_manager, 1, 2)
+    db_manager.upsert_vacancies([
+        make_vacancy(1, employer_id=1),
+        make_vacancy(2, employer_id=2),
+    ])
+    db_manager.set_sync_states([SyncState(1), SyncState(2)])
+
+    assert db_manager.delete_employer(1) == 1
+    assert db_manager.delete_employer(1) == 0
+    assert db_manager.get_employers() == [2]
+    assert query(db_manager, "SELECT id FROM vacancies;") == [(2,)]
+    assert set(db_manager.get_sync_states()) == {2}
+
+    assert db_manager.delete_employer() == 1
+    assert db_manager.get_employers() == []
+    assert query(db_manager, "SELECT id FROM vacancies;") == []
@@ -0,0 +1,85 @@
+""" Tests of the batch employer lookup and its name index. """
+from vacolector_hh.employer_resolver import EmployerResolver
+
+
+def ids(resolved):
+    return {
+        name: [employer.id for employer in employers]
+        for name, employers in resolved.items()
+    }
+
+
+def test_repeated_names_are_searched_once(hh_server, hh_parser, tmp_path):
+    server = hh_server(employers=3, vacancies=10)
+    resolver = EmployerResolver(
+        hh_parser(server), str(tmp_path / 'index.json'), workers=4
+    )
+
+    resolved = resolver.resolve([
+        'Employer 2', ' employer  2 ', 'EMPLOYER 1', '', '   ', 'Nobody',
+    ])
+
+    assert list(resolved) == ['Employer 2', 'EMPLOYER 1', 'Nobody']
+    assert ids(resolved) == {
+        'Employer 2': [2], 'EMPLOYER 1': [1], 'Nobody': []
+    }
+    assert resolved['Employer 2'][0].open_vacancies == 10
+    assert server.stats()['requests'] == 3
+
+
+def test_index_is_reused_by_later_runs(hh_server, hh_parser, tmp_path):
+    server = hh_server(employers=3, vacancies=10)
+    index_path = str(tmp_path / 'index.json')
+    EmployerResolver(hh_parser(server), index_path).resolve(
+        ['Employer 1', 'Employer 3']
+    )
+    requests = server.stats()['requests']
+
+    resolver = EmployerResolver(hh_parser(server), index_path)
+    resolved = resolver.resolve(['employer 3', 'Employer 2'])
+
+    assert ids(resolved) == {'employer 3': [3], 'Employer 2': [2]}
+    assert server.stats()['requests'] == requests + 1
+    # Open vacancy counts are not taken from the index.
+    [indexed] = resolved['employer 3']
+    assert indexed.open_vacancies is None
+
+    server.catalog.employers[2]['open_vacancies'] = 7
+    current = resolver.current(resolved['employer 3']
+                               + resolved['Employer 2'])
+
+    assert [(employer.id, employer.open_vacancies)
+            for employer in current] == [(3, 7), (2, 10)]
+    assert server.stats()['requests'] == requests + 2
+
+
+def test_expired_and_forgotten_names_are_searched_again(
+        hh_server, hh_parser, tmp_path
+):
+    server = hh_server(employers=3, vacancies=10)
+    index_path = str(tmp_path / 'index.json')
+    resolver = EmployerResolver(hh_parser(server), index_path)
+    resolver.resolve(['Employer 1', 'Employer 2'])
+
+    resolver.forget(['EMPLOYER 1'])
+    resolver.resolve(['Employer 1', 'Employer 2'])
+    assert server.stats()['requests'] == 3
+
+    expired = EmployerResolver(hh_parser(server), index_path, max_age_days=0)
+    expired.resolve(['Employer 1', 'Employer 2'])
+    assert server.stats()['requests'] == 5
+
+
+def test_failed_searches_are_left_out(hh_server, hh_parser, tmp_path):
+    server = hh_server(employers=2, vacancies=10)
+    hh = hh_parser(server)
+    index_path = str(tmp_path / 'index.json')
+    employer_url = hh.employer_url
+    hh.employer_url = f'{server.url}/missing'
+
+    resolved = EmployerResolver(hh, index_path).resolve(['Employer 1'])
+
+    assert resolved == {}
+    hh.employer_url = employer_url
+    resolved = EmployerResolver(hh, index_path).resolve(['Employer 1'])
+    assert ids(resolved) == {'Employer 1': [1]}
@@ -0,0 +1,109 @@
+""" Tests of the on-disk cache of HH API responses. """
+import os
+
+from vacolector_hh.http_cache import ResponseCache
+
+
+def test_unchanged_pages_are_revalidated(hh_server, hh_parser, tmp_path):
+    server = hh_server(employers=1, vacancies=250)
+    cache = ResponseCache(str(tmp_path))
+    hh = hh_parser(server, response_cache=cache)
+
+    first = hh.parse_vacancies(1)
+    assert cache.stats()['misses'] == 3
+    assert server.stats()['pages_served'] == 3
+
+    second = hh.parse_vacancies(1)
+
+    assert cache.stats()['revalidated'] == 3
+    assert server.stats()['not_modified'] == 3
+    assert server.stats()['pages_served'] == 3
+    # Vacancies of revalidated pages are not built again.
+    assert all(a is b for a, b in zip(first, second))
+
+    closed = server.catalog.vacancies['1'].pop()
+    third = hh.parse_vacancies(1)
+
+    assert len(third) == 249
+    assert int(closed['id']) not in {int(vacancy.id) for vacancy in third}
+    assert cache.stats()['misses'] == 6
+
+
+def test_cache_outlives_the_parser(hh_server, hh_parser, tmp_path):
+    server = hh_server(employers=1, vacancies=50)
+    hh_parser(server, response_cache=ResponseCache(str(tmp_path))) \
+        .parse_vacancies(1)
+
+    cache = ResponseCache(str(tmp_path))
+    vacancies = hh_parser(server, response_cache=cache).parse_vacancies(1)
+
+    assert len(vacancies) == 50
+    assert cache.stats()['revalidated'] == 1
+    assert server.stats()['pages_served'] == 1
+
+
+def test_employer_searches_are_fresh_for_their_ttl(
+        hh_server, hh_parser, tmp_path
+):
+    server = hh_server(employers=3, vacancies=0)
+    cache = ResponseCache(str(tmp_path))
+    hh = hh_parser(server, response_cache=cache)
+
+    first = hh.parse_employers('employer')
+    requests = server.stats()['requests']
+    second = hh.parse_employers('employer')
+
+    assert second == first
+    assert server.stats()['requests'] == requests
+    assert cache.stats()['hits'] == cache.stats()['misses']
+
+
+def test_uncacheable_responses_are_not_stored(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    url = 'https://api.hh.ru/vacancies'
+
+    assert cache.store(url, {}, {}, b'{}', {}) is None
+    assert cache.store(
+        url, {}, {'ETag': '"a"', 'Cache-Control': 'no-store'}, b'{}', {}
+    ) is None
+    entry = cache.store(
+        url, {'page': 0, 'employer_id': 1},
+        {'Last-Modified': 'Wed, 01 May 2024 12:00:00 GMT'}, b'{}', {}
+    )
+
+    assert not entry.is_fresh()
+    assert entry.validators() == {
+        'If-Modified-Since': 'Wed, 01 May 2024 12:00:00 GMT'
+    }
+    # Parameters are part of the key whatever their order.
+    assert cache.get(url, {'employer_id': 1, 'page': 0}) is entry
+    assert cache.get(url, {'employer_id': 1, 'page': 1}) is None
+
+
+def test_least_recently_used_responses_are_evicted(tmp_path):
+    url = 'https://api.hh.ru/vacancies'
+    body = b'{"items": [' + b'0, ' * 100 + b'0]}'
+    cache = ResponseCache(str(tmp_path), memory_entries=1)
+    entries = [
+        cache.store(url, {'page': page}, {'ETag': f'"{page}"'}, body, {})
+        for page in range(3)
+    ]
+    # Room for two and a half responses.
+    cache.max_bytes = cache.stats()['bytes'] * 5 // 6
+    for entry, used_at in zip(entries, (300, 100, 200)):
+        os.utime(cache._path(entry.key, '.json'), (used_at, used_at))
+
+    # A restart orders the files by their last use.
+    cache = ResponseCache(str(tmp_path), max_bytes=cache.max_bytes)
+
+    assert cache.stats()['evictions'] == 1
+    assert cache.get(url, {'page': 1}) is None
+    assert cache.get(url, {'page': 0}).data == {'items': [0] * 101}
+
+    cache.touch(cache.get(url, {'page': 2}))
+    cache.store(url, {'page': 3}, {'ETag': '"3"'}, body, {})
+
+    assert cache.get(url, {'page': 0}) is None
+    assert cache.get(url, {'page': 2}) is not None
+    assert cache.get(url, {'page': 3}) is not None
+    assert len(os.listdir(tmp_path)) == 4
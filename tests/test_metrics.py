@@ -0,0 +1,89 @@
+""" Tests of the Prometheus text rendering of the metrics registry. """
+import urllib.request
+
+from vacolector_hh.metrics import MetricsRegistry
+
+
+def test_counters_are_rendered_per_label_set():
+    registry = MetricsRegistry()
+    requests = registry.counter('hh_requests_total', 'HTTP requests.')
+    requests.inc(status=200)
+    requests.inc(2, status=200)
+    requests.inc(status=429)
+    registry.counter('hh_pages_total', 'Pages.').inc()
+
+    assert registry.counter('hh_requests_total', 'Ignored.') is requests
+    assert registry.render() == (
+        '# HELP hh_requests_total HTTP requests.\n'
+        '# TYPE hh_requests_total counter\n'
+        'hh_requests_total{status="200"} 3\n'
+        'hh_requests_total{status="429"} 1\n'
+        '# HELP hh_pages_total Pages.\n'
+        '# TYPE hh_pages_total counter\n'
+        'hh_pages_total 1\n'
+    )
+    assert registry.summary() == 'hh_requests_total: 4\nhh_pages_total: 1'
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    seconds = registry.histogram('db_call_seconds', 'Calls.', (0.1, 1))
+    seconds.observe(0.05, method='upsert')
+    seconds.observe(0.1, method='upsert')
+    seconds.observe(0.5, method='upsert')
+    seconds.observe(3, method='upsert')
+
+    assert registry.render() == (
+        '# HELP db_call_seconds Calls.\n'
+        '# TYPE db_call_seconds histogram\n'
+        'db_call_seconds_bucket{method="upsert",le="0.1"} 2\n'
+        'db_call_seconds_bucket{method="upsert",le="1"} 3\n'
+        'db_call_seconds_bucket{method="upsert",le="+Inf"} 4\n'
+        'db_call_seconds_count{method="upsert"} 4\n'
+        'db_call_seconds_sum{method="upsert"} 3.65\n'
+    )
+    assert seconds.totals() == (4, 3.65)
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter('c', 'Counter.').inc(path='a"b\\c')
+
+    assert 'c{path="a\\"b\\\\c"} 1\n' in registry.render()
+
+
+def test_gauges_without_a_value_are_left_out():
+    registry = MetricsRegistry()
+    values = {'in_use': 2}
+    registry.gauge('db_pool_in_use', 'In use.', lambda: values.get('in_use'))
+    registry.gauge('db_pool_waits', 'Waits.', lambda: values.get('waits'))
+
+    assert registry.render() == (
+        '# HELP db_pool_in_use In use.\n'
+        '# TYPE db_pool_in_use gauge\n'
+        'db_pool_in_use 2\n'
+        '# HELP db_pool_waits Waits.\n'
+        '# TYPE db_pool_waits gauge\n'
+    )
+    assert registry.summary() == 'db_pool_in_use: 2'
+
+
+def test_metrics_are_written_and_served(tmp_path):
+    registry = MetricsRegistry()
+    registry.counter('hh_pages_total', 'Pages.').inc(5)
+    path = tmp_path / 'vacolector.prom'
+
+    registry.write_textfile(str(path))
+    registry.serve(0)
+    host, port = registry._server.server_address[:2]
+    try:
+        with urllib.request.urlopen(f'http://{host}:{port}/metrics') as r:
+            served = r.read().decode()
+            content_type = r.headers['Content-Type']
+    finally:
+        registry._server.shutdown()
+        registry._server.server_close()
+
+    assert path.read_text() == registry.render() == served
+    assert content_type == 'text/plain; version=0.0.4'
+    assert list(tmp_path.iterdir()) == [path]
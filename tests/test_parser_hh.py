@@ -0,0 +1,170 @@
+""" End-to-end tests of HHParser against the fake HH API server. """
+import logging
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from vacolector_hh import parser, parser_hh
+from vacolector_hh.constants import BACKOFF_FACTOR, MAX_RETRIES
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Record the backoff delays of RequestMixin instead of waiting.
+    """
+    delays = []
+    monkeypatch.setattr(parser, 'time', SimpleNamespace(
+        perf_counter=time.perf_counter,
+        time=time.time,
+        sleep=delays.append,
+    ))
+    return delays
+
+
+def catalog_ids(server, employer_id):
+    return [
+        int(item['id'])
+        for item in server.catalog.vacancies[str(employer_id)]
+    ]
+
+
+def test_pages_are_yielded_in_order(hh_server, hh_parser):
+    server = hh_server(employers=1, vacancies=450)
+    hh = hh_parser(server, concurrency=3)
+
+    pages = list(hh.iter_numbered_vacancy_pages(1))
+
+    assert [number for number, _ in pages] == [0, 1, 2, 3, 4]
+    assert [
+        int(vacancy.id) for _, vacancies in pages for vacancy in vacancies
+    ] == catalog_ids(server, 1)
+    assert server.stats()['pages_served'] == 5
+
+
+def test_pages_before_start_page_are_skipped(hh_server, hh_parser):
+    server = hh_server(employers=1, vacancies=450)
+    hh = hh_parser(server)
+
+    pages = list(hh.iter_numbered_vacancy_pages(1, start_page=3))
+
+    assert [number for number, _ in pages] == [3, 4]
+    assert [
+        int(vacancy.id) for _, vacancies in pages for vacancy in vacancies
+    ] == catalog_ids(server, 1)[300:]
+
+
+def test_search_above_result_cap_is_sharded(hh_server, hh_parser):
+    server = hh_server(employers=1, vacancies=2500)
+    hh = hh_parser(server, concurrency=4)
+    request_page = hh._request_page
+    lock = threading.Lock()
+    in_flight = []
+    peak = [0]
+
+    def counting_request_page(*args):
+        with lock:
+            in_flight.append(1)
+            peak[0] = max(peak[0], len(in_flight))
+        try:
+            return request_page(*args)
+        finally:
+            with lock:
+                in_flight.pop()
+
+    hh._request_page = counting_request_page
+    pages = list(hh.iter_numbered_vacancy_pages(1))
+
+    ids = [
+        int(vacancy.id) for _, vacancies in pages for vacancy in vacancies
+    ]
+    assert len(ids) == len(set(ids))
+    assert set(ids) == set(catalog_ids(server, 1))
+    assert [number for number, _ in pages] == list(range(len(pages)))
+    assert peak[0] <= 4
+
+
+def test_vacancies_before_shard_window_are_fetched(
+        hh_server, hh_parser, monkeypatch
+):
+    monkeypatch.setattr(parser_hh, 'SHARD_WINDOW_DAYS', 10)
+    server = hh_server(employers=1, vacancies=2500)
+    hh = hh_parser(server)
+
+    ids = {
+        int(vacancy.id)
+        for _, vacancies in hh.iter_numbered_vacancy_pages(1)
+        for vacancy in vacancies
+    }
+
+    assert ids == set(catalog_ids(server, 1))
+
+
+def test_truncated_shard_is_logged(hh_server, hh_parser, monkeypatch, caplog):
+    monkeypatch.setattr(parser_hh, 'MIN_SHARD_SECONDS', 400 * 24 * 3600)
+    server = hh_server(employers=1, vacancies=2500)
+    hh = hh_parser(server)
+
+    with caplog.at_level(logging.WARNING, logger=parser_hh.__name__):
+        ids = [
+            vacancy.id
+            for _, vacancies in hh.iter_numbered_vacancy_pages(1)
+            for vacancy in vacancies
+        ]
+
+    assert len(ids) == 2000
+    assert 'only 2000 can be fetched' in caplog.text
+    assert 'Sharded search covers' not in caplog.text
+
+
+def test_throttled_page_is_retried_with_backoff(
+        hh_server, hh_parser, sleeps
+):
+    server = hh_server(
+        employers=1, vacancies=200,
+        throttle_every=1, throttle_burst=2, retry_after=None
+    )
+    hh = hh_parser(server, concurrency=1)
+
+    vacancies = hh.parse_vacancies(1)
+
+    assert [int(vacancy.id) for vacancy in vacancies] == \
+        catalog_ids(server, 1)
+    assert server.stats()['throttled'] == 2
+    assert sleeps == [BACKOFF_FACTOR, BACKOFF_FACTOR * 2]
+
+
+def test_throttling_fails_after_max_retries(hh_server, hh_parser, sleeps):
+    server = hh_server(
+        employers=1, vacancies=200,
+        throttle_every=1, throttle_burst=100, retry_after=None
+    )
+    hh = hh_parser(server, concurrency=1)
+
+    with pytest.raises(requests.HTTPError):
+        hh.parse_vacancies(1)
+
+    assert server.stats()['throttled'] == MAX_RETRIES + 1
+    assert sleeps == [
+        BACKOFF_FACTOR * 2 ** attempt for attempt in range(MAX_RETRIES)
+    ]
+
+
+def test_throttling_with_retry_after_reaches_the_limiter(
+        hh_server, hh_parser, sleeps
+):
+    server = hh_server(
+        employers=1, vacancies=200,
+        throttle_every=1, throttle_burst=1, retry_after=1
+    )
+    hh = hh_parser(server, concurrency=1)
+
+    vacancies = hh.parse_vacancies(1)
+
+    assert len(vacancies) == 200
+    assert server.stats()['throttled'] == 1
+    assert hh.concurrency_limiter.throttled == 1
+    assert sleeps == [1.0]
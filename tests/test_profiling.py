@@ -0,0 +1,23 @@
+""" Tests of the sync profiler. """
+from concurrent.futures import ThreadPoolExecutor
+
+from vacolector_hh.profiling import ThreadProfiler
+
+
+def busy_worker(number: int) -> int:
+    return sum(range(number * 1000))
+
+
+def test_threads_run_and_are_profiled():
+    profiler = ThreadProfiler()
+    profiler.start()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(busy_worker, range(8)))
+    finally:
+        stats = profiler.stop()
+
+    assert results == [busy_worker(number) for number in range(8)]
+    assert any(
+        function == 'busy_worker' for _, _, function in stats.stats
+    )
@@ -0,0 +1,99 @@
+""" Tests of the token bucket and the adaptive concurrency limiter. """
+import threading
+import time
+
+import pytest
+
+from vacolector_hh.rate_limiter import AdaptiveConcurrencyLimiter, TokenBucket
+
+
+def test_token_bucket_waits_for_tokens(clock):
+    bucket = TokenBucket(rate=10, capacity=2)
+
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.1)
+
+    clock.advance(10)
+    waits = [bucket.acquire() for _ in range(4)]
+
+    # Idle time fills the bucket only up to its capacity.
+    assert waits == pytest.approx([0, 0, 0.1, 0.1])
+
+
+def test_token_bucket_refund_is_capped(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.acquire(2)
+
+    bucket.refund(1)
+    assert bucket.acquire() == 0
+
+    bucket.refund(5)
+    assert bucket.acquire(2) == 0
+    assert bucket.acquire() == pytest.approx(1)
+
+
+def test_limit_grows_by_one_per_round_of_successes(clock):
+    limiter = AdaptiveConcurrencyLimiter(4, maximum=6)
+
+    for _ in range(4):
+        limiter.acquire()
+        limiter.release()
+    assert 4.9 < limiter.limit < 5
+
+    for _ in range(50):
+        limiter.acquire()
+        limiter.release()
+    assert limiter.limit == 6
+
+    # Failures that say nothing about the server load change nothing.
+    limiter.acquire()
+    limiter.release(throttled=None)
+    assert limiter.limit == 6
+    assert limiter.in_flight == 0
+
+
+def test_throttling_halves_the_limit_once_per_cooldown(clock):
+    limiter = AdaptiveConcurrencyLimiter(8, minimum=3, cooldown=1.0)
+
+    for _ in range(3):
+        limiter.acquire()
+    for _ in range(3):
+        limiter.release(throttled=True)
+    assert limiter.limit == 4
+    assert limiter.throttled == 3
+
+    clock.advance(1.0)
+    limiter.acquire()
+    limiter.release(throttled=True)
+    assert limiter.limit == 3
+
+
+def test_requests_above_the_limit_wait_for_a_release():
+    limiter = AdaptiveConcurrencyLimiter(1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def request():
+        limiter.acquire()
+        acquired.set()
+
+    waiting = threading.Thread(target=request)
+    waiting.start()
+    assert not acquired.wait(0.1)
+
+    limiter.release()
+    assert acquired.wait(1)
+    waiting.join()
+    assert limiter.in_flight == 1
+
+
+def test_retry_after_pauses_all_requests():
+    limiter = AdaptiveConcurrencyLimiter(4)
+    limiter.acquire()
+    limiter.release(throttled=True, retry_after=0.2)
+
+    started = time.monotonic()
+    limiter.acquire()
+
+    assert time.monotonic() - started >= 0.2
@@ -0,0 +1,97 @@
+""" Tests of the page archive and its replay. """
+from types import SimpleNamespace
+
+from benchmarks.synthetic_data import SyntheticCatalog
+from tests.fake_db import FakeDBManager
+from vacolector_hh import replay
+from vacolector_hh.archive import ResponseArchive
+from vacolector_hh.replay import ArchiveReplay
+
+
+class SubscribedDBManager(FakeDBManager):
+    def get_employers(self):
+        return [1]
+
+
+def page(items: list, name: str) -> dict:
+    return {'page': 0, 'items': [dict(item, name=name) for item in items]}
+
+
+def test_pages_of_several_archives_are_replayed_in_fetch_order(tmp_path):
+    items = SyntheticCatalog(1, 10).vacancies['1']
+    first = ResponseArchive(str(tmp_path))
+    second = ResponseArchive(str(tmp_path))
+    first.append(1, page(items, 'old'))
+    second.append(1, page(items, 'changed'))
+    first.append(1, page(items, 'latest'))
+    first.close()
+    second.close()
+
+    records = first.records()
+    assert len({record.segment for record in records}) == 2
+
+    for processes in (1, 2):
+        db = SubscribedDBManager()
+        result = ArchiveReplay(first, db, processes=processes).run()
+
+        assert result.pages == 3
+        assert {row[1] for row in db.vacancies.values()} == {'latest'}
+
+
+def test_vacancies_without_employer_are_skipped(tmp_path):
+    items = SyntheticCatalog(1, 10).vacancies['1']
+    items[3] = dict(items[3], employer={'id': None})
+    archive = ResponseArchive(str(tmp_path))
+    archive.append(1, {'page': 0, 'items': items})
+    archive.close()
+    db = SubscribedDBManager()
+
+    result = ArchiveReplay(archive, db).run()
+
+    assert result.skipped_vacancies == 1
+    assert result.parsed == 9
+    assert len(db.vacancies) == 9
+    assert all(row[7] == 1 for row in db.vacancies.values())
+
+
+class RecordingPool:
+    """ Pool running tasks when submitted, recording their number. """
+
+    submitted = 0
+
+    def __init__(self, processes):
+        self.processes = processes
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def apply_async(self, func, args):
+        RecordingPool.submitted += 1
+        result = func(*args)
+        return SimpleNamespace(get=lambda: result)
+
+
+def test_segments_are_parsed_at_most_two_per_process_ahead(
+        tmp_path, monkeypatch
+):
+    monkeypatch.setattr(replay, 'Pool', RecordingPool)
+    monkeypatch.setattr(RecordingPool, 'submitted', 0)
+    archive = ResponseArchive(str(tmp_path), segment_bytes=1)
+    for items in SyntheticCatalog(1, 100).vacancies.values():
+        for start in range(0, 100, 10):
+            archive.append(1, {'page': 0, 'items': items[start:start + 10]})
+    archive.close()
+    tasks = [
+        (archive.segment_path(record.segment), [record.line])
+        for record in archive.records()
+    ]
+    assert len(tasks) == 10
+
+    parsing = ArchiveReplay(archive, processes=2)._map(tasks)
+    next(parsing)
+
+    assert RecordingPool.submitted == 4
+    assert len(list(parsing)) == 9
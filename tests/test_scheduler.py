@@ -0,0 +1,139 @@
+""" Tests of the refresh scheduler of the daemon. """
+import random
+from datetime import timedelta
+
+import pytest
+
+from benchmarks.synthetic_data import make_vacancy_item
+from tests.fake_db import FakeDBManager
+from vacolector_hh.constants import SCHEDULER_CHANGE_RATE_SMOOTHING
+from vacolector_hh.scheduler import EmployerSchedule, RefreshScheduler
+from vacolector_hh.sync import parse_published_at
+
+
+def make_scheduler(hh_parser=None, db_manager=None, **options):
+    options.setdefault('min_interval', 60)
+    options.setdefault('max_interval', 3600)
+    options.setdefault('jitter', 0)
+    return RefreshScheduler(
+        hh_parser, db_manager or FakeDBManager(), seed=0, **options
+    )
+
+
+def test_employers_are_popped_in_due_order():
+    db = FakeDBManager()
+    db.employers = {employer_id: None for employer_id in range(1, 6)}
+    scheduler = make_scheduler(db_manager=db)
+    scheduler.load_employers(now=0)
+
+    # First refreshes are spread over the minimum interval.
+    due = sorted(
+        (schedule.next_run, employer_id)
+        for employer_id, schedule in scheduler.schedules.items()
+    )
+    assert all(0 <= next_run < 60 for next_run, _ in due)
+    assert scheduler._pop_due(now=due[0][0] - 1) is None
+
+    # Employer 3 is deleted, employer 4 is rescheduled after the rest.
+    del db.employers[3]
+    scheduler.load_employers(now=0)
+    scheduler._push(scheduler.schedules[4], 100, now=0)
+
+    popped = [scheduler._pop_due(now=60) for _ in range(4)]
+
+    assert popped == [
+        employer_id for _, employer_id in due if employer_id not in (3, 4)
+    ] + [None]
+    assert scheduler._pop_due(now=100) == 4
+    assert scheduler._queue == []
+
+
+def test_interval_follows_the_change_rate():
+    scheduler = make_scheduler(target_changes=5)
+
+    # 5 changes expected after 10 minutes.
+    assert scheduler.next_interval(
+        EmployerSchedule(1, 0, change_rate=30)
+    ) == pytest.approx(600)
+    assert scheduler.next_interval(
+        EmployerSchedule(1, 0, change_rate=10_000)
+    ) == 60
+    assert scheduler.next_interval(
+        EmployerSchedule(1, 0, change_rate=0.1)
+    ) == 3600
+    assert scheduler.next_interval(EmployerSchedule(1, 0)) == 3600
+    # Failing employers back off from the minimum interval.
+    assert scheduler.next_interval(
+        EmployerSchedule(1, 0, change_rate=30, failures=3)
+    ) == 480
+
+
+def test_jitter_spreads_intervals():
+    scheduler = make_scheduler(jitter=0.1)
+    intervals = [
+        scheduler.next_interval(EmployerSchedule(1, 0)) for _ in range(50)
+    ]
+
+    assert all(3240 <= interval <= 3960 for interval in intervals)
+    assert len(set(intervals)) == 50
+
+
+def test_refresh_updates_the_change_rate(hh_server, hh_parser):
+    server = hh_server(employers=1, vacancies=150)
+    db = FakeDBManager()
+    scheduler = make_scheduler(hh_parser(server), db)
+    schedule = EmployerSchedule(1, 0)
+
+    scheduler.refresh(schedule)
+
+    assert len(db.vacancies) == 150
+    assert db.employers == {1: 150}
+    assert schedule.change_rate == 0
+    assert schedule.refreshes == 1
+
+    items = server.catalog.vacancies['1']
+    published_at = parse_published_at(items[0]['published_at']) \
+        + timedelta(minutes=1)
+    for vacancy_id in (10_001, 10_002, 10_003):
+        items.insert(0, make_vacancy_item(
+            vacancy_id, 1, published_at, random.Random(vacancy_id)
+        ))
+    scheduler.refresh(schedule)
+
+    # Three new vacancies in less than the one second floor.
+    assert schedule.change_rate == pytest.approx(
+        SCHEDULER_CHANGE_RATE_SMOOTHING * 3 * 3600
+    )
+    assert scheduler.next_interval(schedule) == 60
+    assert schedule.refreshes == 2
+
+
+def test_refresh_pays_every_request_from_the_budget(
+        hh_server, hh_parser, clock
+):
+    server = hh_server(employers=1, vacancies=1000)
+    # 10 tokens, refilled at one per 30 seconds.
+    scheduler = make_scheduler(
+        hh_parser(server), FakeDBManager(), requests_per_hour=120
+    )
+    started = clock.now()
+
+    scheduler.refresh(EmployerSchedule(1, 0))
+
+    requests = server.stats()['requests']
+    assert requests > 10
+    assert clock.now() - started == pytest.approx((requests - 10) * 30)
+    assert scheduler.budget.acquire() == pytest.approx(30)
+
+
+def test_cheap_refresh_refunds_its_estimate(hh_server, hh_parser, clock):
+    server = hh_server(employers=1, vacancies=0)
+    scheduler = make_scheduler(
+        hh_parser(server), FakeDBManager(), requests_per_hour=120
+    )
+
+    scheduler.refresh(EmployerSchedule(1, 0))
+
+    assert server.stats()['requests'] == 2
+    assert scheduler.budget.acquire(8) == 0
+    assert scheduler.budget.acquire() == pytest.approx(30)
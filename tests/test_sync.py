@@ -0,0 +1,162 @@
+""" End-to-end tests of VacancySync against the fake HH API server. """
+import random
+from datetime import timedelta
+
+import pytest
+
+from benchmarks.synthetic_data import make_vacancy_item
+from tests.fake_db import FakeDBManager
+from vacolector_hh.constants import CHECKPOINT_DONE, CHECKPOINT_RUNNING
+from vacolector_hh.data_classes import UpsertStats
+from vacolector_hh.sync import VacancySync, parse_published_at
+
+
+def all_ids(server):
+    return {
+        int(item['id'])
+        for items in server.catalog.vacancies.values() for item in items
+    }
+
+
+def test_interrupted_sync_is_resumed(hh_server, hh_parser):
+    server = hh_server(employers=3, vacancies=300)
+    db = FakeDBManager()
+    # One worker and one page per batch: employer 1 is stored, then
+    # the connection drops while the second page of employer 2 is
+    # written.
+    db.fail_on_upsert = 5
+    sync = VacancySync(
+        hh_parser(server), workers=1, db_manager=db, batch_size=100
+    )
+
+    with pytest.raises(ConnectionError):
+        sync.run([1, 2, 3])
+
+    [(run_id, checkpoints)] = db.checkpoints.items()
+    assert checkpoints[1].status == CHECKPOINT_DONE
+    assert checkpoints[2].status == CHECKPOINT_RUNNING
+    assert checkpoints[2].pages_done == 1
+    assert 3 not in checkpoints
+    assert set(db.sync_states) == {1}
+
+    db.fail_on_upsert = None
+    pages_served = server.stats()['pages_served']
+    result = sync.run([1, 2, 3])
+
+    assert result.run_id == run_id
+    assert result.skipped == [1]
+    assert sorted(result.synced) == [2, 3]
+    assert result.full_synced == [3]
+    assert not result.errors
+    # Page 0 of employer 2 is requested again for the page count, its
+    # pages 1-2 and all pages of employer 3 are new.
+    assert server.stats()['pages_served'] - pages_served == 6
+    assert set(db.vacancies) == all_ids(server)
+    assert db.runs[run_id]['status'] == CHECKPOINT_DONE
+    assert run_id not in db.checkpoints
+
+
+def test_incremental_sync_fetches_only_new_vacancies(hh_server, hh_parser):
+    server = hh_server(employers=2, vacancies=150)
+    db = FakeDBManager()
+    sync = VacancySync(hh_parser(server), db_manager=db)
+
+    first = sync.run([1, 2])
+
+    assert sorted(first.full_synced) == [1, 2]
+    assert set(db.vacancies) == all_ids(server)
+    watermarks = {
+        employer_id: state.last_published_at
+        for employer_id, state in db.sync_states.items()
+    }
+    # The vacancies published at the watermark itself are fetched again.
+    at_watermark = sum(
+        parse_published_at(item['published_at']) == watermarks[int(key)]
+        for key, items in server.catalog.vacancies.items() for item in items
+    )
+
+    items = server.catalog.vacancies['1']
+    closed = items.pop()
+    published_at = watermarks[1] + timedelta(minutes=1)
+    items.insert(
+        0, make_vacancy_item(10_000, 1, published_at, random.Random(0))
+    )
+    second = sync.run([1, 2])
+
+    assert sorted(second.synced) == [1, 2]
+    assert second.full_synced == []
+    assert second.fetched == 1 + at_watermark
+    assert second.stats == UpsertStats(inserted=1, unchanged=at_watermark)
+    assert second.deleted == 0
+    assert int(closed['id']) in db.vacancies
+    assert db.sync_states[1].last_published_at == published_at
+    assert db.sync_states[2].last_published_at == watermarks[2]
+
+
+def test_full_resync_deletes_closed_vacancies(hh_server, hh_parser):
+    server = hh_server(employers=2, vacancies=150)
+    db = FakeDBManager()
+    VacancySync(hh_parser(server), db_manager=db).run([1, 2])
+    closed = server.catalog.vacancies['1'].pop()
+
+    result = VacancySync(
+        hh_parser(server),
+        db_manager=db,
+        full_resync_interval=timedelta(0)
+    ).run([1, 2])
+
+    assert sorted(result.full_synced) == [1, 2]
+    assert result.deleted == 1
+    assert result.stats == UpsertStats(unchanged=299)
+    assert set(db.vacancies) == all_ids(server)
+    assert int(closed['id']) not in db.vacancies
+    assert db.salary_stats_refreshes == 2
+
+
+def test_resumed_employer_gets_a_full_sync_next(hh_server, hh_parser):
+    server = hh_server(employers=1, vacancies=300)
+    db = FakeDBManager()
+    db.fail_on_upsert = 2
+    sync = VacancySync(
+        hh_parser(server), workers=1, db_manager=db, batch_size=100
+    )
+
+    with pytest.raises(ConnectionError):
+        sync.run([1])
+    assert len(db.vacancies) == 100
+
+    # A vacancy on the stored first page closes, so the resumed pages
+    # shift by one and the first vacancy of page 1 is not fetched.
+    items = server.catalog.vacancies['1']
+    closed = items.pop(0)
+    missed = items[99]
+    db.fail_on_upsert = None
+    resumed = sync.run([1])
+
+    assert resumed.synced == [1]
+    assert resumed.full_synced == []
+    assert resumed.deleted == 0
+    assert int(closed['id']) in db.vacancies
+    assert int(missed['id']) not in db.vacancies
+    assert db.sync_states[1].last_full_sync_at is None
+
+    rerun = sync.run([1])
+
+    assert rerun.full_synced == [1]
+    assert rerun.deleted == 1
+    assert set(db.vacancies) == all_ids(server)
+
+
+def test_failed_writer_stops_fetching(hh_server, hh_parser):
+    server = hh_server(employers=20, vacancies=100, latency=0.05)
+    db = FakeDBManager()
+    db.fail_on_upsert = 1
+    sync = VacancySync(
+        hh_parser(server), workers=2, db_manager=db, batch_size=100
+    )
+
+    with pytest.raises(ConnectionError):
+        sync.run(range(1, 21))
+
+    # The pages in flight when the writer failed, not one per employer.
+    assert server.stats()['pages_served'] <= 4
@@ -0,0 +1,97 @@
+""" Tests of the columnar vacancy container. """
+import math
+from datetime import datetime
+
+import pytest
+
+from vacolector_hh.data_classes import Vacancy
+from vacolector_hh.vacancy_batch import NO_SALARY, VacancyBatch
+
+
+def make_vacancy(vacancy_id, salary_from=None, salary_to=None,
+                 currency=None, employer_id=1, name='Python developer'):
+    return Vacancy(
+        id=vacancy_id,
+        name=name,
+        salary_from=salary_from,
+        salary_to=salary_to,
+        currency=currency,
+        published_at=datetime(2024, 5, 1, 12, vacancy_id % 60),
+        alternate_url=f'https://hh.ru/vacancy/{vacancy_id}',
+        employer_id=employer_id,
+        requirement='Python',
+        responsibility='Backend',
+    )
+
+
+def test_vacancies_round_trip():
+    vacancies = [
+        make_vacancy(1, 100_000, 150_000, 'RUR'),
+        make_vacancy(2, None, 3_000, 'USD'),
+        make_vacancy(3, employer_id=None),
+    ]
+
+    batch = VacancyBatch(vacancies)
+
+    assert len(batch) == 3
+    assert list(batch) == vacancies
+    assert list(batch.rows())[2][2:5] == (None, None, None)
+    assert math.isnan(batch.salary_from[2]) and NO_SALARY != NO_SALARY
+    # A missing employer is stored as 0 and read back as None.
+    assert list(batch.employer_ids) == [1, 1, 0]
+    assert batch.currencies == ['RUR', 'USD', None]
+
+    batch.clear()
+    assert len(batch) == 0 and batch.currencies == []
+
+
+def test_batches_with_other_currencies_are_merged():
+    first = make_vacancy(1, 100, None, 'RUR')
+    others = [
+        make_vacancy(2, 200, None, 'USD'),
+        make_vacancy(3, 300, None, 'RUR'),
+        make_vacancy(4, 400, None, 'EUR'),
+    ]
+    batch = VacancyBatch([first])
+
+    batch.extend(VacancyBatch(others))
+
+    assert batch.currencies == ['RUR', 'USD', 'EUR']
+    assert list(batch) == [first, *others]
+
+
+def test_latest_keeps_the_last_copy_of_every_vacancy():
+    batch = VacancyBatch([
+        make_vacancy(1, 100, name='First'),
+        make_vacancy(2, 200),
+        make_vacancy(1, 150, name='Updated'),
+    ])
+
+    latest = batch.latest()
+
+    assert [(vacancy.id, vacancy.name) for vacancy in latest] == \
+        [(2, 'Python developer'), (1, 'Updated')]
+    assert latest.latest() is latest
+    vacancies = list(batch)
+    assert list(batch.take([2, 0])) == [vacancies[2], vacancies[0]]
+
+
+def test_salaries_are_normalized_like_the_database():
+    batch = VacancyBatch([
+        make_vacancy(1, 100_000, 200_000, 'RUR'),
+        make_vacancy(2, None, 90_000, 'RUR'),
+        make_vacancy(3, 60_000, None, 'RUR'),
+        make_vacancy(4, 0, 50_000, 'RUR'),
+        make_vacancy(5),
+        make_vacancy(6, 2_000, 4_000, 'USD'),
+    ])
+
+    salaries = batch.salary_normalized()
+
+    assert list(salaries)[:4] == [150_000, 90_000, 60_000, 50_000]
+    assert math.isnan(salaries[4])
+    assert batch.average_salary('RUR') == 87_500
+    assert batch.average_salary('USD') == 3_000
+    assert batch.average_salary() == pytest.approx(353_000 / 5)
+    assert batch.average_salary('EUR') is None
+    assert batch.currency_counts() == {'RUR': 4, None: 1, 'USD': 1}
@@ -0,0 +1,393 @@
+""" Library API running the app operations without the menus. """
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from vacolector_hh.archive import ResponseArchive
+from vacolector_hh.constants import (
+    ARCHIVE_DIR,
+    EMPLOYERS_LIST,
+    FETCH_CONCURRENCY,
+    HTTP_CACHE_DIR,
+    MAX_FETCH_CONCURRENCY,
+    REPLAY_PROCESSES,
+    SEARCH_LIMIT,
+    SEARCH_MODE_FTS,
+    SYNC_WORKERS,
+)
+from vacolector_hh.data_classes import Employer
+from vacolector_hh.db_manager import DBManager
+from vacolector_hh.employer_resolver import EmployerResolver
+from vacolector_hh.file_handler import FileHandler
+from vacolector_hh.http_cache import ResponseCache
+from vacolector_hh.parser_hh import HHParser
+from vacolector_hh.replay import ArchiveReplay, ReplayResult
+from vacolector_hh.sync import SyncResult, VacancySync
+
+EmployerSelector = Callable[[str, List[Employer]], List[Employer]]
+
+
+def select_first(name: str, employers: List[Employer]) -> List[Employer]:
+    """
+    Keep the most relevant employer found for a name.
+
+    Args:
+        name (str): Searched name.
+        employers (List[Employer]): Employers found, most relevant
+        first.
+
+    Returns:
+        List[Employer]: The first employer or an empty list.
+    """
+    return employers[:1]
+
+
+def select_all(name: str, employers: List[Employer]) -> List[Employer]:
+    """
+    Keep every employer found for a name.
+
+    Args:
+        name (str): Searched name.
+        employers (List[Employer]): Employers found.
+
+    Returns:
+        List[Employer]: All employers.
+    """
+    return employers
+
+
+def select_exact(name: str, employers: List[Employer]) -> List[Employer]:
+    """
+    Keep the employers whose name equals the searched one, ignoring
+    case.
+
+    Args:
+        name (str): Searched name.
+        employers (List[Employer]): Employers found.
+
+    Returns:
+        List[Employer]: Employers with exactly this name.
+    """
+    name = name.strip().lower()
+    return [
+        employer for employer in employers
+        if employer.name.strip().lower() == name
+    ]
+
+
+EMPLOYER_SELECTORS = {
+    'first': select_first,
+    'all': select_all,
+    'exact': select_exact,
+}
+
+
+class VaCollector:
+    """
+    Facade over DBManager and HHParser for running syncs and queries
+    from scripts and schedulers, without a TTY.
+
+    Example:
+        collector = VaCollector()
+        collector.setup()
+        collector.add_employers_by_name(['Yandex'])
+        print(collector.sync())
+        print(collector.avg_salary())
+        collector.close()
+    """
+
+    def __init__(
+            self,
+            db_manager: Optional[DBManager] = None,
+            hh_parser: Optional[HHParser] = None,
+            file_handler: Optional[FileHandler] = None,
+            workers: int = SYNC_WORKERS,
+            http_cache_dir: Optional[str] = HTTP_CACHE_DIR,
+            archive_dir: Optional[str] = None
+    ):
+        """
+        Args:
+            db_manager (DBManager, optional): Database access.
+            hh_parser (HHParser, optional): HH API client.
+            file_handler (FileHandler, optional): Employer list reader.
+            workers (int, optional): Employers synced in parallel.
+            Defaults to SYNC_WORKERS.
+            http_cache_dir (str, optional): Directory of the HH API
+            response cache of the default parser, None disables the
+            cache. Defaults to HTTP_CACHE_DIR.
+            archive_dir (str, optional): Directory of the archive of
+            fetched vacancy pages of the default parser. Defaults to
+            None, no archive.
+        """
+        self.db_manager = db_manager or DBManager()
+        self.archive = ResponseArchive(archive_dir) if archive_dir \
+            and hh_parser is None else None
+        self.hh_parser = hh_parser or HHParser(
+            max_concurrency=max(
+                MAX_FETCH_CONCURRENCY, FETCH_CONCURRENCY * workers
+            ),
+            response_cache=ResponseCache(http_cache_dir)
+            if http_cache_dir else None,
+            archive=self.archive
+        )
+        self.file_handler = file_handler or FileHandler()
+        self.employer_resolver = EmployerResolver(self.hh_parser)
+        self.workers = workers
+
+    def __enter__(self) -> 'VaCollector':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def setup(self) -> None:
+        """
+        Create the database and the tables if needed and apply schema
+        upgrades.
+        """
+        self.db_manager.create_database()
+        if not self.db_manager.is_tables_existing():
+            self.db_manager.create_tables()
+        self.db_manager.upgrade_tables()
+
+    def close(self) -> None:
+        """
+        Close the database connections and the page archive.
+        """
+        if self.archive is not None:
+            self.archive.close()
+        self.db_manager.close()
+
+    def sync(
+            self,
+            incremental: bool = True,
+            employer_ids: Optional[Iterable[int]] = None
+    ) -> Optional[SyncResult]:
+        """
+        Fetch vacancies of the subscribed employers and store them.
+
+        Args:
+            incremental (bool, optional): Fetch only vacancies published
+            since the previous sync. Defaults to True.
+            employer_ids (Iterable[int], optional): Employers to sync.
+            Defaults to all subscribed employers.
+
+        Returns:
+            Optional[SyncResult]: Sync statistics or None if there are
+            no employers.
+        """
+        if employer_ids is None:
+            employer_ids = self.db_manager.get_employers()
+        if not employer_ids:
+            return None
+        vacancy_sync = VacancySync(self.hh_parser, self.workers,
+                                   self.db_manager)
+        return vacancy_sync.run(employer_ids, incremental=incremental)
+
+    def replay(
+            self,
+            archive_dir: str = ARCHIVE_DIR,
+            employer_ids: Optional[Iterable[int]] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+            latest: bool = False,
+            processes: int = REPLAY_PROCESSES
+    ) -> ReplayResult:
+        """
+        Store the vacancies of archived pages again, without requests
+        to the HH API.
+
+        Args:
+            archive_dir (str, optional): Archive directory.
+            Defaults to ARCHIVE_DIR.
+            employer_ids (Iterable[int], optional): Only pages of these
+            employers. Defaults to all subscribed employers.
+            since (datetime, optional): Only pages fetched at or after
+            this moment.
+            until (datetime, optional): Only pages fetched before this
+            moment.
+            latest (bool, optional): Per employer, only pages since its
+            last full search. Defaults to False.
+            processes (int, optional): Parser processes.
+            Defaults to REPLAY_PROCESSES.
+
+        Returns:
+            ReplayResult: Replay statistics.
+        """
+        with ResponseArchive(archive_dir) as archive:
+            return ArchiveReplay(archive, self.db_manager, processes).run(
+                employer_ids, since, until, latest
+            )
+
+    def find_employers(self, name: str) -> List[Employer]:
+        """
+        Search employers with open vacancies by name.
+
+        Args:
+            name (str): Employer name.
+
+        Returns:
+            List[Employer]: Employers found, most relevant first.
+        """
+        return self.hh_parser.parse_employers(name)
+
+    def add_employers_by_name(
+            self,
+            names: Iterable[str],
+            select: EmployerSelector = select_first
+    ) -> List[Employer]:
+        """
+        Find employers by name and subscribe to them.
+
+        The names are resolved together, see EmployerResolver, and the
+        chosen employers are stored with one statement, with their
+        current data.
+
+        Args:
+            names (Iterable[str]): Employer names.
+            select (EmployerSelector, optional): Picks the employers to
+            add among the ones found for a name. Defaults to
+            select_first.
+
+        Returns:
+            List[Employer]: Added employers.
+        """
+        added = {}
+        for name, employers in self.employer_resolver.resolve(names).items():
+            for employer in select(name, employers):
+                added.setdefault(employer.id, employer)
+        added = self.employer_resolver.current(added.values())
+        if added:
+            self.db_manager.upsert_employers(added)
+        return added
+
+    def add_employers_from_file(
+            self,
+            path: str = EMPLOYERS_LIST,
+            select: EmployerSelector = select_first
+    ) -> List[Employer]:
+        """
+        Subscribe to the employers listed in a comma separated file.
+
+        Args:
+            path (str, optional): Path to the file. Defaults to
+            EMPLOYERS_LIST.
+            select (EmployerSelector, optional): Picks the employers to
+            add among the ones found for a name. Defaults to
+            select_first.
+
+        Returns:
+            List[Employer]: Added employers.
+        """
+        names = self.file_handler.get_employers_from_file(path) or []
+        return self.add_employers_by_name(names, select)
+
+    def employers(self) -> List[int]:
+        """
+        Return the IDs of the subscribed employers.
+
+        Returns:
+            List[int]: Employer IDs.
+        """
+        return self.db_manager.get_employers() or []
+
+    def delete_employers(
+            self, employer_ids: Optional[Iterable[int]] = None
+    ) -> Optional[int]:
+        """
+        Unsubscribe from employers and delete their vacancies.
+
+        Args:
+            employer_ids (Iterable[int], optional): Employers to delete.
+            Defaults to all employers.
+
+        Returns:
+            Optional[int]: Number of deleted employers, None if a
+            deletion failed.
+        """
+        if employer_ids is None:
+            deleted = self.db_manager.delete_employer()
+        else:
+            deleted = 0
+            for employer_id in employer_ids:
+                count = self.db_manager.delete_employer(employer_id)
+                if count is None:
+                    deleted = None
+                    break
+                deleted += count
+        self.db_manager.refresh_salary_stats()
+        return deleted
+
+    def companies_and_vacancies_count(self) -> list:
+        """
+        Return employer names with their open vacancies count.
+
+        Returns:
+            list: Rows of employer name and vacancy count.
+        """
+        return self.db_manager.get_companies_and_vacancies_count()
+
+    def vacancies(self) -> Iterator:
+        """
+        Stream all vacancies.
+
+        Returns:
+            Iterator: Rows of employer name, vacancy name, salary from,
+            salary to, currency and URL.
+        """
+        return self.db_manager.iter_all_vacancies()
+
+    def avg_salary(self):
+        """
+        Return the average salary.
+
+        Returns:
+            Average salary.
+        """
+        return self.db_manager.get_avg_salary()
+
+    def vacancies_with_higher_salary(self) -> Iterator:
+        """
+        Stream vacancies with a salary above the average.
+
+        Returns:
+            Iterator: Vacancy rows.
+        """
+        return self.db_manager.iter_vacancies_with_higher_salary()
+
+    def vacancies_with_keyword(
+            self, keyword: str, limit: Optional[int] = None
+    ) -> list:
+        """
+        Return vacancies containing a keyword as a substring, see
+        DBManager.get_vacancies_with_keyword().
+
+        Args:
+            keyword (str): Keyword.
+            limit (int, optional): Maximum number of vacancies.
+            Defaults to None, all matching vacancies.
+
+        Returns:
+            list: Vacancy rows.
+        """
+        return self.db_manager.get_vacancies_with_keyword(keyword, limit)
+
+    def search(
+            self,
+            query: str,
+            limit: int = SEARCH_LIMIT,
+            mode: str = SEARCH_MODE_FTS
+    ) -> list:
+        """
+        Search vacancies by full text or by trigram similarity.
+
+        Args:
+            query (str): Search query.
+            limit (int, optional): Maximum number of vacancies.
+            Defaults to SEARCH_LIMIT.
+            mode (str, optional): SEARCH_MODE_FTS or
+            SEARCH_MODE_TRIGRAM. Defaults to SEARCH_MODE_FTS.
+
+        Returns:
+            list: Vacancy rows, best matches first.
+        """
+        return self.db_manager.search_vacancies(query, limit, mode)
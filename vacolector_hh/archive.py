@@ -0,0 +1,261 @@
+""" Append-only archive of raw HH API vacancy pages. """
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from vacolector_hh.constants import (
+    ARCHIVE_COMPRESS_LEVEL,
+    ARCHIVE_DIR,
+    ARCHIVE_SEGMENT_BYTES,
+)
+from vacolector_hh.json_codec import dumps, loads
+
+INDEX_FILE = 'index.ndjson'
+SEGMENT_SUFFIX = '.ndjson.gz'
+
+
+@dataclass
+class ArchiveRecord:
+    segment: str
+    line: int
+    employer_id: int
+    page: int
+    fetched_at: float
+    full: bool
+
+
+def read_segment(
+        path: str,
+        lines: Optional[Set[int]] = None,
+        decode: Callable[[bytes], Any] = loads
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Read the records of a segment, including one still being written.
+
+    Args:
+        path (str): Segment file.
+        lines (Set[int], optional): Line numbers to decode, the others
+        are skipped without decoding. Defaults to all lines.
+        decode (Callable[[bytes], Any], optional): Decoder of a line.
+        Defaults to json_codec.loads().
+
+    Yields:
+        Tuple[int, Any]: Line number and decoded record.
+    """
+    with gzip.open(path, 'rb') as f:
+        try:
+            for number, line in enumerate(f):
+                if lines is None or number in lines:
+                    yield number, decode(line)
+        except EOFError:
+            # The writer has not closed the segment yet; everything up
+            # to its last flush is readable.
+            pass
+
+
+class ResponseArchive:
+    """
+    Stores every vacancy page received from the HH API, as returned,
+    so the vacancies table can be rebuilt without fetching them again,
+    see ArchiveReplay.
+
+    Pages are appended as JSON lines to gzip segments named after their
+    creation time and a random ID, so archives open in several
+    processes never write to the same segment, and a new segment is
+    started once the current one holds ``segment_bytes`` of JSON.
+    Every page is also listed in an uncompressed index with its
+    employer and fetch time, so replays of some employers or some
+    period only decode the pages they need.
+    Each append is flushed, so a crash loses at most the page being
+    written.
+    """
+
+    def __init__(
+            self,
+            directory: str = ARCHIVE_DIR,
+            segment_bytes: int = ARCHIVE_SEGMENT_BYTES,
+            compress_level: int = ARCHIVE_COMPRESS_LEVEL
+    ):
+        """
+        Args:
+            directory (str, optional): Archive directory, created if
+            missing. Defaults to ARCHIVE_DIR.
+            segment_bytes (int, optional): Uncompressed size after
+            which a new segment is started. Defaults to
+            ARCHIVE_SEGMENT_BYTES.
+            compress_level (int, optional): Gzip level of the segments.
+            Defaults to ARCHIVE_COMPRESS_LEVEL.
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._segment: Optional[str] = None
+        self._file = None
+        self._index = None
+        self._lines = 0
+        self._bytes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self) -> 'ResponseArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def append(
+            self, employer_id: int, response: dict, full: bool = True
+    ) -> None:
+        """
+        Archive a vacancies response page.
+
+        Args:
+            employer_id (int): Employer the page was requested for.
+            response (dict): Decoded response.
+            full (bool, optional): Whether the page belongs to a search
+            of all vacancies of the employer rather than of recently
+            published ones. Defaults to True.
+        """
+        fetched_at = time.time()
+        payload = dumps({
+            'employer_id': employer_id,
+            'fetched_at': fetched_at,
+            'full': full,
+            'response': response,
+        }) + b'\n'
+
+        with self._lock:
+            if self._file is None or self._bytes >= self.segment_bytes:
+                self._rotate()
+            self._file.write(payload)
+            self._file.flush()
+            record = ArchiveRecord(
+                segment=self._segment,
+                line=self._lines,
+                employer_id=employer_id,
+                page=response.get('page', 0),
+                fetched_at=fetched_at,
+                full=full,
+            )
+            self._lines += 1
+            self._bytes += len(payload)
+            if self._index is None:
+                self._index = open(self._path(INDEX_FILE), 'a')
+            self._index.write(json.dumps(asdict(record)) + '\n')
+            self._index.flush()
+
+    def close(self) -> None:
+        """
+        Close the current segment and the index.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._index is not None:
+                self._index.close()
+                self._index = None
+
+    def records(
+            self,
+            employer_ids: Optional[Iterable[int]] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+            latest: bool = False
+    ) -> List[ArchiveRecord]:
+        """
+        List archived pages in fetch order.
+
+        Args:
+            employer_ids (Iterable[int], optional): Only pages of these
+            employers. Defaults to all employers.
+            since (datetime, optional): Only pages fetched at or after
+            this moment.
+            until (datetime, optional): Only pages fetched before this
+            moment.
+            latest (bool, optional): Per employer, only pages since the
+            start of its last full search, i.e. its most recent
+            complete set of vacancies and later updates.
+            Defaults to False.
+
+        Returns:
+            List[ArchiveRecord]: Matching pages.
+        """
+        employer_ids = set(employer_ids) if employer_ids is not None \
+            else None
+        since = since.timestamp() if since else None
+        until = until.timestamp() if until else None
+        records = []
+        try:
+            with open(self._path(INDEX_FILE)) as index:
+                for line in index:
+                    try:
+                        record = ArchiveRecord(**json.loads(line))
+                    except (TypeError, ValueError):
+                        continue  # line cut short by a crash
+                    if employer_ids is not None \
+                            and record.employer_id not in employer_ids:
+                        continue
+                    if since is not None and record.fetched_at < since:
+                        continue
+                    if until is not None and record.fetched_at >= until:
+                        continue
+                    records.append(record)
+        except FileNotFoundError:
+            return []
+        records.sort(key=lambda record: record.fetched_at)
+
+        if latest:
+            starts = {
+                record.employer_id: record.fetched_at
+                for record in records if record.full and record.page == 0
+            }
+            records = [
+                record for record in records
+                if record.fetched_at >= starts.get(record.employer_id, 0)
+            ]
+        return records
+
+    def segment_path(self, segment: str) -> str:
+        """
+        Return the path of a segment file.
+
+        Args:
+            segment (str): Segment name from an ArchiveRecord.
+
+        Returns:
+            str: File path.
+        """
+        return self._path(segment)
+
+    def _rotate(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._segment = (
+            f"vacancies-{time.strftime('%Y%m%dT%H%M%S')}-"
+            f"{uuid.uuid4().hex}{SEGMENT_SUFFIX}"
+        )
+        self._file = gzip.open(
+            self._path(self._segment), 'xb',
+            compresslevel=self.compress_level
+        )
+        self._lines = 0
+        self._bytes = 0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
@@ -1,6 +1,10 @@
 from configparser import ConfigParser
 
-from vacolector_hh.constants import DATABASE_CONFIG
+from vacolector_hh.constants import (
+    DATABASE_CONFIG,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_MIN_SIZE,
+)
 
 
 def config(filename=DATABASE_CONFIG, section="postgresql"):
@@ -35,3 +39,32 @@ def config(filename=DATABASE_CONFIG, section="postgresql"):
             f'Section {section} is not found in the {filename} file.'
         )
     return db
+
+
+def pool_config(filename=DATABASE_CONFIG, section="pool"):
+    """
+    Read the connection pool limits from the configuration file.
+
+    Missing section or options fall back to DB_POOL_MIN_SIZE and
+    DB_POOL_MAX_SIZE.
+
+    Args:
+        filename (str, optional): The name of the configuration file.
+        Defaults to DATABASE_CONFIG.
+        section (str, optional): The section in the configuration file
+        to retrieve parameters from. Defaults to "pool".
+
+    Returns:
+        dict: Dictionary with "minconn" and "maxconn" keys.
+    """
+    parser = ConfigParser()
+    parser.read(filename)
+
+    return {
+        'minconn': parser.getint(
+            section, 'minconn', fallback=DB_POOL_MIN_SIZE
+        ),
+        'maxconn': parser.getint(
+            section, 'maxconn', fallback=DB_POOL_MAX_SIZE
+        ),
+    }
@@ -4,4 +4,131 @@ CODE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 DATABASE_CONFIG = os.path.join(CODE_DIR, 'database.ini')
 TABLE_CREATION_SCRIPT = os.path.join(CODE_DIR, 'create_tables.sql')
-EMPLOYERS_LIST = os.path.join(CODE_DIR, 'employer.txt')
\ No newline at end of file
+TABLE_UPGRADE_SCRIPT = os.path.join(CODE_DIR, 'upgrade_tables.sql')
+EMPLOYERS_LIST = os.path.join(CODE_DIR, 'employer.txt')
+
+# Number of vacancy/employer pages requested in parallel by HHParser.
+# A value of 1 falls back to sequential page-by-page fetching.
+FETCH_CONCURRENCY = 4
+
+# Requests in flight the adaptive concurrency limiter may grow to,
+# summed over all searches sharing a parser, while the HH API accepts
+# them. The HTTP connection pool is sized to match.
+MAX_FETCH_CONCURRENCY = 32
+
+# Number of employers whose vacancies are synchronised in parallel.
+SYNC_WORKERS = 8
+
+# HTTP session settings used for every request made to the HH API.
+CONNECT_TIMEOUT = 3.05
+READ_TIMEOUT = 30
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (500, 502, 504)
+LATENCY_HISTORY_SIZE = 1000
+
+# Default connection pool limits, overridable in the [pool] section of
+# database.ini.
+DB_POOL_MIN_SIZE = 1
+DB_POOL_MAX_SIZE = 10
+
+# Date format of HH API "published_at" values and "date_from" filters.
+HH_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+
+# Incremental syncs fetch only vacancies published after the stored
+# per-employer watermark. A full resync, which also removes vacancies
+# that are no longer open, is forced once the last one is older than
+# this many hours.
+FULL_RESYNC_INTERVAL_HOURS = 24
+
+# Vacancy search: number of best ranked results returned and the
+# supported search modes (full-text search and pg_trgm substring match).
+SEARCH_LIMIT = 50
+SEARCH_MODE_FTS = 'fts'
+SEARCH_MODE_TRIGRAM = 'trgm'
+
+# Rows fetched per round trip by server-side cursors of streaming
+# queries.
+STREAM_ITERSIZE = 2000
+
+# Sync pipeline: parsed pages waiting to be written (bounded to keep
+# memory flat when the database is slower than the API) and the number
+# of vacancies upserted per transaction.
+PIPELINE_QUEUE_SIZE = 64
+WRITE_BATCH_SIZE = 5000
+
+# The HH API returns at most this many results per search, however
+# many pages it reports. Larger result sets are split into disjoint
+# published_at ranges ("shards") within the last SHARD_WINDOW_DAYS,
+# down to ranges of MIN_SHARD_SECONDS, plus one range of all older
+# results.
+HH_MAX_RESULTS = 2000
+SHARD_WINDOW_DAYS = 365
+MIN_SHARD_SECONDS = 60
+
+# Rate limiting of HH API requests. Throttling responses are retried
+# by RequestMixin after the server's Retry-After and halve the number
+# of requests in flight; healthy responses slowly raise it again.
+THROTTLE_STATUSES = (429, 503)
+REQUESTS_PER_SECOND = 20
+
+# Number of functions printed by the --profile report.
+PROFILE_REPORT_LINES = 30
+
+# Scheduler daemon. Every employer is refreshed between the minimum
+# and maximum interval, sooner the more of its vacancies changed
+# recently: the interval aims at SCHEDULER_TARGET_CHANGES changes per
+# refresh. Intervals are spread by +-SCHEDULER_JITTER and the whole
+# daemon stays within SCHEDULER_REQUESTS_PER_HOUR.
+SCHEDULER_MIN_INTERVAL_SECONDS = 15 * 60
+SCHEDULER_MAX_INTERVAL_SECONDS = 24 * 3600
+SCHEDULER_TARGET_CHANGES = 5
+SCHEDULER_CHANGE_RATE_SMOOTHING = 0.3
+SCHEDULER_JITTER = 0.1
+SCHEDULER_REQUESTS_PER_HOUR = 3000
+SCHEDULER_EMPLOYERS_RELOAD_SECONDS = 300
+SCHEDULER_STATS_REFRESH_SECONDS = 600
+
+# Checkpointed sync runs. An unfinished run younger than
+# SYNC_RESUME_MAX_AGE_HOURS is resumed: employers it completed are
+# skipped and the others continue after their last committed page.
+SYNC_RESUME_MAX_AGE_HOURS = 12
+CHECKPOINT_RUNNING = 'running'
+CHECKPOINT_DONE = 'done'
+CHECKPOINT_FAILED = 'failed'
+
+# On-disk cache of HH API responses. Responses younger than their TTL
+# are served without a request, older ones are revalidated with
+# If-None-Match/If-Modified-Since. TTLs are given per URL path; other
+# paths, like vacancy pages and single employers whose open vacancies
+# count must stay current, are always revalidated. The cache keeps the
+# most recently used responses within HTTP_CACHE_MAX_BYTES on disk and
+# the decoded JSON of HTTP_CACHE_MEMORY_ENTRIES of them in memory.
+HTTP_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME')
+    or os.path.join(os.path.expanduser('~'), '.cache'),
+    'vacolector_hh',
+    'http'
+)
+HTTP_CACHE_MAX_BYTES = 256 * 1024 * 1024
+HTTP_CACHE_MEMORY_ENTRIES = 256
+HTTP_CACHE_TTL_SECONDS = {
+    '/employers': 24 * 3600,
+}
+
+# Employer name resolution: names looked up on the HH API in parallel
+# and the local index of resolved names, reused for this many days
+# before a name is searched again.
+RESOLVER_WORKERS = 8
+EMPLOYER_INDEX = os.path.join(
+    os.path.dirname(HTTP_CACHE_DIR), 'employer_index.json'
+)
+EMPLOYER_INDEX_MAX_AGE_DAYS = 7
+
+# Archive of raw vacancy pages, written when enabled: gzip compressed
+# NDJSON segments of about ARCHIVE_SEGMENT_BYTES of JSON each, replayed
+# into the database by REPLAY_PROCESSES parser processes.
+ARCHIVE_DIR = os.path.join(os.path.dirname(HTTP_CACHE_DIR), 'archive')
+ARCHIVE_SEGMENT_BYTES = 16 * 1024 * 1024
+ARCHIVE_COMPRESS_LEVEL = 6
+REPLAY_PROCESSES = os.cpu_count() or 1
@@ -1,6 +1,10 @@
 -- Сброс всех таблиц
+DROP MATERIALIZED VIEW IF EXISTS salary_stats;
 DROP TABLE IF EXISTS employers CASCADE;
 DROP TABLE IF EXISTS vacancies CASCADE;
+DROP TABLE IF EXISTS sync_state CASCADE;
+DROP TABLE IF EXISTS sync_checkpoints CASCADE;
+DROP TABLE IF EXISTS sync_runs CASCADE;
 DROP TABLE IF EXISTS experiences CASCADE;
 DROP TABLE IF EXISTS vacancy_types CASCADE;
 
@@ -23,5 +27,66 @@ CREATE TABLE IF NOT EXISTS vacancies (
     alternate_url  TEXT,
     employer_id    INTEGER NOT NULL REFERENCES employers (id),
     requirement    TEXT,
-    responsibility TEXT
+    responsibility TEXT,
+    content_hash   TEXT,
+    search_vector  TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('russian', coalesce(requirement, '') || ' ' ||
+                                         coalesce(responsibility, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(requirement, '') || ' ' ||
+                                         coalesce(responsibility, '')), 'B')
+    ) STORED,
+    salary_normalized NUMERIC GENERATED ALWAYS AS (
+        CASE
+            WHEN salary_from > 0 AND salary_to > 0
+                THEN (salary_from + salary_to) / 2.0
+            ELSE GREATEST(salary_from, salary_to)
+        END
+    ) STORED
+);
+
+-- Полнотекстовый индекс вакансий
+CREATE INDEX IF NOT EXISTS vacancies_search_vector_idx
+    ON vacancies USING GIN (search_vector);
+
+-- Индекс по нормализованной зарплате
+CREATE INDEX IF NOT EXISTS vacancies_salary_normalized_idx
+    ON vacancies (salary_normalized);
+
+-- Кэш средней зарплаты, обновляется после загрузки вакансий
+CREATE MATERIALIZED VIEW IF NOT EXISTS salary_stats AS
+SELECT ROUND(AVG(salary_normalized)) AS avg_salary
+FROM vacancies;
+
+-- Уникальный индекс нужен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS salary_stats_avg_salary_idx
+    ON salary_stats (avg_salary);
+
+-- Таблица sync_state (Состояние синхронизации вакансий работодателя)
+CREATE TABLE IF NOT EXISTS sync_state (
+    employer_id       INTEGER PRIMARY KEY NOT NULL
+                      REFERENCES employers (id) ON DELETE CASCADE,
+    last_published_at TIMESTAMPTZ,
+    last_synced_at    TIMESTAMPTZ,
+    last_full_sync_at TIMESTAMPTZ
+);
+
+-- Таблица sync_runs (Запуски синхронизации, незавершённый продолжается)
+CREATE TABLE IF NOT EXISTS sync_runs (
+    id          SERIAL PRIMARY KEY,
+    incremental BOOLEAN NOT NULL,
+    status      VARCHAR NOT NULL DEFAULT 'running',
+    started_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at TIMESTAMPTZ
+);
+
+-- Таблица sync_checkpoints (Прогресс работодателя в запуске синхронизации)
+CREATE TABLE IF NOT EXISTS sync_checkpoints (
+    run_id      INTEGER NOT NULL REFERENCES sync_runs (id) ON DELETE CASCADE,
+    employer_id INTEGER NOT NULL,
+    status      VARCHAR NOT NULL,
+    pages_done  INTEGER NOT NULL DEFAULT 0,
+    updated_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (run_id, employer_id)
 );
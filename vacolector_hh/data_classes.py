@@ -1,13 +1,30 @@
+import sys
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Any, Optional
 
 
-@dataclass
+def intern_value(value: Any) -> Any:
+    """
+    Intern a string repeated across many rows, such as a currency code
+    or an employer ID, so all rows share one copy of it.
+
+    Args:
+        value (Any): Value to intern, anything but a string is
+        returned as is.
+
+    Returns:
+        Any: The interned string or the value.
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+@dataclass(slots=True, frozen=True)
 class Employer:
     id: int
     name: str
     alternate_url: str
-    open_vacancies: int
+    open_vacancies: Optional[int]
 
     def __str__(self) -> str:
         """
@@ -22,7 +39,7 @@ class Employer:
                f"URL: {self.alternate_url}\n"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Vacancy:
     id: int
     name: str
@@ -67,3 +84,49 @@ class Vacancy:
             f'\tsalary_to={self.salary_to} {self.currency}, \n'
             f'\trequirement={self.requirement})\n'
         )
+
+
+@dataclass
+class UpsertStats:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+    def __add__(self, other: 'UpsertStats') -> 'UpsertStats':
+        """
+        Sum the counters of two upsert results.
+
+        Returns:
+            UpsertStats: Combined counters.
+        """
+        return UpsertStats(
+            inserted=self.inserted + other.inserted,
+            updated=self.updated + other.updated,
+            unchanged=self.unchanged + other.unchanged,
+        )
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the upsert result.
+
+        Returns:
+            str: String representation of the upsert result.
+        """
+        return f"Inserted: {self.inserted}, " \
+               f"Updated: {self.updated}, " \
+               f"Unchanged: {self.unchanged}"
+
+
+@dataclass
+class SyncState:
+    employer_id: int
+    last_published_at: Optional[datetime] = None
+    last_synced_at: Optional[datetime] = None
+    last_full_sync_at: Optional[datetime] = None
+
+
+@dataclass
+class SyncCheckpoint:
+    employer_id: int
+    status: str
+    pages_done: int = 0
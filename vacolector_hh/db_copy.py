@@ -0,0 +1,166 @@
+""" Helpers for streaming rows into PostgreSQL with COPY. """
+import io
+from typing import Any, Iterable, Iterator, Sequence
+
+from vacolector_hh.data_classes import Employer, Vacancy
+from vacolector_hh.vacancy_batch import VacancyBatch
+
+VACANCY_COLUMNS = (
+    'id',
+    'name',
+    'salary_from',
+    'salary_to',
+    'currency',
+    'published_at',
+    'alternate_url',
+    'employer_id',
+    'requirement',
+    'responsibility',
+)
+
+EMPLOYER_COLUMNS = (
+    'id',
+    'name',
+    'open_vacancies',
+    'alternate_url',
+)
+
+
+def vacancy_rows(vacancies: Iterable[Vacancy]) -> Iterator[tuple]:
+    """
+    Convert vacancies into rows ordered as VACANCY_COLUMNS.
+
+    Args:
+        vacancies (Iterable[Vacancy]): Vacancies to convert, a
+        VacancyBatch is read column by column.
+
+    Returns:
+        Iterator[tuple]: Row tuples.
+    """
+    if isinstance(vacancies, VacancyBatch):
+        yield from vacancies.rows()
+        return
+    for vacancy in vacancies:
+        yield (
+            vacancy.id,
+            vacancy.name,
+            vacancy.salary_from,
+            vacancy.salary_to,
+            vacancy.currency,
+            vacancy.published_at,
+            vacancy.alternate_url,
+            vacancy.employer_id,
+            vacancy.requirement,
+            vacancy.responsibility,
+        )
+
+
+def employer_rows(employers: Iterable[Employer]) -> Iterator[tuple]:
+    """
+    Convert employers into rows ordered as EMPLOYER_COLUMNS.
+
+    Args:
+        employers (Iterable[Employer]): Employers to convert.
+
+    Returns:
+        Iterator[tuple]: Row tuples.
+    """
+    for employer in employers:
+        yield (
+            employer.id,
+            employer.name,
+            employer.open_vacancies,
+            employer.alternate_url,
+        )
+
+
+def format_csv_row(row: Sequence[Any]) -> str:
+    """
+    Format a row as a CSV line understood by ``COPY ... FORMAT csv``.
+
+    None becomes an unquoted empty field (NULL), every other value is
+    quoted, so empty strings stay empty strings.
+
+    Args:
+        row (Sequence[Any]): Row values.
+
+    Returns:
+        str: CSV line terminated by a newline.
+    """
+    return ','.join(
+        '' if value is None else '"' + str(value).replace('"', '""') + '"'
+        for value in row
+    ) + '\n'
+
+
+class CopyStream(io.TextIOBase):
+    """
+    Read-only file-like object producing CSV lines from an iterable of
+    rows on demand, so COPY never needs the whole payload in memory.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]]):
+        super().__init__()
+        self._lines = (format_csv_row(row) for row in rows)
+        self._buffer = ''
+        self.rows_written = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> str:
+        """
+        Read up to ``size`` characters, or everything if size is
+        negative.
+
+        Args:
+            size (int, optional): Maximum number of characters.
+            Defaults to -1.
+
+        Returns:
+            str: The next chunk; an empty string at the end.
+        """
+        chunks = [self._buffer]
+        length = len(self._buffer)
+
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            chunks.append(line)
+            length += len(line)
+            self.rows_written += 1
+
+        data = ''.join(chunks)
+        if size < 0:
+            self._buffer = ''
+            return data
+
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def copy_rows(
+        cur,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]]
+) -> int:
+    """
+    Stream rows into a table with ``COPY ... FROM STDIN``.
+
+    Args:
+        cur: Database cursor.
+        table (str): Target table name.
+        columns (Sequence[str]): Target columns, in row order.
+        rows (Iterable[Sequence[Any]]): Rows to load.
+
+    Returns:
+        int: Number of rows loaded.
+    """
+    stream = CopyStream(rows)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        stream
+    )
+    return stream.rows_written
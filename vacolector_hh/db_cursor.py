@@ -0,0 +1,74 @@
+""" Database cursor recording statement metrics and slow statements. """
+import time
+
+from psycopg2.extras import DictCursor
+
+from vacolector_hh.metrics import DB_ROWS, DB_STATEMENT_SECONDS, DB_STATEMENTS
+from vacolector_hh.profiling import trace_if_slow
+
+
+def statement_kind(query) -> str:
+    """
+    Return the leading SQL keyword of a statement, e.g. "SELECT".
+
+    Args:
+        query: SQL statement as str, bytes or psycopg2 composable.
+
+    Returns:
+        str: Upper-case keyword or "OTHER".
+    """
+    if isinstance(query, bytes):
+        query = query.decode(errors='replace')
+    if not isinstance(query, str) or not query.strip():
+        return 'OTHER'
+    return query.split(None, 1)[0].upper()
+
+
+class InstrumentedCursor(DictCursor):
+    """
+    DictCursor that records count, duration and affected rows of every
+    statement it runs, and logs statements slower than the threshold
+    set with profiling.set_slow_threshold().
+    """
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            self._record(statement_kind(query), started)
+            trace_if_slow('SQL', started, self._statement_text(query))
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            self._record(statement_kind(query), started)
+            trace_if_slow('SQL', started, self._statement_text(query))
+
+    def copy_expert(self, sql, file, size=8192):
+        started = time.perf_counter()
+        try:
+            return super().copy_expert(sql, file, size)
+        finally:
+            self._record('COPY', started)
+            trace_if_slow('SQL', started, self._statement_text(sql))
+
+    def _statement_text(self, query) -> str:
+        """
+        Return the last statement with its parameters bound, falling
+        back to the statement as given if it never reached the server.
+        """
+        statement = self.query or query
+        if isinstance(statement, bytes):
+            statement = statement.decode(errors='replace')
+        return ' '.join(str(statement).split())
+
+    def _record(self, kind: str, started: float) -> None:
+        DB_STATEMENTS.inc(kind=kind)
+        DB_STATEMENT_SECONDS.observe(
+            time.perf_counter() - started, kind=kind
+        )
+        if self.rowcount and self.rowcount > 0:
+            DB_ROWS.inc(self.rowcount, kind=kind)
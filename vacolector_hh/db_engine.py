@@ -71,6 +71,22 @@ class DBEngine(ABC):
         """
         pass
 
+    @abstractmethod
+    def search_vacancies(self, cur, query, limit, mode):
+        """
+        Retrieve the best ranked vacancies matching a search query.
+
+        Args:
+            cur: Database cursor.
+            query (str): Search query.
+            limit (int): Maximum number of vacancies.
+            mode (str): Search mode.
+
+        Returns:
+            list: List of Vacancy objects.
+        """
+        pass
+
     @abstractmethod
     def set_employers(self, cur, employers_list):
         """
@@ -93,6 +109,48 @@ class DBEngine(ABC):
         """
         pass
 
+    @abstractmethod
+    def copy_vacancies(self, cur, vacancy_list):
+        """
+        Bulk load vacancies into the database.
+
+        Args:
+            cur: Database cursor.
+            vacancy_list: Iterable of Vacancy objects.
+
+        Returns:
+            int: Number of loaded rows.
+        """
+        pass
+
+    @abstractmethod
+    def upsert_vacancies(self, cur, vacancy_list):
+        """
+        Insert new vacancies and update changed ones.
+
+        Args:
+            cur: Database cursor.
+            vacancy_list: Iterable of Vacancy objects.
+
+        Returns:
+            UpsertStats: Inserted, updated and unchanged row counts.
+        """
+        pass
+
+    @abstractmethod
+    def copy_employers(self, cur, employers_list):
+        """
+        Bulk load employers into the database.
+
+        Args:
+            cur: Database cursor.
+            employers_list: Iterable of Employer objects.
+
+        Returns:
+            int: Number of loaded rows.
+        """
+        pass
+
     @abstractmethod
     def get_employers(self, cur, employer_id=None):
         """
@@ -1,13 +1,40 @@
+import threading
+import time
 import traceback
+import uuid
+from contextlib import contextmanager
 from functools import wraps
 
 import psycopg2
 from psycopg2 import ProgrammingError
-from psycopg2.extras import DictCursor
+from psycopg2.extras import execute_values
 
-from vacolector_hh.config import config
-from vacolector_hh.constants import TABLE_CREATION_SCRIPT
+from vacolector_hh.config import config, pool_config
+from vacolector_hh.constants import (
+    CHECKPOINT_DONE,
+    SEARCH_LIMIT,
+    SEARCH_MODE_FTS,
+    SEARCH_MODE_TRIGRAM,
+    STREAM_ITERSIZE,
+    TABLE_CREATION_SCRIPT,
+    TABLE_UPGRADE_SCRIPT,
+)
+from vacolector_hh.data_classes import (
+    SyncCheckpoint,
+    SyncState,
+    UpsertStats,
+)
+from vacolector_hh.db_cursor import InstrumentedCursor
+from vacolector_hh.db_copy import (
+    EMPLOYER_COLUMNS,
+    VACANCY_COLUMNS,
+    copy_rows,
+    employer_rows,
+    vacancy_rows,
+)
 from vacolector_hh.db_engine import DBEngine
+from vacolector_hh.db_pool import InstrumentedConnectionPool
+from vacolector_hh.metrics import DB_CALL_SECONDS, REGISTRY
 
 
 class DBManager(DBEngine):
@@ -16,6 +43,10 @@ class DBManager(DBEngine):
         super().__init__()
         self.params = config()
         self.db_name = "vacollector"
+        self.pool = None
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+        self.cursor_factory = InstrumentedCursor
 
     def create_database(self) -> None:
         """
@@ -54,26 +85,183 @@ class DBManager(DBEngine):
         except (Exception, psycopg2.DatabaseError):
             traceback.print_exc()
 
+    def get_pool(self) -> InstrumentedConnectionPool:
+        """
+        Return the connection pool, creating it on first use.
+
+        Pool limits are read from the [pool] section of database.ini.
+
+        Returns:
+            InstrumentedConnectionPool: The connection pool.
+        """
+        if self.pool is None:
+            with self._pool_lock:
+                if self.pool is None:
+                    if 'dbname' not in self.params.keys():
+                        self.params.update({'dbname': self.db_name})
+                    limits = pool_config()
+                    self.pool = InstrumentedConnectionPool(
+                        limits['minconn'], limits['maxconn'], **self.params
+                    )
+                    self._register_pool_metrics()
+        return self.pool
+
+    def _register_pool_metrics(self) -> None:
+        """
+        Expose the pool statistics as gauges of the metrics registry.
+        """
+        for key, documentation in (
+                ('in_use', 'Connections checked out of the pool.'),
+                ('peak_in_use', 'Most connections checked out at once.'),
+                ('max_size', 'Maximum size of the connection pool.'),
+                ('checkouts', 'Connections checked out so far.'),
+                ('waits', 'Checkouts that waited for a free connection.'),
+                ('wait_seconds', 'Time spent waiting for a connection.'),
+        ):
+            REGISTRY.gauge(
+                f'db_pool_{key}',
+                documentation,
+                lambda key=key: self.pool_stats().get(key)
+            )
+
+    def pool_stats(self) -> dict:
+        """
+        Return connection pool statistics.
+
+        Returns:
+            dict: Pool statistics or an empty dict if the pool has not
+            been created yet.
+        """
+        return self.pool.stats() if self.pool is not None else {}
+
+    def close(self) -> None:
+        """
+        Close all pooled connections.
+        """
+        if self.pool is not None:
+            self.pool.closeall()
+            self.pool = None
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run several DBManager calls on one connection and in one
+        transaction.
+
+        Methods decorated with connect_to_db called inside the block
+        reuse the same connection. The transaction is committed when
+        the block exits and rolled back if it raises. Nested blocks
+        join the outer transaction.
+
+        Example:
+            with db_manager.transaction():
+                db_manager.copy_employers(employers)
+                db_manager.upsert_vacancies(vacancies)
+        """
+        if getattr(self._local, 'conn', None) is not None:
+            yield
+            return
+
+        pool = self.get_pool()
+        conn = pool.getconn()
+        self._local.conn = conn
+        try:
+            with conn:
+                yield
+        finally:
+            self._local.conn = None
+            pool.putconn(conn)
+
     def connect_to_db(func):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            conn = None
-            if 'dbname' not in self.params.keys():
-                self.params.update({'dbname': self.db_name})
+            shared_conn = getattr(self._local, 'conn', None)
+            if shared_conn is not None:
+                started = time.perf_counter()
+                try:
+                    with shared_conn.cursor(
+                            cursor_factory=self.cursor_factory
+                    ) as cur:
+                        return func(self, cur, *args, **kwargs)
+                finally:
+                    DB_CALL_SECONDS.observe(
+                        time.perf_counter() - started, method=func.__name__
+                    )
+
+            started = time.perf_counter()
+            pool = self.get_pool()
+            conn = pool.getconn()
             result = None
             try:
-                with psycopg2.connect(**self.params) as conn:
-                    with conn.cursor(cursor_factory=DictCursor) as cur:
+                with conn:
+                    with conn.cursor(
+                            cursor_factory=self.cursor_factory
+                    ) as cur:
                         result = func(self, cur, *args, **kwargs)
             except psycopg2.DatabaseError:
                 traceback.print_exc()
             finally:
-                if conn is not None:
-                    conn.close()
+                pool.putconn(conn)
+                DB_CALL_SECONDS.observe(
+                    time.perf_counter() - started, method=func.__name__
+                )
             return result
 
         return wrapper
 
+    def stream_from_db(func):
+        """
+        Turn a method that executes a query on a cursor into a
+        generator of result rows read through a named server-side
+        cursor, ``itersize`` rows per round trip.
+
+        The connection stays checked out until the generator is
+        exhausted or closed.
+        """
+        @wraps(func)
+        def wrapper(self, *args, itersize=STREAM_ITERSIZE, **kwargs):
+            cursor_name = f"{func.__name__}_{uuid.uuid4().hex}"
+            shared_conn = getattr(self._local, 'conn', None)
+            if shared_conn is not None:
+                with shared_conn.cursor(
+                        name=cursor_name,
+                        cursor_factory=self.cursor_factory
+                ) as cur:
+                    cur.itersize = itersize
+                    func(self, cur, *args, **kwargs)
+                    yield from cur
+                return
+
+            pool = self.get_pool()
+            conn = pool.getconn()
+            try:
+                with conn:
+                    with conn.cursor(
+                            name=cursor_name,
+                            cursor_factory=self.cursor_factory
+                    ) as cur:
+                        cur.itersize = itersize
+                        func(self, cur, *args, **kwargs)
+                        yield from cur
+            except psycopg2.DatabaseError:
+                traceback.print_exc()
+            finally:
+                pool.putconn(conn)
+
+        return wrapper
+
+    @connect_to_db
+    def upgrade_tables(self, cur):
+        """
+        Bring the schema of an existing database up to date using the
+        idempotent upgrade script.
+
+        Args:
+            cur: Database cursor.
+        """
+        with open(TABLE_UPGRADE_SCRIPT, 'r') as script:
+            cur.execute(script.read())
+
     @connect_to_db
     def is_tables_existing(self, cur):
         """
@@ -99,6 +287,9 @@ class DBManager(DBEngine):
         """
         Insert vacancies into the database.
 
+        The cached average salary is not refreshed, call
+        refresh_salary_stats() once all vacancies are loaded.
+
         Args:
             cur: Database cursor.
             vacancy_list (list): List of Vacancy objects.
@@ -123,6 +314,291 @@ class DBManager(DBEngine):
                 )
             )
 
+    @connect_to_db
+    def copy_vacancies(self, cur, vacancy_list):
+        """
+        Bulk load vacancies with COPY in a single transaction.
+
+        The cached average salary is not refreshed, call
+        refresh_salary_stats() once all vacancies are loaded.
+
+        Args:
+            cur: Database cursor.
+            vacancy_list (Iterable): Vacancy objects or a VacancyBatch.
+
+        Returns:
+            int: Number of loaded rows.
+        """
+        return copy_rows(
+            cur, 'vacancies', VACANCY_COLUMNS, vacancy_rows(vacancy_list)
+        )
+
+    @connect_to_db
+    def upsert_vacancies(self, cur, vacancy_list):
+        """
+        Insert new vacancies and update changed ones.
+
+        Vacancies are staged with COPY and merged with
+        ``INSERT ... ON CONFLICT (id) DO UPDATE``. A row is only
+        rewritten when the hash of its content differs from the stored
+        one, so re-running a refresh is idempotent and unchanged rows
+        cause no writes.
+
+        The cached average salary is not refreshed here, so that
+        several batches can be merged before calling
+        refresh_salary_stats() once.
+
+        Args:
+            cur: Database cursor.
+            vacancy_list (Iterable): Vacancy objects or a VacancyBatch.
+
+        Returns:
+            UpsertStats: Inserted, updated and unchanged row counts.
+        """
+        columns = ', '.join(VACANCY_COLUMNS)
+        content_columns = ', '.join(VACANCY_COLUMNS[1:])
+        updates = ', '.join(
+            f"{column} = EXCLUDED.{column}"
+            for column in VACANCY_COLUMNS[1:] + ('content_hash',)
+        )
+
+        cur.execute(
+            f"""
+            CREATE TEMP TABLE vacancies_staging ON COMMIT DROP AS
+            SELECT {columns} FROM vacancies WITH NO DATA;
+            """
+        )
+        copy_rows(
+            cur,
+            'vacancies_staging',
+            VACANCY_COLUMNS,
+            vacancy_rows(vacancy_list)
+        )
+        cur.execute("SELECT COUNT(DISTINCT id) FROM vacancies_staging;")
+        staged = cur.fetchone()[0]
+
+        cur.execute(
+            f"""
+            WITH upserted AS (
+                INSERT INTO vacancies AS v ({columns}, content_hash)
+                SELECT DISTINCT ON (id)
+                    {columns}, md5(ROW({content_columns})::text)
+                FROM vacancies_staging
+                ORDER BY id
+                ON CONFLICT (id) DO UPDATE SET {updates}
+                WHERE v.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT
+                COUNT(*) FILTER (WHERE inserted),
+                COUNT(*) FILTER (WHERE NOT inserted)
+            FROM upserted;
+            """
+        )
+        inserted, updated = cur.fetchone()
+        cur.execute("DROP TABLE vacancies_staging;")
+        return UpsertStats(
+            inserted=inserted,
+            updated=updated,
+            unchanged=staged - inserted - updated,
+        )
+
+    @connect_to_db
+    def delete_stale_vacancies(self, cur, employer_id, keep_ids):
+        """
+        Delete vacancies of an employer that are not among the given
+        IDs, i.e. vacancies that are no longer open.
+        Call refresh_salary_stats() once all changes are written.
+
+        Args:
+            cur: Database cursor.
+            employer_id (int): Employer ID.
+            keep_ids (Iterable): IDs of the employer's open vacancies.
+
+        Returns:
+            int: Number of deleted vacancies.
+        """
+        cur.execute(
+            """
+            DELETE FROM vacancies
+            WHERE employer_id = %s AND id <> ALL(%s::INTEGER[]);
+            """,
+            (employer_id, [int(vacancy_id) for vacancy_id in keep_ids])
+        )
+        return cur.rowcount
+
+    @connect_to_db
+    def get_sync_states(self, cur):
+        """
+        Retrieve the synchronisation state of all employers.
+
+        Args:
+            cur: Database cursor.
+
+        Returns:
+            dict: Mapping of employer ID to SyncState.
+        """
+        cur.execute(
+            """
+            SELECT employer_id, last_published_at, last_synced_at,
+                last_full_sync_at
+            FROM sync_state;
+            """
+        )
+        return {row[0]: SyncState(*row) for row in cur.fetchall()}
+
+    @connect_to_db
+    def set_sync_states(self, cur, states):
+        """
+        Store the synchronisation state of employers.
+
+        The published_at watermark never moves backwards, and empty
+        values do not overwrite stored ones.
+
+        Args:
+            cur: Database cursor.
+            states (Iterable): SyncState objects.
+        """
+        execute_values(
+            cur,
+            """
+            INSERT INTO sync_state AS s (employer_id, last_published_at,
+                last_synced_at, last_full_sync_at)
+            VALUES %s
+            ON CONFLICT (employer_id) DO UPDATE SET
+                last_published_at = GREATEST(
+                    s.last_published_at, EXCLUDED.last_published_at
+                ),
+                last_synced_at = COALESCE(
+                    EXCLUDED.last_synced_at, s.last_synced_at
+                ),
+                last_full_sync_at = COALESCE(
+                    EXCLUDED.last_full_sync_at, s.last_full_sync_at
+                );
+            """,
+            [
+                (
+                    state.employer_id,
+                    state.last_published_at,
+                    state.last_synced_at,
+                    state.last_full_sync_at,
+                )
+                for state in states
+            ]
+        )
+
+    @connect_to_db
+    def begin_sync_run(self, cur, incremental, max_age):
+        """
+        Resume the latest unfinished sync run or start a new one.
+
+        An unfinished run is resumed if it is of the same kind and was
+        started less than ``max_age`` ago; other unfinished runs are
+        marked as abandoned.
+
+        Args:
+            cur: Database cursor.
+            incremental (bool): Kind of the run.
+            max_age (timedelta): Oldest run that may be resumed.
+
+        Returns:
+            tuple: Run ID and a mapping of employer ID to the
+            SyncCheckpoint stored for the run.
+        """
+        cur.execute(
+            """
+            UPDATE sync_runs
+            SET status = 'abandoned', finished_at = now()
+            WHERE finished_at IS NULL
+                AND (incremental <> %s OR started_at < now() - %s);
+            """,
+            (incremental, max_age)
+        )
+        cur.execute(
+            """
+            SELECT id
+            FROM sync_runs
+            WHERE finished_at IS NULL
+            ORDER BY started_at DESC
+            LIMIT 1;
+            """
+        )
+        row = cur.fetchone()
+        if row is None:
+            cur.execute(
+                "INSERT INTO sync_runs (incremental) VALUES (%s) "
+                "RETURNING id;",
+                (incremental,)
+            )
+            return cur.fetchone()[0], {}
+
+        run_id = row[0]
+        cur.execute(
+            """
+            SELECT employer_id, status, pages_done
+            FROM sync_checkpoints
+            WHERE run_id = %s;
+            """,
+            (run_id,)
+        )
+        return run_id, {
+            row[0]: SyncCheckpoint(*row) for row in cur.fetchall()
+        }
+
+    @connect_to_db
+    def set_sync_checkpoints(self, cur, run_id, checkpoints):
+        """
+        Store the progress of employers in a sync run.
+
+        Args:
+            cur: Database cursor.
+            run_id (int): Sync run ID.
+            checkpoints (Iterable): SyncCheckpoint objects.
+        """
+        execute_values(
+            cur,
+            """
+            INSERT INTO sync_checkpoints (run_id, employer_id, status,
+                pages_done)
+            VALUES %s
+            ON CONFLICT (run_id, employer_id) DO UPDATE SET
+                status = EXCLUDED.status,
+                pages_done = EXCLUDED.pages_done,
+                updated_at = now();
+            """,
+            [
+                (
+                    run_id,
+                    checkpoint.employer_id,
+                    checkpoint.status,
+                    checkpoint.pages_done,
+                )
+                for checkpoint in checkpoints
+            ]
+        )
+
+    @connect_to_db
+    def finish_sync_run(self, cur, run_id, status=CHECKPOINT_DONE):
+        """
+        Mark a sync run as finished and drop its checkpoints.
+
+        Args:
+            cur: Database cursor.
+            run_id (int): Sync run ID.
+            status (str, optional): Final status of the run.
+            Defaults to "done".
+        """
+        cur.execute(
+            """
+            UPDATE sync_runs SET status = %s, finished_at = now()
+            WHERE id = %s;
+            """,
+            (status, run_id)
+        )
+        cur.execute(
+            "DELETE FROM sync_checkpoints WHERE run_id = %s;", (run_id,)
+        )
+
     @connect_to_db
     def get_companies_and_vacancies_count(self, cur):
         """
@@ -155,6 +631,25 @@ class DBManager(DBEngine):
         Returns:
             list: List of tuples containing vacancy details.
         """
+        self._select_all_vacancies(cur)
+        return cur.fetchall()
+
+    @stream_from_db
+    def iter_all_vacancies(self, cur):
+        """
+        Stream all vacancies from the database.
+
+        Args:
+            cur: Named server-side cursor.
+
+        Yields:
+            Rows containing vacancy details; pass ``itersize`` to set
+            how many rows are fetched per round trip.
+        """
+        self._select_all_vacancies(cur)
+
+    @staticmethod
+    def _select_all_vacancies(cur):
         cur.execute(
             """
             SELECT e.name AS employer_name, v.name AS vacancy_name, v.salary_from, v.salary_to, v.currency, v.alternate_url
@@ -162,13 +657,15 @@ class DBManager(DBEngine):
             INNER JOIN employers e ON v.employer_id = e.id;
             """
         )
-        return cur.fetchall()
 
     @connect_to_db
     def get_avg_salary(self, cur):
         """
         Retrieve the average salary from the database.
 
+        The value is read from the salary_stats cache, which is
+        refreshed after vacancies are loaded or deleted.
+
         Args:
             cur: Database cursor.
 
@@ -177,83 +674,210 @@ class DBManager(DBEngine):
         """
         cur.execute(
             """
-                SELECT ROUND(
-                    AVG(
-                        CASE
-                            WHEN salary_from > 0 AND salary_to > 0
-                                THEN (salary_from + salary_to) / 2.0
-                            ELSE GREATEST(salary_from, salary_to)
-                        END
-                        )
-                    )
-                FROM vacancies;
+                SELECT avg_salary
+                FROM salary_stats;
             """
         )
         return cur.fetchone()[0]
 
+    @connect_to_db
+    def refresh_salary_stats(self, cur):
+        """
+        Recompute the cached average salary. Call it once after a load
+        or deletion rather than after every batch.
+
+        The view is refreshed concurrently, so readers of the average
+        salary are not blocked while it is recomputed.
+
+        Args:
+            cur: Database cursor.
+        """
+        cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY salary_stats;")
+
     @connect_to_db
     def get_vacancies_with_higher_salary(self, cur):
         """
         Retrieve vacancies with salary above average from the database.
 
+        Uses the index on the normalized salary and the cached average
+        salary, so the vacancies table is scanned only once.
+
         Args:
             cur: Database cursor.
 
         Returns:
             list: List of tuples containing vacancy details.
         """
+        self._select_vacancies_with_higher_salary(cur)
+        return cur.fetchall()
+
+    @stream_from_db
+    def iter_vacancies_with_higher_salary(self, cur):
+        """
+        Stream vacancies with salary above average from the database.
+
+        Args:
+            cur: Named server-side cursor.
+
+        Yields:
+            Rows containing vacancy details; pass ``itersize`` to set
+            how many rows are fetched per round trip.
+        """
+        self._select_vacancies_with_higher_salary(cur)
+
+    @staticmethod
+    def _select_vacancies_with_higher_salary(cur):
         cur.execute(
             """
             SELECT e.name AS employer_name, v.name AS vacancy_name, salary_from, salary_to, currency, v.alternate_url
             FROM vacancies v
             INNER JOIN employers e ON e.id = v.employer_id
-            WHERE (
-                CASE
-                    WHEN salary_from > 0 AND salary_to > 0
-                        THEN (salary_from + salary_to) / 2.0
-                    ELSE GREATEST(salary_from, salary_to)
-                END
-                ) > (
-                    SELECT ROUND(
-                        AVG(
-                            CASE
-                                WHEN salary_from > 0 AND salary_to > 0
-                                    THEN (salary_from + salary_to) / 2.0
-                                ELSE GREATEST(salary_from, salary_to)
-                            END
-                            )
-                        )
-                    FROM vacancies
-                );
+            WHERE v.salary_normalized > (
+                SELECT avg_salary FROM salary_stats
+            );
             """
         )
-        return cur.fetchall()
 
     @connect_to_db
-    def get_vacancies_with_keyword(self, cur, keyword):
+    def get_vacancies_with_keyword(self, cur, keyword, limit=None):
         """
         Retrieve vacancies containing a specific keyword from the
         database.
 
+        The keyword is matched as a case-insensitive substring of the
+        name, requirement or responsibility, so "dev" also finds
+        "developer". The result does not depend on the installed
+        extensions: after enable_trigram_search() the same match is
+        only answered from the trigram indexes. For ranked results use
+        search_vacancies().
+
         Args:
             cur: Database cursor.
             keyword (str): Keyword to search for.
+            limit (int, optional): Maximum number of vacancies.
+            Defaults to None, all matching vacancies.
 
         Returns:
             list: List of tuples containing vacancy details.
         """
         cur.execute(
-            f"""
-            SELECT e.name as employer_name, v.name as vacancy_name, salary_from, salary_to, currency, v.alternate_url
+            """
+            SELECT e.name AS employer_name, v.name AS vacancy_name, v.salary_from, v.salary_to, v.currency, v.alternate_url
             FROM vacancies v
             INNER JOIN employers e ON e.id = v.employer_id
-            WHERE v.name ILIKE ('%{keyword}%')
-                OR requirement ILIKE ('%{keyword}%')
-                OR responsibility ILIKE ('%{keyword}%');
-            """
+            WHERE v.name ILIKE %(pattern)s
+                OR v.requirement ILIKE %(pattern)s
+                OR v.responsibility ILIKE %(pattern)s
+            LIMIT %(limit)s;
+            """,
+            {'pattern': self._like_pattern(keyword), 'limit': limit}
         )
         return cur.fetchall()
 
+    @connect_to_db
+    def search_vacancies(
+            self, cur, query, limit=SEARCH_LIMIT, mode=SEARCH_MODE_FTS
+    ):
+        """
+        Retrieve the best ranked vacancies matching a search query.
+
+        In "fts" mode the query is matched against the indexed
+        search_vector using both Russian and English configurations and
+        web search syntax ("python -java", "\"data engineer\"").
+        In "trgm" mode the query is matched as a substring of the name,
+        requirement or responsibility; it needs the pg_trgm extension,
+        see enable_trigram_search().
+
+        Args:
+            cur: Database cursor.
+            query (str): Search query.
+            limit (int, optional): Maximum number of vacancies.
+            Defaults to SEARCH_LIMIT.
+            mode (str, optional): "fts" or "trgm".
+            Defaults to "fts".
+
+        Returns:
+            list: List of tuples containing vacancy details, best
+            matches first.
+
+        Raises:
+            ValueError: If the mode is not supported.
+        """
+        return self._search_vacancies(cur, query, limit, mode)
+
+    @staticmethod
+    def _search_vacancies(cur, query, limit, mode):
+        if mode == SEARCH_MODE_FTS:
+            cur.execute(
+                """
+                SELECT e.name AS employer_name, v.name AS vacancy_name, v.salary_from, v.salary_to, v.currency, v.alternate_url
+                FROM vacancies v
+                INNER JOIN employers e ON e.id = v.employer_id
+                CROSS JOIN (
+                    SELECT websearch_to_tsquery('russian', %(query)s)
+                        || websearch_to_tsquery('english', %(query)s) AS q
+                ) search
+                WHERE v.search_vector @@ search.q
+                ORDER BY ts_rank(v.search_vector, search.q) DESC
+                LIMIT %(limit)s;
+                """,
+                {'query': query, 'limit': limit}
+            )
+        elif mode == SEARCH_MODE_TRIGRAM:
+            pattern = DBManager._like_pattern(query)
+            cur.execute(
+                """
+                SELECT e.name AS employer_name, v.name AS vacancy_name, v.salary_from, v.salary_to, v.currency, v.alternate_url
+                FROM vacancies v
+                INNER JOIN employers e ON e.id = v.employer_id
+                WHERE v.name ILIKE %(pattern)s
+                    OR v.requirement ILIKE %(pattern)s
+                    OR v.responsibility ILIKE %(pattern)s
+                ORDER BY GREATEST(
+                    word_similarity(%(query)s, v.name),
+                    word_similarity(%(query)s, v.requirement),
+                    word_similarity(%(query)s, v.responsibility)
+                ) DESC
+                LIMIT %(limit)s;
+                """,
+                {'query': query, 'pattern': pattern, 'limit': limit}
+            )
+        else:
+            raise ValueError(f"Unsupported search mode: {mode}")
+        return cur.fetchall()
+
+    @staticmethod
+    def _like_pattern(text):
+        """
+        Return an ILIKE pattern matching the text as a substring, with
+        its wildcard characters escaped.
+        """
+        return '%' + text.replace('\\', '\\\\').replace(
+            '%', '\\%'
+        ).replace('_', '\\_') + '%'
+
+    @connect_to_db
+    def enable_trigram_search(self, cur):
+        """
+        Install the pg_trgm extension and trigram indexes used by the
+        "trgm" search mode. Requires the privilege to create
+        extensions.
+
+        Args:
+            cur: Database cursor.
+        """
+        cur.execute(
+            """
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS vacancies_name_trgm_idx
+                ON vacancies USING GIN (name gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS vacancies_requirement_trgm_idx
+                ON vacancies USING GIN (requirement gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS vacancies_responsibility_trgm_idx
+                ON vacancies USING GIN (responsibility gin_trgm_ops);
+            """
+        )
+
     @connect_to_db
     def get_employers(self, cur, employer_id=None):
         """
@@ -300,18 +924,105 @@ class DBManager(DBEngine):
 
             )
 
+    @connect_to_db
+    def upsert_employers(self, cur, employers_list):
+        """
+        Insert employers, or update the ones already stored, with a
+        single statement.
+
+        Args:
+            cur: Database cursor.
+            employers_list (Iterable): Employer objects. Repeated IDs
+            are stored once. An unknown open vacancy count (None)
+            keeps the stored one.
+
+        Returns:
+            int: Number of inserted or updated employers.
+        """
+        employers = {employer.id: employer for employer in employers_list}
+        if not employers:
+            return 0
+        execute_values(
+            cur,
+            """
+            INSERT INTO employers (id, name, open_vacancies, alternate_url)
+            VALUES %s
+            ON CONFLICT (id) DO UPDATE SET
+                name = EXCLUDED.name,
+                open_vacancies = COALESCE(
+                    EXCLUDED.open_vacancies, employers.open_vacancies
+                ),
+                alternate_url = EXCLUDED.alternate_url;
+            """,
+            [
+                (
+                    employer.id,
+                    employer.name,
+                    employer.open_vacancies,
+                    employer.alternate_url
+                )
+                for employer in employers.values()
+            ],
+            page_size=len(employers)
+        )
+        return len(employers)
+
+    @connect_to_db
+    def update_open_vacancies(self, cur, employer_id, open_vacancies):
+        """
+        Store the current number of open vacancies of an employer.
+
+        Args:
+            cur: Database cursor.
+            employer_id (int): Employer ID.
+            open_vacancies (int): Number of open vacancies.
+        """
+        cur.execute(
+            "UPDATE employers SET open_vacancies = %s WHERE id = %s;",
+            (open_vacancies, employer_id)
+        )
+
+    @connect_to_db
+    def copy_employers(self, cur, employers_list):
+        """
+        Bulk load employers with COPY in a single transaction.
+
+        Args:
+            cur: Database cursor.
+            employers_list (Iterable): Employer objects.
+
+        Returns:
+            int: Number of loaded rows.
+        """
+        return copy_rows(
+            cur, 'employers', EMPLOYER_COLUMNS, employer_rows(employers_list)
+        )
+
     @connect_to_db
     def delete_employer(self, cur, employer_id=None):
         """
-        Delete an employer from the database.
+        Delete an employer with its vacancies from the database, in a
+        single transaction. The cached average salary is not refreshed,
+        call refresh_salary_stats() once all deletions are done.
 
         Args:
             cur: Database cursor.
             employer_id (int, optional): Employer ID. If provided,
-            delete a specific employer. Defaults to None.
+            delete a specific employer. Defaults to None, all
+            employers.
+
+        Returns:
+            int: Number of deleted employers.
         """
         if employer_id is None:
-            sql = "TRUNCATE TABLE employers CASCADE;"
+            cur.execute("SELECT COUNT(*) FROM employers;")
+            deleted = cur.fetchone()[0]
+            cur.execute("TRUNCATE TABLE employers CASCADE;")
         else:
-            sql = f"DELETE FROM employers WHERE id = {employer_id};"
-        cur.execute(sql)
+            cur.execute(
+                "DELETE FROM vacancies WHERE employer_id = %s;",
+                (employer_id,)
+            )
+            cur.execute("DELETE FROM employers WHERE id = %s;", (employer_id,))
+            deleted = cur.rowcount
+        return deleted
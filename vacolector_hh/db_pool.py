@@ -0,0 +1,83 @@
+""" Instrumented, blocking PostgreSQL connection pool. """
+import threading
+import time
+from typing import Dict
+
+from psycopg2.pool import ThreadedConnectionPool
+
+
+class InstrumentedConnectionPool(ThreadedConnectionPool):
+    """
+    Thread-safe connection pool that blocks when all connections are
+    checked out instead of raising, and keeps checkout statistics to
+    watch pool saturation.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, **kwargs):
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+
+    def getconn(self, key=None):
+        """
+        Check a connection out of the pool, waiting for a free one if
+        the pool is saturated.
+
+        Returns:
+            connection: A psycopg2 connection.
+        """
+        started = time.perf_counter()
+        waited = not self._slots.acquire(blocking=False)
+        if waited:
+            self._slots.acquire()
+
+        try:
+            conn = super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._stats_lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+            if waited:
+                self.waits += 1
+                self.wait_seconds += time.perf_counter() - started
+        return conn
+
+    def putconn(self, conn=None, key=None, close=False):
+        """
+        Return a connection to the pool. Broken connections are closed
+        and replaced on the next checkout.
+        """
+        try:
+            super().putconn(conn, key, close or bool(conn.closed))
+        finally:
+            with self._stats_lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Return a snapshot of the pool statistics.
+
+        Returns:
+            Dict[str, float]: Pool size limits, checkout counters and
+            the total time spent waiting for a free connection.
+        """
+        with self._stats_lock:
+            return {
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'in_use': self.in_use,
+                'peak_in_use': self.peak_in_use,
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_seconds': round(self.wait_seconds, 6),
+            }
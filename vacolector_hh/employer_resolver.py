@@ -0,0 +1,238 @@
+""" Batch lookup of employers by name with a persistent name index. """
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+from vacolector_hh.constants import (
+    EMPLOYER_INDEX,
+    EMPLOYER_INDEX_MAX_AGE_DAYS,
+    RESOLVER_WORKERS,
+)
+from vacolector_hh.data_classes import Employer
+from vacolector_hh.parser_hh import HHParser
+
+
+def normalize_name(name: str) -> str:
+    """
+    Return the form of an employer name used to detect repeated names:
+    case-folded, with surrounding and repeated whitespace removed.
+
+    Args:
+        name (str): Employer name.
+
+    Returns:
+        str: Normalized name.
+    """
+    return ' '.join(name.split()).casefold()
+
+
+class EmployerResolver:
+    """
+    Finds the employers matching many names at once.
+
+    Names differing only in case or whitespace are searched once, and
+    the distinct names are searched in parallel. The employers found
+    for every name are kept in a JSON index on disk, so names resolved
+    during the last ``max_age_days`` are not searched again, also not
+    by later runs.
+
+    The index keeps the IDs, names and URLs of the employers but not
+    their open vacancy counts, which change daily; employers resolved
+    from it have ``open_vacancies`` set to None until current() fetches
+    them again.
+    """
+
+    def __init__(
+            self,
+            hh_parser: HHParser,
+            index_path: Optional[str] = EMPLOYER_INDEX,
+            workers: int = RESOLVER_WORKERS,
+            max_age_days: float = EMPLOYER_INDEX_MAX_AGE_DAYS
+    ):
+        """
+        Args:
+            hh_parser (HHParser): Parser searching the employers.
+            index_path (str, optional): JSON file of the name index,
+            None keeps the index in memory only. Defaults to
+            EMPLOYER_INDEX.
+            workers (int, optional): Names searched in parallel.
+            Defaults to RESOLVER_WORKERS.
+            max_age_days (float, optional): Days a resolved name is
+            reused. Defaults to EMPLOYER_INDEX_MAX_AGE_DAYS.
+        """
+        self.hh_parser = hh_parser
+        self.index_path = index_path
+        self.workers = max(1, workers)
+        self.max_age = max_age_days * 24 * 3600
+        self._index: Dict[str, dict] = self._load()
+        self._lock = threading.Lock()
+
+    def resolve(self, names: Iterable[str]) -> Dict[str, List[Employer]]:
+        """
+        Find the employers matching every name.
+
+        Args:
+            names (Iterable[str]): Employer names, may repeat.
+
+        Returns:
+            Dict[str, List[Employer]]: Employers found, most relevant
+            first, by name in the order of the names. Repeated names
+            appear once, spelt as the first time. Names whose search
+            failed are left out. Employers taken from the index have
+            no open vacancy count.
+        """
+        names = [name.strip() for name in names if name and name.strip()]
+        now = time.time()
+        distinct = {}
+        for name in names:
+            distinct.setdefault(normalize_name(name), name)
+        missing = [
+            key for key in distinct
+            if key not in self._index
+            or now - self._index[key]['resolved_at'] > self.max_age
+        ]
+
+        searched = {}
+        if missing:
+            with ThreadPoolExecutor(
+                    max_workers=min(self.workers, len(missing))
+            ) as executor:
+                for key, employers in zip(
+                        missing,
+                        executor.map(
+                            self._search, (distinct[key] for key in missing)
+                        )
+                ):
+                    if employers is not None:
+                        searched[key] = employers
+                        self._remember(key, employers, now)
+            self._save()
+
+        resolved = {}
+        for key, name in distinct.items():
+            if key in searched:
+                resolved[name] = searched[key]
+                continue
+            entry = self._index.get(key)
+            if entry is not None:
+                resolved[name] = [
+                    Employer(
+                        id=employer['id'],
+                        name=employer['name'],
+                        alternate_url=employer['alternate_url'],
+                        open_vacancies=None,
+                    )
+                    for employer in entry['employers']
+                ]
+        return resolved
+
+    def current(self, employers: Iterable[Employer]) -> List[Employer]:
+        """
+        Return the employers with their current data, fetching the
+        ones resolved from the index in parallel, so that stored open
+        vacancy counts are never older than the request.
+
+        Args:
+            employers (Iterable[Employer]): Employers from resolve().
+
+        Returns:
+            List[Employer]: The employers in the same order. An
+            employer that could not be fetched is returned as given.
+        """
+        employers = list(employers)
+        stale = [
+            employer for employer in employers
+            if employer.open_vacancies is None
+        ]
+        if not stale:
+            return employers
+        with ThreadPoolExecutor(
+                max_workers=min(self.workers, len(stale))
+        ) as executor:
+            fetched = {
+                employer.id: current
+                for employer, current in zip(
+                    stale, executor.map(self._fetch, stale)
+                )
+                if current is not None
+            }
+        return [fetched.get(employer.id, employer) for employer in employers]
+
+    def forget(self, names: Optional[Iterable[str]] = None) -> None:
+        """
+        Drop names from the index so they are searched again.
+
+        Args:
+            names (Iterable[str], optional): Names to drop.
+            Defaults to all names.
+        """
+        with self._lock:
+            if names is None:
+                self._index.clear()
+            else:
+                for name in names:
+                    self._index.pop(normalize_name(name), None)
+        self._save()
+
+    def _search(self, name: str) -> Optional[List[Employer]]:
+        try:
+            return self.hh_parser.parse_employers(name)
+        except Exception as error:
+            print(f"Failed to find employers named '{name}': {error}")
+            return None
+
+    def _fetch(self, employer: Employer) -> Optional[Employer]:
+        try:
+            return self.hh_parser.parse_employer(employer.id)
+        except Exception as error:
+            print(f"Failed to fetch employer {employer.id}: {error}")
+            return None
+
+    def _remember(
+            self, key: str, employers: List[Employer], now: float
+    ) -> None:
+        with self._lock:
+            self._index[key] = {
+                'resolved_at': now,
+                'employers': [
+                    {
+                        'id': employer.id,
+                        'name': employer.name,
+                        'alternate_url': employer.alternate_url,
+                    }
+                    for employer in employers
+                ],
+            }
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.index_path:
+            return {}
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as error:
+            print(f"Ignoring unreadable employer index "
+                  f"{self.index_path}: {error}")
+            return {}
+
+    def _save(self) -> None:
+        """
+        Replace the index file atomically. The temporary file is named
+        after the process and thread, so concurrent saves, also by
+        other collector processes, never write to the same one.
+        """
+        if not self.index_path:
+            return
+        with self._lock:
+            content = json.dumps(self._index, ensure_ascii=False)
+        os.makedirs(os.path.dirname(self.index_path) or '.', exist_ok=True)
+        temporary_path = \
+            f'{self.index_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temporary_path, 'w') as f:
+            f.write(content)
+        os.replace(temporary_path, self.index_path)
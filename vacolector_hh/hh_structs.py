@@ -0,0 +1,84 @@
+"""
+Typed structs for archived HH API vacancy pages, decoded directly by
+msgspec when the archive is replayed.
+
+Only the fields stored in the vacancies table are declared, the rest of
+every item is skipped by the decoder without building objects for it.
+Pages fetched from the API are decoded into dicts instead, since they
+are cached and archived with all their fields.
+
+The structs are only defined when msgspec is installed, and the
+decoder is None without it; check HAS_STRUCTS before using it.
+"""
+from typing import Iterable, List, Optional
+
+from vacolector_hh.json_codec import msgspec
+from vacolector_hh.vacancy_batch import VacancyBatch
+
+HAS_STRUCTS = msgspec is not None
+
+if HAS_STRUCTS:
+    class Salary(msgspec.Struct):
+        from_: Optional[int] = msgspec.field(default=0, name='from')
+        to: Optional[int] = 0
+        currency: Optional[str] = ''
+
+    class Snippet(msgspec.Struct):
+        requirement: Optional[str] = ''
+        responsibility: Optional[str] = ''
+
+    class EmployerRef(msgspec.Struct):
+        id: Optional[str] = None
+
+    class VacancyItem(msgspec.Struct):
+        id: str
+        name: str
+        alternate_url: str
+        published_at: str
+        employer: EmployerRef
+        salary: Optional[Salary] = None
+        snippet: Snippet = msgspec.field(default_factory=Snippet)
+
+    class VacanciesPage(msgspec.Struct):
+        items: List[VacancyItem]
+        found: int = 0
+        pages: int = 0
+        page: int = 0
+        per_page: int = 0
+
+    class ArchivedPage(msgspec.Struct):
+        employer_id: int
+        response: VacanciesPage
+
+    ARCHIVED_PAGE_DECODER = msgspec.json.Decoder(ArchivedPage)
+else:
+    ARCHIVED_PAGE_DECODER = None
+
+
+def batch_from_items(items: Iterable) -> VacancyBatch:
+    """
+    Builds a VacancyBatch from decoded VacancyItem structs, without a
+    Vacancy object per item.
+
+    Args:
+        items (Iterable[VacancyItem]): Vacancy items.
+
+    Returns:
+        VacancyBatch: The parsed vacancies.
+    """
+    batch = VacancyBatch()
+    for item in items:
+        salary = item.salary
+        batch.append_row((
+            item.id,
+            item.name,
+            salary.from_ if salary else 0,
+            salary.to if salary else 0,
+            salary.currency if salary else '',
+            item.published_at,
+            item.alternate_url,
+            item.employer.id,
+            item.snippet.requirement,
+            item.snippet.responsibility,
+        ))
+    return batch
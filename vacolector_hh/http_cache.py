@@ -0,0 +1,414 @@
+""" On-disk cache of HH API responses revalidated with conditional requests. """
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Mapping, Optional
+from urllib.parse import urlencode, urlsplit
+
+from vacolector_hh.constants import (
+    HTTP_CACHE_DIR,
+    HTTP_CACHE_MAX_BYTES,
+    HTTP_CACHE_MEMORY_ENTRIES,
+    HTTP_CACHE_TTL_SECONDS,
+)
+from vacolector_hh.json_codec import loads
+from vacolector_hh.metrics import (
+    HTTP_CACHE_EVICTIONS,
+    HTTP_CACHE_REQUESTS,
+    REGISTRY,
+)
+
+BODY_SUFFIX = '.json'
+META_SUFFIX = '.meta'
+
+
+def cache_key(url: str, parameters: Mapping[str, Any]) -> str:
+    """
+    Return the cache key of a request: a hash of the URL and its
+    parameters sorted by name, so the key does not depend on the order
+    the parameters were added in.
+
+    Args:
+        url (str): Request URL.
+        parameters (Mapping[str, Any]): Request parameters.
+
+    Returns:
+        str: Hex digest.
+    """
+    query = urlencode(
+        sorted((name, value) for name, value in parameters.items()
+               if value is not None),
+        doseq=True
+    )
+    return hashlib.sha256(f'{url}?{query}'.encode()).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    key: str
+    url: str
+    expires_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    data: Any = None
+    derived: Dict[str, Any] = field(default_factory=dict)
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        """
+        Return True while the response may be used without asking the
+        server.
+        """
+        return (time.time() if now is None else now) < self.expires_at
+
+    def validators(self) -> Dict[str, str]:
+        """
+        Return the conditional request headers revalidating the entry.
+
+        Returns:
+            Dict[str, str]: If-None-Match and/or If-Modified-Since.
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+    def metadata(self) -> dict:
+        return {
+            'url': self.url,
+            'expires_at': self.expires_at,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+        }
+
+
+class ResponseCache:
+    """
+    Cache of JSON responses stored as one body and one metadata file
+    per request under ``directory``.
+
+    Bodies are kept verbatim and decoded on first use; the decoded
+    data of the most recently used entries is also kept in memory,
+    together with objects built from it (see derived()), so a
+    revalidated response costs neither JSON decoding nor object
+    construction. The files are evicted least recently used first
+    once they take more than ``max_bytes``; use is tracked by the body
+    file's modification time, so the order survives restarts.
+    """
+
+    def __init__(
+            self,
+            directory: str = HTTP_CACHE_DIR,
+            max_bytes: int = HTTP_CACHE_MAX_BYTES,
+            ttls: Optional[Mapping[str, float]] = None,
+            memory_entries: int = HTTP_CACHE_MEMORY_ENTRIES
+    ):
+        """
+        Args:
+            directory (str, optional): Cache directory, created if
+            missing. Defaults to HTTP_CACHE_DIR.
+            max_bytes (int, optional): Disk space limit.
+            Defaults to HTTP_CACHE_MAX_BYTES.
+            ttls (Mapping[str, float], optional): Seconds a response
+            stays fresh by URL path. Defaults to HTTP_CACHE_TTL_SECONDS.
+            memory_entries (int, optional): Decoded responses kept in
+            memory. Defaults to HTTP_CACHE_MEMORY_ENTRIES.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttls = dict(HTTP_CACHE_TTL_SECONDS if ttls is None else ttls)
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._memory: 'OrderedDict[str, CacheEntry]' = OrderedDict()
+        self._by_data: Dict[int, CacheEntry] = {}
+        self._sizes: 'OrderedDict[str, int]' = OrderedDict()
+        self._total_bytes = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+        REGISTRY.gauge(
+            'hh_cache_bytes', 'Disk space used by the response cache.',
+            lambda: self._total_bytes
+        )
+
+    def ttl(self, url: str) -> float:
+        """
+        Return the seconds a response of the URL stays fresh.
+
+        Args:
+            url (str): Request URL.
+
+        Returns:
+            float: TTL, 0 to revalidate on every use.
+        """
+        return self.ttls.get(urlsplit(url).path.rstrip('/'), 0)
+
+    def get(
+            self, url: str, parameters: Mapping[str, Any]
+    ) -> Optional[CacheEntry]:
+        """
+        Return the cached response of a request with its data loaded.
+
+        Args:
+            url (str): Request URL.
+            parameters (Mapping[str, Any]): Request parameters.
+
+        Returns:
+            Optional[CacheEntry]: The entry or None if the request is
+            not cached.
+        """
+        key = cache_key(url, parameters)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return entry
+            if key not in self._sizes:
+                return None
+
+        try:
+            with open(self._path(key, META_SUFFIX)) as f:
+                metadata = json.load(f)
+            with open(self._path(key, BODY_SUFFIX), 'rb') as f:
+                data = loads(f.read())
+        except (OSError, ValueError):
+            self._discard(key)
+            return None
+        entry = CacheEntry(key=key, data=data, **metadata)
+        self._remember(entry)
+        return entry
+
+    def store(
+            self,
+            url: str,
+            parameters: Mapping[str, Any],
+            headers: Mapping[str, str],
+            body: bytes,
+            data: Any
+    ) -> Optional[CacheEntry]:
+        """
+        Cache a response unless it can neither be served while fresh
+        nor revalidated.
+
+        Args:
+            url (str): Request URL.
+            parameters (Mapping[str, Any]): Request parameters.
+            headers (Mapping[str, str]): Response headers.
+            body (bytes): Raw response body.
+            data (Any): Decoded response body.
+
+        Returns:
+            Optional[CacheEntry]: The stored entry or None.
+        """
+        if 'no-store' in headers.get('Cache-Control', ''):
+            return None
+        entry = CacheEntry(
+            key=cache_key(url, parameters),
+            url=url,
+            expires_at=time.time() + self.ttl(url),
+            etag=headers.get('ETag'),
+            last_modified=headers.get('Last-Modified'),
+            data=data,
+        )
+        if not (entry.etag or entry.last_modified or self.ttl(url)):
+            return None
+
+        self._write(entry.key, BODY_SUFFIX, body)
+        size = len(body) + self._write_metadata(entry)
+        with self._lock:
+            self._total_bytes += size - self._sizes.pop(entry.key, 0)
+            self._sizes[entry.key] = size
+        self._remember(entry)
+        self._evict()
+        return entry
+
+    def refresh(
+            self, entry: CacheEntry, headers: Mapping[str, str]
+    ) -> CacheEntry:
+        """
+        Extend an entry after the server answered 304 Not Modified.
+
+        Args:
+            entry (CacheEntry): Revalidated entry.
+            headers (Mapping[str, str]): Headers of the 304 response.
+
+        Returns:
+            CacheEntry: The same entry.
+        """
+        entry.expires_at = time.time() + self.ttl(entry.url)
+        entry.etag = headers.get('ETag') or entry.etag
+        entry.last_modified = headers.get('Last-Modified') \
+            or entry.last_modified
+        self._write_metadata(entry)
+        self.touch(entry)
+        return entry
+
+    def touch(self, entry: CacheEntry) -> None:
+        """
+        Mark an entry as just used.
+
+        Args:
+            entry (CacheEntry): Used entry.
+        """
+        with self._lock:
+            if entry.key in self._sizes:
+                self._sizes.move_to_end(entry.key)
+        try:
+            os.utime(self._path(entry.key, BODY_SUFFIX))
+        except OSError:
+            pass
+
+    def record(self, result: str) -> None:
+        """
+        Count a cache lookup.
+
+        Args:
+            result (str): "hit" for a fresh response, "not_modified"
+            for a revalidated one or "miss".
+        """
+        with self._lock:
+            if result == 'hit':
+                self.hits += 1
+            elif result == 'not_modified':
+                self.revalidated += 1
+            else:
+                self.misses += 1
+        HTTP_CACHE_REQUESTS.inc(result=result)
+
+    def derived(self, data: Any, name: str, build: Callable[[Any], Any]):
+        """
+        Return an object built from cached response data, building it
+        only the first time for the same cached response.
+
+        Objects are shared between the callers that got the same
+        response, so they must not be modified.
+
+        Args:
+            data (Any): Response data as returned by the cache.
+            name (str): Name of the derived object, e.g. "vacancies".
+            build (Callable[[Any], Any]): Builds the object from data.
+
+        Returns:
+            The built object.
+        """
+        with self._lock:
+            entry = self._by_data.get(id(data))
+        if entry is None or entry.data is not data:
+            return build(data)
+        if name not in entry.derived:
+            entry.derived[name] = build(data)
+        return entry.derived[name]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Return the lookup counts and the disk usage.
+
+        Returns:
+            Dict[str, int]: Hits, revalidations, misses, evictions,
+            entries and bytes.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'revalidated': self.revalidated,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._sizes),
+                'bytes': self._total_bytes,
+            }
+
+    def clear(self) -> None:
+        """
+        Delete all cached responses.
+        """
+        with self._lock:
+            keys = list(self._sizes)
+        for key in keys:
+            self._discard(key)
+
+    def _scan(self) -> None:
+        """
+        Index the cached files, least recently used first.
+        """
+        files = {}
+        with os.scandir(self.directory) as entries:
+            for dir_entry in entries:
+                key, suffix = os.path.splitext(dir_entry.name)
+                if suffix not in (BODY_SUFFIX, META_SUFFIX):
+                    continue
+                stat = dir_entry.stat()
+                size, used_at = files.get(key, (0, 0.0))
+                if suffix == BODY_SUFFIX:
+                    used_at = stat.st_mtime
+                files[key] = (size + stat.st_size, used_at)
+        for key, (size, _) in sorted(
+                files.items(), key=lambda item: item[1][1]
+        ):
+            self._sizes[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self) -> None:
+        while True:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes or not self._sizes:
+                    return
+                key = next(iter(self._sizes))
+                self.evictions += 1
+            HTTP_CACHE_EVICTIONS.inc()
+            self._discard(key)
+
+    def _discard(self, key: str) -> None:
+        with self._lock:
+            self._total_bytes -= self._sizes.pop(key, 0)
+            entry = self._memory.pop(key, None)
+            if entry is not None:
+                self._by_data.pop(id(entry.data), None)
+        for suffix in (BODY_SUFFIX, META_SUFFIX):
+            try:
+                os.remove(self._path(key, suffix))
+            except FileNotFoundError:
+                pass
+
+    def _remember(self, entry: CacheEntry) -> None:
+        with self._lock:
+            previous = self._memory.pop(entry.key, None)
+            if previous is not None:
+                self._by_data.pop(id(previous.data), None)
+            self._memory[entry.key] = entry
+            self._by_data[id(entry.data)] = entry
+            while len(self._memory) > self.memory_entries:
+                _, evicted = self._memory.popitem(last=False)
+                self._by_data.pop(id(evicted.data), None)
+
+    def _write_metadata(self, entry: CacheEntry) -> int:
+        metadata = json.dumps(entry.metadata()).encode()
+        self._write(entry.key, META_SUFFIX, metadata)
+        return len(metadata)
+
+    def _write(self, key: str, suffix: str, content: bytes) -> None:
+        """
+        Replace a cache file atomically, so concurrent readers never
+        see it half written. The temporary file is named after the
+        process and thread, so processes sharing the cache directory
+        never write to the same one.
+        """
+        path = self._path(key, suffix)
+        temporary_path = (
+            f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        )
+        with open(temporary_path, 'wb') as f:
+            f.write(content)
+        os.replace(temporary_path, path)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, key + suffix)
@@ -0,0 +1,122 @@
+""" Pooled keep-alive HTTP session used by the parsers. """
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from vacolector_hh.constants import (
+    BACKOFF_FACTOR,
+    CONNECT_TIMEOUT,
+    FETCH_CONCURRENCY,
+    LATENCY_HISTORY_SIZE,
+    MAX_RETRIES,
+    READ_TIMEOUT,
+    RETRY_STATUSES,
+)
+
+
+class HTTPSession:
+    """
+    Wrapper around ``requests.Session`` with connection pooling,
+    timeouts, retries with exponential backoff and latency tracking.
+
+    Only server errors (RETRY_STATUSES) are retried here. Throttled
+    responses (429/503) are returned to RequestMixin, which retries them
+    through the rate limiters so the adaptive limiter can back off.
+    """
+
+    def __init__(
+            self,
+            pool_size: int = FETCH_CONCURRENCY,
+            timeout: Tuple[float, float] = (CONNECT_TIMEOUT, READ_TIMEOUT),
+            retries: int = MAX_RETRIES,
+            backoff_factor: float = BACKOFF_FACTOR,
+    ):
+        self.timeout = timeout
+        self.latencies: Deque[Tuple[str, float]] = deque(
+            maxlen=LATENCY_HISTORY_SIZE
+        )
+        self._lock = threading.Lock()
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({'GET'}),
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(
+            self,
+            url: str,
+            parameters: Dict[str, Any],
+            headers: Dict[str, str]
+    ) -> requests.Response:
+        """
+        Make a GET request through the pooled session and record its
+        latency.
+
+        Args:
+            url (str): The URL to make the request to.
+            parameters (Dict[str, Any]): The request parameters.
+            headers (Dict[str, str]): The request headers.
+
+        Returns:
+            requests.Response: The response of the last attempt.
+        """
+        started = time.perf_counter()
+        response = self.session.get(
+            url,
+            params=parameters,
+            headers=headers,
+            timeout=self.timeout
+        )
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.latencies.append((response.url, elapsed))
+
+        return response
+
+    @property
+    def last_latency(self) -> Optional[float]:
+        """
+        Return the latency of the most recent request in seconds.
+
+        Returns:
+            Optional[float]: Latency in seconds or None if no request
+            was made yet.
+        """
+        with self._lock:
+            return self.latencies[-1][1] if self.latencies else None
+
+    def latency_report(self) -> List[Tuple[str, float]]:
+        """
+        Return a snapshot of the recorded request latencies.
+
+        Returns:
+            List[Tuple[str, float]]: Pairs of request URL and latency
+            in seconds, oldest first.
+        """
+        with self._lock:
+            return list(self.latencies)
+
+    def close(self) -> None:
+        """
+        Close all pooled connections.
+        """
+        self.session.close()
@@ -0,0 +1,65 @@
+""" JSON encoding and decoding with the fastest installed backend. """
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+elif msgspec is not None:
+    JSON_BACKEND = 'msgspec'
+else:
+    JSON_BACKEND = 'json'
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON document into dicts and lists, with orjson or
+    msgspec if one of them is installed and the standard library
+    otherwise.
+
+    Args:
+        content (Union[bytes, str]): UTF-8 encoded JSON document.
+
+    Returns:
+        Any: Decoded document.
+
+    Raises:
+        ValueError: If the document is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(content)
+    if msgspec is not None:
+        try:
+            return msgspec.json.decode(content)
+        except msgspec.DecodeError as error:
+            raise ValueError(str(error)) from error
+    return json.loads(content)
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a value as compact UTF-8 JSON with the fastest installed
+    backend.
+
+    Args:
+        value (Any): Value made of dicts, lists and scalars.
+
+    Returns:
+        bytes: Encoded document.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    if msgspec is not None:
+        return msgspec.json.encode(value)
+    return json.dumps(
+        value, ensure_ascii=False, separators=(',', ':')
+    ).encode()
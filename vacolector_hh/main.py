@@ -1,10 +1,28 @@
 import argparse
+import logging
+import sys
 import traceback
-
-from vacolector_hh.constants import EMPLOYERS_LIST
-from vacolector_hh.db_manager import DBManager
-from vacolector_hh.file_handler import FileHandler
-from vacolector_hh.parser_hh import HHParser
+from datetime import datetime
+
+from vacolector_hh.api import EMPLOYER_SELECTORS, VaCollector
+from vacolector_hh.constants import (
+    ARCHIVE_DIR,
+    EMPLOYERS_LIST,
+    HTTP_CACHE_DIR,
+    REPLAY_PROCESSES,
+    SCHEDULER_MAX_INTERVAL_SECONDS,
+    SCHEDULER_MIN_INTERVAL_SECONDS,
+    SCHEDULER_REQUESTS_PER_HOUR,
+    SEARCH_LIMIT,
+    SEARCH_MODE_FTS,
+    SEARCH_MODE_TRIGRAM,
+    SYNC_WORKERS,
+)
+from vacolector_hh.employer_resolver import EmployerResolver
+from vacolector_hh.metrics import REGISTRY
+from vacolector_hh.profiling import profiled, set_slow_threshold
+from vacolector_hh.scheduler import RefreshScheduler
+from vacolector_hh.sync import VacancySync
 
 
 def delete_or_add_employer_selector() -> str:
@@ -102,6 +120,25 @@ def select_employer(employers: list) -> list:
     return extracted_employers
 
 
+def add_resolved_employers(db_manager, hh_parser, names: list) -> None:
+    """
+    Find the employers of all names at once, let the user choose among
+    similar names and store the chosen employers together.
+
+    Args:
+        db_manager: Instance of the DBManager class.
+        hh_parser: Instance of the HHParser class.
+        names (list): Employer names.
+    """
+    resolver = EmployerResolver(hh_parser)
+    chosen = []
+    for employers in resolver.resolve(names).values():
+        if len(employers) > 1:
+            employers = select_employer(employers)
+        chosen.extend(employers)
+    db_manager.upsert_employers(resolver.current(chosen))
+
+
 def add_by_employer_by_name(db_manager, hh_parser):
     """
     Add employers to the subscription list by employer name.
@@ -110,36 +147,33 @@ def add_by_employer_by_name(db_manager, hh_parser):
         db_manager: Instance of the DBManager class.
         hh_parser: Instance of the HHParser class.
     """
-    employers_list = input("Please enter employers name/names: ")
-    if not employers_list:
-        print(
-            "You must enter at least one employer name or type "
-            "CANCEL to cancel operation\n"
-        )
-        add_by_employer_by_name(db_manager, hh_parser)
-    elif employers_list.lower() == "cancel":
-        print("Operation canceled by user")
-        return
-
-    if ',' in employers_list:
-        employers_list = employers_list.split(',')
-    else:
-        employers_list = [employers_list]
+    while True:
+        employers_list = input("Please enter employers name/names: ")
+        if not employers_list:
+            print(
+                "You must enter at least one employer name or type "
+                "CANCEL to cancel operation\n"
+            )
+            continue
+        elif employers_list.lower() == "cancel":
+            print("Operation canceled by user")
+            return
 
-    for employer in employers_list:
-        employers = hh_parser.parse_employers(employer)
-        if len(employers) > 1:
-            employers = select_employer(employers)
-        db_manager.set_employers(employers)
+        add_resolved_employers(
+            db_manager, hh_parser, employers_list.split(',')
+        )
 
-    is_it_more_to_add = input("Do you want to add more employers? (y/n): ")
+        is_it_more_to_add = input(
+            "Do you want to add more employers? (y/n): "
+        )
 
-    if is_it_more_to_add == "y":
-        add_by_employer_by_name(db_manager, hh_parser)
-    elif is_it_more_to_add == "n":
-        print("Operation canceled by user")
-    else:
-        print("Wrong input, Operation canceled")
+        if is_it_more_to_add == "y":
+            continue
+        elif is_it_more_to_add == "n":
+            print("Operation canceled by user")
+        else:
+            print("Wrong input, Operation canceled")
+        return
 
 
 def add_employers_from_file(db_manager, file_handler, hh_parser):
@@ -155,11 +189,7 @@ def add_employers_from_file(db_manager, file_handler, hh_parser):
         employers_list: list = file_handler.get_employers_from_file(
             EMPLOYERS_LIST
         )
-        for employer in employers_list:
-            employers = hh_parser.parse_employers(employer)
-            if len(employers) > 1:
-                employers = select_employer(employers)
-            db_manager.set_employers(employers)
+        add_resolved_employers(db_manager, hh_parser, employers_list or [])
     except Exception:
         traceback.print_exc()
 
@@ -173,19 +203,17 @@ def add_employers(db_manager, file_handler, hh_parser):
         file_handler: Instance of the FileHandler class.
         hh_parser: Instance of the HHParser class.
     """
-    adding_type = employer_adding_type_selector()
+    while True:
+        adding_type = employer_adding_type_selector()
 
-    if adding_type == "0":  # from file
-        add_employers_from_file(db_manager, file_handler, hh_parser)
-        add_vacancies(db_manager, file_handler, hh_parser)
-    elif adding_type == "1":  # by id
-        add_by_employer_by_name(db_manager, hh_parser)
-        add_vacancies(db_manager, file_handler, hh_parser)
-    elif adding_type == "2":  # Continue
-        add_vacancies(db_manager, file_handler, hh_parser)
-    else:
-        print("Wrong input, Please select from listed")
-        add_employers(db_manager, file_handler, hh_parser)
+        if adding_type == "0":  # from file
+            add_employers_from_file(db_manager, file_handler, hh_parser)
+        elif adding_type == "1":  # by id
+            add_by_employer_by_name(db_manager, hh_parser)
+        elif adding_type != "2":  # Continue
+            print("Wrong input, Please select from listed")
+            continue
+        return
 
 
 def delete_one_employer(db_manager, file_handler):
@@ -196,17 +224,21 @@ def delete_one_employer(db_manager, file_handler):
         db_manager: Instance of the DBManager class.
         file_handler: Instance of the FileHandler class.
     """
-    employers_id = input("Please enter employers ID: ")
-    db_manager.delete_employer(employers_id)
-    print(f"Employer with ID {employers_id} successfully deleted.")
-    more_to_delete = input("Do you want to delete more employers? (y/n): ")
-    if more_to_delete == "y":
-        delete_one_employer(db_manager, file_handler)
-    elif more_to_delete == "n":
-        print("Operation canceled by user")
-    else:
-        print("Wrong input, Please select from listed")
-        delete_one_employer(db_manager, file_handler)
+    while True:
+        employers_id = input("Please enter employers ID: ")
+        if db_manager.delete_employer(employers_id):
+            db_manager.refresh_salary_stats()
+            print(f"Employer with ID {employers_id} successfully deleted.")
+        else:
+            print(f"Employer with ID {employers_id} was not deleted.")
+        more_to_delete = input(
+            "Do you want to delete more employers? (y/n): "
+        )
+        if more_to_delete == "n":
+            print("Operation canceled by user")
+            return
+        elif more_to_delete != "y":
+            print("Wrong input, Please select from listed")
 
 
 def delete_all_employers(db_manager, file_handler, hh_parser):
@@ -218,20 +250,25 @@ def delete_all_employers(db_manager, file_handler, hh_parser):
         file_handler: Instance of the FileHandler class.
         hh_parser: Instance of the HHParser class.
     """
-    user_confirmation = input(
-        "Are you sure you want to delete all employers? (y/n): "
-    )
-    if user_confirmation == "y":
-        try:
-            db_manager.delete_employer()
-            print(f"Employers successfully deleted.")
-        except Exception as e:
-            print(e)
-    elif user_confirmation == "n":
-        print("Operation canceled by user")
-    else:
-        print("Wrong input, Please select from listed")
-        delete_all_employers(db_manager, file_handler, hh_parser)
+    while True:
+        user_confirmation = input(
+            "Are you sure you want to delete all employers? (y/n): "
+        )
+        if user_confirmation == "y":
+            try:
+                if db_manager.delete_employer() is None:
+                    print("Employers could not be deleted.")
+                else:
+                    db_manager.refresh_salary_stats()
+                    print("Employers successfully deleted.")
+            except Exception as e:
+                print(e)
+        elif user_confirmation == "n":
+            print("Operation canceled by user")
+        else:
+            print("Wrong input, Please select from listed")
+            continue
+        return
 
 
 def delete_employers(db_manager, file_handler, hh_parser):
@@ -247,48 +284,59 @@ def delete_employers(db_manager, file_handler, hh_parser):
 
     if one_or_all_to_delete == "0":
         delete_one_employer(db_manager, file_handler)
-        add_employers(db_manager, file_handler, hh_parser)
     elif one_or_all_to_delete == "1":
         delete_all_employers(db_manager, file_handler, hh_parser)
-        add_employers(db_manager, file_handler, hh_parser)
 
 
-def get_all_vacancies_from_api(db_manager, hh_parser) -> list:
+def update_vacancies_from_remote(
+        db_manager,
+        file_handler,
+        hh_parser,
+        workers: int = SYNC_WORKERS,
+        incremental: bool = True
+):
     """
-    Retrieve all vacancies from the API.
+    Update vacancies from the remote API.
+
+    Employers are fetched in parallel; employers that fail are reported
+    and skipped without stopping the others. In incremental mode only
+    vacancies published since the previous sync are fetched.
 
     Args:
         db_manager: Instance of the DBManager class.
+        file_handler: Instance of the FileHandler class.
         hh_parser: Instance of the HHParser class.
-
-    Returns:
-        list: List of all vacancies.
+        workers (int, optional): Number of employers fetched in
+        parallel. Defaults to SYNC_WORKERS.
+        incremental (bool, optional): Fetch only new vacancies.
+        Defaults to True.
     """
-    all_vacancies = []
     all_employers = db_manager.get_employers()
-    if all_employers:
-        for employer_id in all_employers:
-            all_vacancies.extend(hh_parser.parse_vacancies(employer_id))
-        return all_vacancies
-    else:
+    if not all_employers:
         print("No employers found")
+        add_employers(db_manager, file_handler, hh_parser)
+        all_employers = db_manager.get_employers()
+        if not all_employers:
+            return
+
+    vacancy_sync = VacancySync(hh_parser, workers, db_manager)
+    result = vacancy_sync.run(all_employers, incremental=incremental)
+    print_sync_result(result)
 
 
-def update_vacancies_from_remote(db_manager, file_handler, hh_parser):
+def print_sync_result(result):
     """
-    Update vacancies from the remote API.
+    Print the outcome of a vacancy update and export its metrics.
 
     Args:
-        db_manager: Instance of the DBManager class.
-        file_handler: Instance of the FileHandler class.
-        hh_parser: Instance of the HHParser class.
+        result: SyncResult of the update.
     """
-    vacancies = get_all_vacancies_from_api(db_manager, hh_parser)
-    if not vacancies:
-        print("No Vacancies found by selected employers")
-        add_employers(db_manager, file_handler, hh_parser)
-
-    db_manager.set_vacancies(vacancies)
+    for employer_id, error in result.errors.items():
+        print(f"Failed to fetch vacancies of employer {employer_id}: "
+              f"{error}")
+    print(f"Vacancies updated. {result}")
+    print(REGISTRY.summary())
+    REGISTRY.write_textfile()
 
 
 def db_data_handling_menu() -> str:
@@ -311,12 +359,12 @@ def db_data_handling_menu() -> str:
     return vacancy_operation
 
 
-def to_be_continued(db_manager):
+def to_be_continued() -> bool:
     """
     Prompt the user to continue or exit from the app.
 
-    Args:
-        db_manager: Instance of the DBManager class.
+    Returns:
+        bool: True if the user wants to continue.
     """
     to_continue = input(
         "Please select option to continue or to exit from app: \n"
@@ -324,20 +372,15 @@ def to_be_continued(db_manager):
         "0. Exit\n"
         ">>> "
     )
-
-    if to_continue == "1":
-        local_vacancies_interaction(db_manager)
-    else:
-        print("Have a nice day! Bye Bye!")
-        exit()
+    return to_continue == "1"
 
 
 def print_vacancies(vacancies):
     """
-    Print a list of vacancies.
+    Print vacancies one by one as they are consumed.
 
     Args:
-        vacancies (list): List of vacancies.
+        vacancies (Iterable): List or stream of vacancies.
     """
     for vacancy in vacancies:
         employer_name, \
@@ -362,12 +405,21 @@ def get_companies_and_vacancies_count(db_manager):
         db_manager: Instance of the DBManager class.
     """
     companies = db_manager.get_companies_and_vacancies_count()
+    print_companies(companies)
+
+
+def print_companies(companies):
+    """
+    Print companies with their open vacancies count.
+
+    Args:
+        companies (Iterable): Rows of company name and vacancies count.
+    """
     for company in companies:
         employer, vacancy_count = company
         print("Company: ", employer)
         print("Open Vacancies: ", vacancy_count)
         print("-" * 40)
-    to_be_continued(db_manager)
 
 
 def get_all_vacancies(db_manager):
@@ -377,9 +429,8 @@ def get_all_vacancies(db_manager):
     Args:
         db_manager: Instance of the DBManager class.
     """
-    vacancies = db_manager.get_all_vacancies()
+    vacancies = db_manager.iter_all_vacancies()
     print_vacancies(vacancies)
-    to_be_continued(db_manager)
 
 
 def get_avg_salary(db_manager):
@@ -391,7 +442,6 @@ def get_avg_salary(db_manager):
     """
     avg_salary = db_manager.get_avg_salary()
     print(avg_salary)
-    to_be_continued(db_manager)
 
 
 def get_vacancies_with_higher_salary(db_manager):
@@ -401,9 +451,8 @@ def get_vacancies_with_higher_salary(db_manager):
     Args:
         db_manager: Instance of the DBManager class.
     """
-    vacancies = db_manager.get_vacancies_with_higher_salary()
+    vacancies = db_manager.iter_vacancies_with_higher_salary()
     print_vacancies(vacancies)
-    to_be_continued(db_manager)
 
 
 def get_vacancies_with_keyword(db_manager):
@@ -416,7 +465,6 @@ def get_vacancies_with_keyword(db_manager):
     keyword = input("Enter a keyword: ")
     vacancies = db_manager.get_vacancies_with_keyword(keyword)
     print_vacancies(vacancies)
-    to_be_continued(db_manager)
 
 
 def local_vacancies_interaction(db_manager):
@@ -426,20 +474,21 @@ def local_vacancies_interaction(db_manager):
     Args:
         db_manager: Instance of the DBManager class.
     """
-    user_selected_operation = db_data_handling_menu()
-    if user_selected_operation == '0':
-        get_companies_and_vacancies_count(db_manager)
-    elif user_selected_operation == '1':
-        get_all_vacancies(db_manager)
-    elif user_selected_operation == '2':
-        get_avg_salary(db_manager)
-    elif user_selected_operation == '3':
-        get_vacancies_with_higher_salary(db_manager)
-    elif user_selected_operation == '4':
-        get_vacancies_with_keyword(db_manager)
-    else:
-        print("Have a nice day! Bye Bye!")
-        exit()
+    operations = {
+        '0': get_companies_and_vacancies_count,
+        '1': get_all_vacancies,
+        '2': get_avg_salary,
+        '3': get_vacancies_with_higher_salary,
+        '4': get_vacancies_with_keyword,
+    }
+    while True:
+        operation = operations.get(db_data_handling_menu())
+        if operation is None:
+            break
+        operation(db_manager)
+        if not to_be_continued():
+            break
+    print("Have a nice day! Bye Bye!")
 
 
 def add_vacancies(db_manager, file_handler, hh_parser):
@@ -451,38 +500,44 @@ def add_vacancies(db_manager, file_handler, hh_parser):
         file_handler: Instance of the FileHandler class.
         hh_parser: Instance of the HHParser class.
     """
-    vacancy_action = vacancy_operation_selector()
+    while True:
+        vacancy_action = vacancy_operation_selector()
 
-    if vacancy_action == "0":
-        update_vacancies_from_remote(db_manager, file_handler, hh_parser)
-        local_vacancies_interaction(db_manager)
-    elif vacancy_action == "1":
-        local_vacancies_interaction(db_manager)
-    else:
-        print("Wrong input, Please select from listed")
-        add_vacancies(db_manager, file_handler, hh_parser)
+        if vacancy_action == "0":
+            update_vacancies_from_remote(db_manager, file_handler, hh_parser)
+        elif vacancy_action != "1":
+            print("Wrong input, Please select from listed")
+            continue
+        return
 
 
 def user_interaction(db_manager, file_handler, hh_parser):
     """
     Perform user interaction and operations.
 
+    The menus are walked in order: employers, vacancy update and then
+    local queries until the user exits.
+
     Args:
         db_manager: Instance of the DBManager class.
         file_handler: Instance of the FileHandler class.
         hh_parser: Instance of the HHParser class.
     """
-    delete_or_add_employers = delete_or_add_employer_selector()
+    while True:
+        delete_or_add_employers = delete_or_add_employer_selector()
 
-    if delete_or_add_employers == "0":  # Delete
-        delete_employers(db_manager, file_handler, hh_parser)
-    elif delete_or_add_employers == "1":  # Add
-        add_employers(db_manager, file_handler, hh_parser)
-    elif delete_or_add_employers == "2":  # Continue
-        add_vacancies(db_manager, file_handler, hh_parser)
-    else:
-        print("Wrong input, Please select from listed")
-        user_interaction(db_manager, file_handler, hh_parser)
+        if delete_or_add_employers == "0":  # Delete
+            delete_employers(db_manager, file_handler, hh_parser)
+            add_employers(db_manager, file_handler, hh_parser)
+        elif delete_or_add_employers == "1":  # Add
+            add_employers(db_manager, file_handler, hh_parser)
+        elif delete_or_add_employers != "2":  # Continue
+            print("Wrong input, Please select from listed")
+            continue
+        break
+
+    add_vacancies(db_manager, file_handler, hh_parser)
+    local_vacancies_interaction(db_manager)
 
 
 def print_header():
@@ -494,20 +549,236 @@ def print_header():
     print("-" * 40)
 
 
-def main():
-    file_handler = FileHandler()
-    db_manager = DBManager()
-    hh_parser = HHParser()
+def setup_metrics(args):
+    """
+    Configure where metrics of the run are exposed.
+
+    Args:
+        args: Parsed command line arguments.
+    """
+    REGISTRY.textfile_path = args.metrics_file
+    if args.metrics_port:
+        REGISTRY.serve(args.metrics_port)
+
+
+def setup_tracing(args):
+    """
+    Enable logging of HTTP calls and SQL statements slower than
+    --trace-slow milliseconds.
 
-    db_manager.create_database()
-    is_exists = db_manager.is_tables_existing()
+    Args:
+        args: Parsed command line arguments.
+    """
+    if args.trace_slow is None:
+        return
+    logging.basicConfig(
+        level=logging.WARNING,
+        format='%(asctime)s %(levelname)s %(name)s: %(message)s'
+    )
+    set_slow_threshold(args.trace_slow)
 
-    if not is_exists:
-        db_manager.create_tables()
 
-    print_header()
+def run_sync(collector, args) -> int:
+    """
+    Run the "sync" command.
 
-    user_interaction(db_manager, file_handler, hh_parser)
+    Args:
+        collector: Instance of the VaCollector class.
+        args: Parsed command line arguments.
+
+    Returns:
+        int: Exit code, 1 if vacancies of some employers failed.
+    """
+    result = collector.sync(incremental=not args.full)
+    if result is None:
+        print("No employers found")
+        return 0
+    print_sync_result(result)
+    return 1 if result.errors else 0
+
+
+def run_daemon(collector, args) -> int:
+    """
+    Run the "daemon" command until SIGINT or SIGTERM.
+
+    Args:
+        collector: Instance of the VaCollector class.
+        args: Parsed command line arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    scheduler = RefreshScheduler(
+        collector.hh_parser,
+        collector.db_manager,
+        requests_per_hour=args.requests_per_hour,
+        min_interval=args.min_interval * 60,
+        max_interval=args.max_interval * 60,
+    )
+    scheduler.install_signal_handlers()
+    print("Scheduler started, press Ctrl+C to stop")
+    scheduler.run_forever()
+    print("Scheduler stopped")
+    return 0
+
+
+def run_replay(collector, args) -> int:
+    """
+    Run the "replay" command.
+
+    Args:
+        collector: Instance of the VaCollector class.
+        args: Parsed command line arguments.
+
+    Returns:
+        int: Exit code, 1 if no archived page matched.
+    """
+    result = collector.replay(
+        args.archive_dir,
+        employer_ids=args.employer,
+        since=args.since,
+        until=args.until,
+        latest=args.latest,
+        processes=args.processes,
+    )
+    print(result)
+    return 0 if result.pages else 1
+
+
+def run_add_employers(collector, args) -> int:
+    """
+    Run the "add-employers" command.
+
+    Args:
+        collector: Instance of the VaCollector class.
+        args: Parsed command line arguments.
+
+    Returns:
+        int: Exit code, 1 if no employer was found.
+    """
+    select = EMPLOYER_SELECTORS[args.select]
+    if args.name:
+        added = collector.add_employers_by_name(args.name, select)
+    else:
+        added = collector.add_employers_from_file(args.file, select)
+    for employer in added:
+        print(employer)
+    print(f"Employers added: {len(added)}")
+    return 0 if added else 1
+
+
+def run_delete_employers(collector, args) -> int:
+    """
+    Run the "delete-employers" command.
+
+    Args:
+        collector: Instance of the VaCollector class.
+        args: Parsed command line arguments.
+
+    Returns:
+        int: Exit code, 1 if the deletion failed or a given employer
+        was not found.
+    """
+    deleted = collector.delete_employers(None if args.all else args.id)
+    if deleted is None:
+        print("Employers could not be deleted.")
+        return 1
+    print(f"Employers deleted: {deleted}")
+    return 0 if args.all or deleted == len(set(args.id)) else 1
+
+
+def run_employers(collector, args) -> int:
+    """
+    Run the "employers" command.
+
+    Args:
+        collector: Instance of the VaCollector class.
+        args: Parsed command line arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    for employer_id in collector.employers():
+        print(employer_id)
+    return 0
+
+
+def run_query(collector, args) -> int:
+    """
+    Run the "query" command.
+
+    Args:
+        collector: Instance of the VaCollector class.
+        args: Parsed command line arguments.
+
+    Returns:
+        int: Exit code, 2 if the query needs a text and none is given.
+    """
+    if args.query in ('keyword', 'search') and not args.text:
+        print(f'Query "{args.query}" needs a search text')
+        return 2
+
+    if args.query == 'companies':
+        print_companies(collector.companies_and_vacancies_count())
+    elif args.query == 'vacancies':
+        print_vacancies(collector.vacancies())
+    elif args.query == 'avg-salary':
+        print(collector.avg_salary())
+    elif args.query == 'higher-salary':
+        print_vacancies(collector.vacancies_with_higher_salary())
+    elif args.query == 'keyword':
+        print_vacancies(
+            collector.vacancies_with_keyword(args.text, args.limit)
+        )
+    elif args.query == 'search':
+        print_vacancies(collector.search(
+            args.text, args.limit or SEARCH_LIMIT, args.mode
+        ))
+    return 0
+
+
+COMMANDS = {
+    'sync': run_sync,
+    'daemon': run_daemon,
+    'replay': run_replay,
+    'add-employers': run_add_employers,
+    'delete-employers': run_delete_employers,
+    'employers': run_employers,
+    'query': run_query,
+}
+
+
+def main(args) -> int:
+    """
+    Run a command given on the command line, or the interactive menus
+    without one.
+
+    Args:
+        args: Parsed command line arguments.
+
+    Returns:
+        int: Exit code.
+    """
+    collector = VaCollector(
+        http_cache_dir=None if args.no_http_cache else args.http_cache_dir,
+        archive_dir=args.archive
+    )
+    collector.setup()
+
+    try:
+        with profiled(args.profile):
+            if args.command:
+                return COMMANDS[args.command](collector, args)
+
+            print_header()
+            user_interaction(
+                collector.db_manager,
+                collector.file_handler,
+                collector.hh_parser
+            )
+            return 0
+    finally:
+        collector.close()
 
 
 def arg_parser():
@@ -518,6 +789,195 @@ def arg_parser():
         const=True,
         help='App Description'
     )
+    parser.add_argument(
+        '--metrics-file',
+        help='Write metrics in the Prometheus text format to this file '
+             'after every vacancy update'
+    )
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        help='Serve metrics in the Prometheus text format on this port'
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='vacolector.prof',
+        metavar='PATH',
+        help='Profile the run, dump pstats to PATH (vacolector.prof by '
+             'default) and print the top functions by cumulative time'
+    )
+    parser.add_argument(
+        '--trace-slow',
+        type=float,
+        metavar='MS',
+        help='Log HTTP calls and SQL statements slower than MS '
+             'milliseconds with their parameters'
+    )
+
+    parser.add_argument(
+        '--http-cache-dir',
+        default=HTTP_CACHE_DIR,
+        metavar='PATH',
+        help=f'Directory of the HH API response cache ({HTTP_CACHE_DIR} '
+             f'by default)'
+    )
+    parser.add_argument(
+        '--no-http-cache',
+        action='store_true',
+        help='Download every HH API response again'
+    )
+
+    parser.add_argument(
+        '--archive',
+        nargs='?',
+        const=ARCHIVE_DIR,
+        metavar='PATH',
+        help=f'Archive every fetched vacancy page to PATH ({ARCHIVE_DIR} '
+             f'by default) for the replay command'
+    )
+
+    commands = parser.add_subparsers(
+        dest='command',
+        metavar='COMMAND',
+        help='Run without the interactive menus'
+    )
+
+    sync_parser = commands.add_parser(
+        'sync', help='Update vacancies of all subscribed employers'
+    )
+    sync_parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Refetch all vacancies instead of new ones only'
+    )
+
+    daemon_parser = commands.add_parser(
+        'daemon',
+        help='Keep vacancies fresh, refreshing busy employers more often'
+    )
+    daemon_parser.add_argument(
+        '--requests-per-hour',
+        type=float,
+        default=SCHEDULER_REQUESTS_PER_HOUR,
+        help='Budget of HH API requests '
+             f'(default: {SCHEDULER_REQUESTS_PER_HOUR})'
+    )
+    daemon_parser.add_argument(
+        '--min-interval',
+        type=float,
+        default=SCHEDULER_MIN_INTERVAL_SECONDS / 60,
+        metavar='MINUTES',
+        help='Shortest interval between refreshes of an employer'
+    )
+    daemon_parser.add_argument(
+        '--max-interval',
+        type=float,
+        default=SCHEDULER_MAX_INTERVAL_SECONDS / 60,
+        metavar='MINUTES',
+        help='Longest interval between refreshes of an employer'
+    )
+
+    replay_parser = commands.add_parser(
+        'replay',
+        help='Store vacancies of archived pages again without fetching '
+             'them'
+    )
+    replay_parser.add_argument(
+        '--archive-dir',
+        default=ARCHIVE_DIR,
+        metavar='PATH',
+        help=f'Archive directory ({ARCHIVE_DIR} by default)'
+    )
+    replay_parser.add_argument(
+        '--employer', type=int, nargs='+', help='Employer IDs'
+    )
+    replay_parser.add_argument(
+        '--since',
+        type=datetime.fromisoformat,
+        metavar='DATETIME',
+        help='Only pages fetched at or after this ISO date and time'
+    )
+    replay_parser.add_argument(
+        '--until',
+        type=datetime.fromisoformat,
+        metavar='DATETIME',
+        help='Only pages fetched before this ISO date and time'
+    )
+    replay_parser.add_argument(
+        '--latest',
+        action='store_true',
+        help='Per employer, only pages since its last full sync'
+    )
+    replay_parser.add_argument(
+        '--processes',
+        type=int,
+        default=REPLAY_PROCESSES,
+        help='Parser processes (default: number of CPUs)'
+    )
+
+    add_parser = commands.add_parser(
+        'add-employers', help='Subscribe to employers found by name'
+    )
+    source = add_parser.add_mutually_exclusive_group()
+    source.add_argument(
+        '--file',
+        default=EMPLOYERS_LIST,
+        help='Comma separated employer names (employer.txt by default)'
+    )
+    source.add_argument(
+        '--name',
+        nargs='+',
+        help='Employer names'
+    )
+    add_parser.add_argument(
+        '--select',
+        choices=sorted(EMPLOYER_SELECTORS),
+        default='first',
+        help='Employers to add when several match a name: the most '
+             'relevant one, all of them or the ones with exactly this '
+             'name (default: first)'
+    )
+
+    delete_parser = commands.add_parser(
+        'delete-employers',
+        help='Delete employers together with their vacancies, exits with '
+             '1 if an employer was not found'
+    )
+    target = delete_parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--id', type=int, nargs='+', help='Employer IDs')
+    target.add_argument('--all', action='store_true', help='All employers')
+
+    commands.add_parser('employers', help='List subscribed employer IDs')
+
+    query_parser = commands.add_parser(
+        'query', help='Query the stored vacancies'
+    )
+    query_parser.add_argument(
+        'query',
+        choices=(
+            'companies',
+            'vacancies',
+            'avg-salary',
+            'higher-salary',
+            'keyword',
+            'search',
+        )
+    )
+    query_parser.add_argument(
+        'text', nargs='?', help='Keyword or search query'
+    )
+    query_parser.add_argument(
+        '--limit', type=int,
+        help='Maximum number of vacancies (default: all for keyword, '
+             f'{SEARCH_LIMIT} for search)'
+    )
+    query_parser.add_argument(
+        '--mode',
+        choices=(SEARCH_MODE_FTS, SEARCH_MODE_TRIGRAM),
+        default=SEARCH_MODE_FTS,
+        help='Full text or trigram search (default: fts)'
+    )
 
     args = parser.parse_args()
     if args.desc:
@@ -532,8 +992,11 @@ def arg_parser():
     """
             )
         exit()
+    return args
 
 
 if __name__ == '__main__':
-    arg_parser()
-    main()
+    arguments = arg_parser()
+    setup_metrics(arguments)
+    setup_tracing(arguments)
+    sys.exit(main(arguments))
@@ -0,0 +1,357 @@
+""" Counters and latency histograms for sync runs. """
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels_key(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    labels = labels + extra
+    if not labels:
+        return ''
+    escaped = (
+        (key, value.replace('\\', '\\\\').replace('"', '\\"'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+
+class Counter:
+    """
+    Monotonically increasing value, optionally split by labels.
+    """
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1, **labels) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            value (float, optional): Increment. Defaults to 1.
+            **labels: Label values of the series.
+        """
+        key = _labels_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def total(self) -> float:
+        """
+        Return the sum over all label combinations.
+
+        Returns:
+            float: Total value.
+        """
+        with self._lock:
+            return sum(self._values.values())
+
+    def render(self) -> str:
+        with self._lock:
+            return ''.join(
+                f'{self.name}{_format_labels(labels)} {value}\n'
+                for labels, value in sorted(self._values.items())
+            )
+
+    def summary(self) -> str:
+        return f'{self.name}: {self.total():g}'
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets, optionally
+    split by labels.
+    """
+
+    type_name = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value (float): Observed value, e.g. seconds.
+            **labels: Label values of the series.
+        """
+        key = _labels_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [
+                    [0] * (len(self.buckets) + 1), 0, 0.0
+                ]
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def totals(self) -> Tuple[int, float]:
+        """
+        Return the number and the sum of observations over all label
+        combinations.
+
+        Returns:
+            Tuple[int, float]: Count and sum.
+        """
+        with self._lock:
+            return (
+                sum(series[1] for series in self._series.values()),
+                sum(series[2] for series in self._series.values()),
+            )
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for labels, (counts, count, total) in sorted(
+                    self._series.items()
+            ):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(
+                        f'{self.name}_bucket'
+                        f'{_format_labels(labels, (("le", f"{bound:g}"),))}'
+                        f' {cumulative}\n'
+                    )
+                lines.append(
+                    f'{self.name}_bucket'
+                    f'{_format_labels(labels, (("le", "+Inf"),))} {count}\n'
+                )
+                lines.append(
+                    f'{self.name}_count{_format_labels(labels)} {count}\n'
+                )
+                lines.append(
+                    f'{self.name}_sum{_format_labels(labels)} {total}\n'
+                )
+        return ''.join(lines)
+
+    def summary(self) -> str:
+        count, total = self.totals()
+        mean = total / count if count else 0.0
+        return f'{self.name}: {count} observations, ' \
+               f'total {total:.3f}, mean {mean:.4f}'
+
+
+class Gauge:
+    """
+    Value read from a callback when metrics are rendered.
+    """
+
+    type_name = 'gauge'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            callback: Callable[[], Optional[float]]
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+
+    def render(self) -> str:
+        value = self.callback()
+        return f'{self.name} {value}\n' if value is not None else ''
+
+    def summary(self) -> str:
+        value = self.callback()
+        return f'{self.name}: {value:g}' if value is not None else ''
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self.textfile_path: Optional[str] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        """
+        Return the counter with the given name, creating it if needed.
+        """
+        return self._register(Counter(name, documentation))
+
+    def histogram(
+            self,
+            name: str,
+            documentation: str,
+            buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """
+        Return the histogram with the given name, creating it if
+        needed.
+        """
+        return self._register(Histogram(name, documentation, buckets))
+
+    def gauge(
+            self,
+            name: str,
+            documentation: str,
+            callback: Callable[[], Optional[float]]
+    ) -> Gauge:
+        """
+        Register a gauge whose value is read from a callback,
+        replacing an earlier gauge with the same name.
+        """
+        gauge = Gauge(name, documentation, callback)
+        with self._lock:
+            self._metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return ''.join(
+            f'# HELP {metric.name} {metric.documentation}\n'
+            f'# TYPE {metric.name} {metric.type_name}\n'
+            f'{metric.render()}'
+            for metric in metrics
+        )
+
+    def summary(self) -> str:
+        """
+        Return a human-readable summary with one line per metric.
+
+        Returns:
+            str: Summary text.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(
+            line for line in (metric.summary() for metric in metrics) if line
+        )
+
+    def write_textfile(self, path: Optional[str] = None) -> None:
+        """
+        Write the metrics to a file, e.g. for the node_exporter
+        textfile collector. The file is replaced atomically.
+
+        Args:
+            path (str, optional): Target file. Defaults to
+            ``textfile_path``; nothing is written if both are empty.
+        """
+        path = path or self.textfile_path
+        if not path:
+            return
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'w') as f:
+            f.write(self.render())
+        os.replace(temporary_path, path)
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> None:
+        """
+        Serve the metrics over HTTP from a background thread.
+
+        Args:
+            port (int): Port to listen on.
+            host (str, optional): Address to listen on.
+            Defaults to "127.0.0.1".
+        """
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                payload = registry.render().encode()
+                self.send_response(200)
+                self.send_header(
+                    'Content-Type', 'text/plain; version=0.0.4'
+                )
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        ).start()
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'hh_requests_total', 'HTTP requests to the HH API by status code.'
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'hh_request_seconds', 'HTTP request latency including retries.'
+)
+HTTP_RESPONSE_BYTES = REGISTRY.counter(
+    'hh_response_bytes_total', 'Bytes received from the HH API.'
+)
+JSON_DECODE_SECONDS = REGISTRY.histogram(
+    'hh_json_decode_seconds', 'Time spent decoding HH API responses.'
+)
+PAGES = REGISTRY.counter(
+    'hh_pages_total', 'Result pages received from the HH API.'
+)
+PARSED_ITEMS = REGISTRY.counter(
+    'hh_parsed_items_total', 'Items turned into Vacancy objects.'
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    'hh_parse_page_seconds', 'Time spent building objects of one page.'
+)
+DB_CALL_SECONDS = REGISTRY.histogram(
+    'db_call_seconds', 'Duration of DBManager calls by method.'
+)
+DB_STATEMENTS = REGISTRY.counter(
+    'db_statements_total', 'SQL statements executed by kind.'
+)
+DB_STATEMENT_SECONDS = REGISTRY.histogram(
+    'db_statement_seconds', 'SQL statement duration.'
+)
+DB_ROWS = REGISTRY.counter(
+    'db_rows_total', 'Rows affected or returned by SQL statements.'
+)
+HTTP_CACHE_REQUESTS = REGISTRY.counter(
+    'hh_cache_requests_total',
+    'HH API requests answered by the response cache by result '
+    '(hit, not_modified, miss).'
+)
+HTTP_CACHE_EVICTIONS = REGISTRY.counter(
+    'hh_cache_evictions_total', 'Responses evicted from the disk cache.'
+)
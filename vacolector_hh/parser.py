@@ -1,8 +1,25 @@
 """Abstract base class for parsers modules."""
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
 
-import requests
+from vacolector_hh.constants import (
+    BACKOFF_FACTOR,
+    MAX_RETRIES,
+    THROTTLE_STATUSES,
+)
+from vacolector_hh.http_cache import ResponseCache
+from vacolector_hh.http_session import HTTPSession
+from vacolector_hh.json_codec import loads
+from vacolector_hh.metrics import (
+    HTTP_REQUEST_SECONDS,
+    HTTP_REQUESTS,
+    HTTP_RESPONSE_BYTES,
+    JSON_DECODE_SECONDS,
+)
+from vacolector_hh.profiling import trace_if_slow
+from vacolector_hh.rate_limiter import AdaptiveConcurrencyLimiter, TokenBucket
 
 
 class Parser(ABC):
@@ -38,14 +55,39 @@ class Parser(ABC):
 class RequestMixin:
     """
     Mixin class for making HTTP requests.
+
+    Classes using the mixin are expected to set ``http_session`` to a
+    shared HTTPSession, so that connections are reused between
+    requests. Optional ``token_bucket`` and ``concurrency_limiter``
+    throttle the request rate and the number of requests in flight,
+    and an optional ``response_cache`` avoids downloading unchanged
+    responses again.
     """
 
-    @staticmethod
+    http_session: HTTPSession = None
+    token_bucket: Optional[TokenBucket] = None
+    concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+    response_cache: Optional[ResponseCache] = None
+
     def make_request(
-            url: str, parameters: Dict[str, Any], headers: Dict[str, str]
+            self,
+            url: str,
+            parameters: Dict[str, Any],
+            headers: Dict[str, str]
     ) -> Dict[str, Any]:
         """
-        Makes an HTTP GET request and returns the response as JSON.
+        Makes an HTTP GET request and returns the response as JSON,
+        decoded with the fastest installed JSON library, see
+        json_codec.loads().
+
+        Responses with a throttling status (429/503) are retried up to
+        MAX_RETRIES times after the delay given in Retry-After, or an
+        exponential backoff without it.
+
+        With a ``response_cache`` set, fresh cached responses are
+        returned without a request and stale ones are revalidated
+        with a conditional request; a 304 Not Modified answer returns
+        the cached data without decoding it again.
 
         Args:
             url (str): The URL to make the request to.
@@ -54,9 +96,116 @@ class RequestMixin:
 
         Returns:
             Dict[str, Any]: The JSON response.
+
+        Raises:
+            requests.HTTPError: If the response status is still an
+            error after all retries.
+        """
+        if self.http_session is None:
+            self.http_session = HTTPSession()
+
+        cache = self.response_cache
+        entry = cache.get(url, parameters) if cache is not None else None
+        if entry is not None and entry.is_fresh():
+            cache.record('hit')
+            cache.touch(entry)
+            return entry.data
+
+        if entry is not None:
+            response = self._get_with_retries(
+                url, parameters, dict(headers, **entry.validators())
+            )
+            if response.status_code == 304:
+                cache.record('not_modified')
+                return cache.refresh(entry, response.headers).data
+        else:
+            response = self._get_with_retries(url, parameters, headers)
+        HTTP_RESPONSE_BYTES.inc(len(response.content))
+
+        response.raise_for_status()
+        started = time.perf_counter()
+        data = loads(response.content)
+        JSON_DECODE_SECONDS.observe(time.perf_counter() - started)
+        if cache is not None:
+            cache.record('miss')
+            cache.store(
+                url, parameters, response.headers, response.content, data
+            )
+        return data
+
+    def _get_with_retries(
+            self,
+            url: str,
+            parameters: Dict[str, Any],
+            headers: Dict[str, str]
+    ):
+        """
+        Sends a request, retrying throttled responses, and records its
+        latency.
+
+        Every retry waits for Retry-After or the exponential backoff.
+        The adaptive limiter may pause all requests for longer, in which
+        case its acquire() holds the retry until that pause ends too.
+        """
+        started = time.perf_counter()
+        for attempt in range(MAX_RETRIES + 1):
+            response = self._throttled_get(url, parameters, headers)
+            HTTP_REQUESTS.inc(status=response.status_code)
+            if response.status_code not in THROTTLE_STATUSES \
+                    or attempt == MAX_RETRIES:
+                break
+            time.sleep(
+                self.retry_after(response) or BACKOFF_FACTOR * 2 ** attempt
+            )
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started)
+        trace_if_slow('HTTP', started, url, parameters)
+        return response
+
+    def _throttled_get(
+            self,
+            url: str,
+            parameters: Dict[str, Any],
+            headers: Dict[str, str]
+    ):
+        """
+        Sends one request once the rate limiters allow it and reports
+        the outcome back to the adaptive limiter.
+        """
+        if self.token_bucket is not None:
+            self.token_bucket.acquire()
+        if self.concurrency_limiter is None:
+            return self.http_session.get(url, parameters, headers)
+
+        self.concurrency_limiter.acquire()
+        throttled = None
+        retry_after = None
+        try:
+            response = self.http_session.get(url, parameters, headers)
+            throttled = response.status_code in THROTTLE_STATUSES
+            retry_after = self.retry_after(response) if throttled else None
+            return response
+        finally:
+            self.concurrency_limiter.release(throttled, retry_after)
+
+    @staticmethod
+    def retry_after(response) -> Optional[float]:
+        """
+        Reads the Retry-After header of a response.
+
+        Args:
+            response (requests.Response): The response.
+
+        Returns:
+            Optional[float]: Seconds to wait or None if the header is
+            missing or malformed.
         """
-        return requests.get(
-            url,
-            params=parameters,
-            headers=headers
-        ).json()
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        if value.isdigit():
+            return float(value)
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, retry_at.timestamp() - time.time())
@@ -1,8 +1,30 @@
 """ Parser implementation for the HH.ru website. """
-from typing import List
+import logging
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from vacolector_hh.data_classes import Employer, Vacancy
+from vacolector_hh.archive import ResponseArchive
+from vacolector_hh.constants import (
+    FETCH_CONCURRENCY,
+    HH_DATE_FORMAT,
+    HH_MAX_RESULTS,
+    MAX_FETCH_CONCURRENCY,
+    MIN_SHARD_SECONDS,
+    REQUESTS_PER_SECOND,
+    SHARD_WINDOW_DAYS,
+)
+from vacolector_hh.data_classes import Employer, Vacancy, intern_value
+from vacolector_hh.http_cache import ResponseCache
+from vacolector_hh.http_session import HTTPSession
+from vacolector_hh.metrics import PAGES, PARSE_SECONDS, PARSED_ITEMS
 from vacolector_hh.parser import Parser, RequestMixin
+from vacolector_hh.rate_limiter import AdaptiveConcurrencyLimiter, TokenBucket
+from vacolector_hh.vacancy_batch import VacancyBatch
+
+logger = logging.getLogger(__name__)
 
 
 class HHParser(Parser, RequestMixin):
@@ -10,8 +32,54 @@ class HHParser(Parser, RequestMixin):
     Parser implementation for the HH.ru website.
     """
 
-    def __init__(self):
+    def __init__(
+            self,
+            concurrency: int = FETCH_CONCURRENCY,
+            max_concurrency: int = MAX_FETCH_CONCURRENCY,
+            pool_size: Optional[int] = None,
+            token_bucket: Optional[TokenBucket] = None,
+            concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+            response_cache: Optional[ResponseCache] = None,
+            archive: Optional[ResponseArchive] = None
+    ):
+        """
+        Args:
+            concurrency (int, optional): Pages requested in parallel
+            per search. Defaults to FETCH_CONCURRENCY.
+            max_concurrency (int, optional): Upper bound of requests in
+            flight that the adaptive limiter may grow to while the API
+            does not throttle. Defaults to MAX_FETCH_CONCURRENCY.
+            pool_size (int, optional): Size of the HTTP connection
+            pool. Defaults to ``max_concurrency``.
+            token_bucket (TokenBucket, optional): Request rate limiter,
+            pass the same instance to share it between parsers.
+            Defaults to REQUESTS_PER_SECOND.
+            concurrency_limiter (AdaptiveConcurrencyLimiter, optional):
+            Adaptive limit of requests in flight, pass the same
+            instance to share it between parsers. Defaults to a
+            limiter growing from ``concurrency``, or half of
+            ``max_concurrency`` if that is lower, up to
+            ``max_concurrency``.
+            response_cache (ResponseCache, optional): Cache of API
+            responses, pass the same instance to share it between
+            parsers. Defaults to None, no caching.
+            archive (ResponseArchive, optional): Archive receiving
+            every vacancy page fetched. Defaults to None.
+        """
         super().__init__()
+        self.concurrency: int = max(1, concurrency)
+        max_concurrency = max(1, max_concurrency)
+        self.http_session: HTTPSession = HTTPSession(
+            pool_size=pool_size or max_concurrency
+        )
+        self.token_bucket = token_bucket or TokenBucket(REQUESTS_PER_SECOND)
+        self.concurrency_limiter = concurrency_limiter or \
+            AdaptiveConcurrencyLimiter(
+                initial=min(self.concurrency, max(1, max_concurrency // 2)),
+                maximum=max_concurrency
+            )
+        self.response_cache = response_cache
+        self.archive = archive
         self.per_page: int = 100
         self.vacancy_url: str = 'https://api.hh.ru/vacancies'
         self.employer_url: str = 'https://api.hh.ru/employers'
@@ -26,7 +94,10 @@ class HHParser(Parser, RequestMixin):
         }
 
     def parse_vacancies(
-            self, employer_id: int, count: int = None
+            self,
+            employer_id: int,
+            count: int = None,
+            date_from: Optional[datetime] = None
     ) -> List[Vacancy]:
         """
         Parses vacancies from the HH.ru website based on the given
@@ -37,13 +108,81 @@ class HHParser(Parser, RequestMixin):
             vacancies for.
             count (int, optional): The number of vacancies to retrieve.
             Defaults to None.
+            date_from (datetime, optional): Only retrieve vacancies
+            published at or after this moment. Defaults to None.
 
         Returns:
             List[Vacancy]: The parsed vacancies.
         """
+        vacancies_list = []
+        for vacancies in self.iter_vacancy_pages(
+                employer_id, count, date_from
+        ):
+            vacancies_list.extend(vacancies)
+        return vacancies_list
+
+    def iter_vacancy_pages(
+            self,
+            employer_id: int,
+            count: int = None,
+            date_from: Optional[datetime] = None
+    ) -> Iterator[List[Vacancy]]:
+        """
+        Parses vacancies of an employer page by page, so callers can
+        process each page while the next ones are still being fetched.
+
+        Args:
+            employer_id (int): The ID of the employer to retrieve
+            vacancies for.
+            count (int, optional): The number of vacancies to retrieve.
+            Defaults to None.
+            date_from (datetime, optional): Only retrieve vacancies
+            published at or after this moment. Defaults to None.
+
+        Yields:
+            List[Vacancy]: The parsed vacancies of one page.
+        """
+        for _, vacancies in self.iter_numbered_vacancy_pages(
+                employer_id, count, date_from
+        ):
+            yield vacancies
+
+    def iter_numbered_vacancy_pages(
+            self,
+            employer_id: int,
+            count: int = None,
+            date_from: Optional[datetime] = None,
+            start_page: int = 0
+    ) -> Iterator[Tuple[int, List[Vacancy]]]:
+        """
+        Parses vacancies of an employer page by page together with the
+        number of every page, so an interrupted sync can continue after
+        the last page it stored.
+
+        Pages before ``start_page`` are skipped. A search exceeding
+        HH_MAX_RESULTS is split into shards that cannot be resumed by
+        page number, so it is always yielded from page 0.
+
+        With an ``archive`` set, every page is archived as yielded.
+
+        Args:
+            employer_id (int): The ID of the employer to retrieve
+            vacancies for.
+            count (int, optional): The number of vacancies to retrieve.
+            Defaults to None.
+            date_from (datetime, optional): Only retrieve vacancies
+            published at or after this moment. Defaults to None.
+            start_page (int, optional): First page to yield.
+            Defaults to 0.
+
+        Yields:
+            Tuple[int, List[Vacancy]]: The page number and the parsed
+            vacancies of the page.
+        """
         parameters = self.parameters.copy()
         parameters['employer_id'] = employer_id or ''
-        vacancies_list = []
+        if date_from is not None:
+            parameters['date_from'] = date_from.strftime(HH_DATE_FORMAT)
 
         if count is not None:
             pages = (
@@ -52,34 +191,114 @@ class HHParser(Parser, RequestMixin):
         else:
             pages = 1
 
-        vacancies = self.request_all_pages(pages, parameters, self.vacancy_url)
-
-        for vacancy in vacancies:
-            salary_from = vacancy['salary'].get('from', 0) if vacancy[
-                'salary'] else 0
-            salary_to = vacancy['salary'].get('to', 0) if vacancy[
-                'salary'] else 0
-            currency = vacancy['salary'].get('currency', '') if vacancy[
-                'salary'] else ''
-
-            vacancies_list.append(
-                Vacancy(
-                    id=vacancy['id'],
-                    name=vacancy['name'],
-                    salary_from=salary_from,
-                    salary_to=salary_to,
-                    currency=currency,
-                    alternate_url=vacancy['alternate_url'],
-                    published_at=vacancy['published_at'],
-                    requirement=vacancy['snippet'].get('requirement', ''),
-                    responsibility=vacancy['snippet'].get(
-                        'responsibility', ''
-                    ),
-                    employer_id=vacancy['employer']['id'],
+        for response in self.iter_sharded_pages(
+                pages, parameters, self.vacancy_url, start_page
+        ):
+            if self.archive is not None:
+                self.archive.append(
+                    employer_id, response, full=date_from is None
                 )
-            )
+            if self.response_cache is None:
+                vacancies = self.build_vacancies(response)
+            else:
+                vacancies = self.response_cache.derived(
+                    response, 'vacancies', self.build_vacancies
+                )
+            yield response['page'], vacancies
 
-        return vacancies_list
+    def build_vacancies(self, response: dict) -> List[Vacancy]:
+        """
+        Builds the Vacancy objects of a vacancies response page.
+
+        Args:
+            response (dict): Vacancies response.
+
+        Returns:
+            List[Vacancy]: The parsed vacancies.
+        """
+        started = time.perf_counter()
+        vacancies = [self.build_vacancy(item) for item in response['items']]
+        PARSE_SECONDS.observe(time.perf_counter() - started)
+        PARSED_ITEMS.inc(len(vacancies))
+        return vacancies
+
+    @staticmethod
+    def build_vacancy(vacancy: dict) -> Vacancy:
+        """
+        Builds a Vacancy from an item of the HH.ru vacancies response.
+
+        Args:
+            vacancy (dict): Vacancy item.
+
+        Returns:
+            Vacancy: The parsed vacancy.
+        """
+        salary = vacancy['salary'] or {}
+        snippet = vacancy['snippet']
+
+        return Vacancy(
+            id=vacancy['id'],
+            name=vacancy['name'],
+            salary_from=salary.get('from', 0),
+            salary_to=salary.get('to', 0),
+            currency=intern_value(salary.get('currency', '')),
+            alternate_url=vacancy['alternate_url'],
+            published_at=vacancy['published_at'],
+            requirement=snippet.get('requirement', ''),
+            responsibility=snippet.get('responsibility', ''),
+            employer_id=intern_value(vacancy['employer']['id']),
+        )
+
+    @staticmethod
+    def build_vacancy_batch(items: Iterable[dict]) -> VacancyBatch:
+        """
+        Builds a VacancyBatch from items of the HH.ru vacancies
+        response, without a Vacancy object per item.
+
+        Args:
+            items (Iterable[dict]): Vacancy items.
+
+        Returns:
+            VacancyBatch: The parsed vacancies.
+        """
+        batch = VacancyBatch()
+        for vacancy in items:
+            salary = vacancy['salary'] or {}
+            snippet = vacancy['snippet']
+            batch.append_row((
+                vacancy['id'],
+                vacancy['name'],
+                salary.get('from', 0),
+                salary.get('to', 0),
+                salary.get('currency', ''),
+                vacancy['published_at'],
+                vacancy['alternate_url'],
+                vacancy['employer']['id'],
+                snippet.get('requirement', ''),
+                snippet.get('responsibility', ''),
+            ))
+        return batch
+
+    def parse_employer(self, employer_id: int) -> Employer:
+        """
+        Fetches one employer, e.g. to read its current number of open
+        vacancies.
+
+        Args:
+            employer_id (int): The employer ID.
+
+        Returns:
+            Employer: The employer.
+        """
+        employer = self.make_request(
+            f'{self.employer_url}/{employer_id}', {}, self.headers
+        )
+        return Employer(
+            id=int(employer['id']),
+            name=employer['name'],
+            alternate_url=employer['alternate_url'],
+            open_vacancies=int(employer['open_vacancies']),
+        )
 
     def parse_employers(self, employers_name: str) -> List[Employer]:
         """
@@ -127,14 +346,261 @@ class HHParser(Parser, RequestMixin):
         Returns:
             List[dict]: The combined data from all pages.
         """
-        page = 0
         result = []
-
-        while page < pages:
-            parameters['page'] = page
-            response = self.make_request(url, parameters, self.headers)
-            page += 1
-            pages = response['pages']
+        for response in self.iter_pages(pages, parameters, url):
             result.extend(response['items'])
-
         return result
+
+    def iter_sharded_pages(
+            self,
+            pages: int,
+            parameters: dict,
+            url: str,
+            start_page: int = 0
+    ) -> Iterator[dict]:
+        """
+        Requests all pages of a search that may exceed the HH API
+        result cap and yields the responses.
+
+        When the first page reports more than HH_MAX_RESULTS results,
+        the search is split into disjoint published_at ranges small
+        enough to be fully paginated, see plan_shards(). The pages of
+        all shards are fetched through one pool of ``self.concurrency``
+        requests and yielded shard by shard as they arrive, and items
+        seen in an earlier shard are dropped, so every vacancy is
+        yielded once. Their responses are renumbered consecutively in
+        "page" and ``start_page`` does not apply to them.
+
+        Args:
+            pages (int): The number of pages to request.
+            parameters (dict): The parameters to include in the request.
+            url (str): The URL to make the request to.
+            start_page (int, optional): First page to yield when the
+            search is not sharded. Defaults to 0.
+
+        Yields:
+            dict: The JSON response of each page.
+        """
+        if pages < 1:
+            return
+
+        first_page = self._request_page(url, parameters, 0)
+        if first_page['found'] <= HH_MAX_RESULTS:
+            yield from self.iter_pages(
+                pages, parameters, url, first_page, start_page
+            )
+            return
+
+        shards = self.plan_shards(parameters, url)
+        found = sum(shard_page['found'] for _, shard_page in shards)
+        if found < first_page['found']:
+            logger.warning(
+                'Sharded search covers %d of %d results for %r',
+                found, first_page['found'], parameters
+            )
+
+        reachable_pages = HH_MAX_RESULTS // parameters.get(
+            'per_page', self.per_page
+        )
+
+        def fetch(task: Tuple[dict, int, dict]) -> dict:
+            shard, page, shard_first_page = task
+            if page == 0:
+                return shard_first_page
+            return self._request_page(url, shard, page)
+
+        seen_ids = set()
+        page_number = 0
+        for response in self._ordered_map(fetch, (
+                (shard, page, shard_first_page)
+                for shard, shard_first_page in shards
+                for page in range(max(1, min(
+                    shard_first_page['pages'], reachable_pages
+                )))
+        )):
+            items = [
+                item for item in response['items']
+                if item['id'] not in seen_ids
+            ]
+            seen_ids.update(item['id'] for item in items)
+            yield dict(response, items=items, page=page_number)
+            page_number += 1
+
+    def plan_shards(
+            self, parameters: dict, url: str
+    ) -> List[Tuple[dict, dict]]:
+        """
+        Splits a search into disjoint published_at ranges that each
+        fit into HH_MAX_RESULTS results.
+
+        The range starts at the search's own date_from, or
+        SHARD_WINDOW_DAYS ago, and ends now. It is halved recursively
+        until every part fits. Adjacent parts are one second apart, so
+        no vacancy falls into two parts. A range shorter than
+        MIN_SHARD_SECONDS is not split any further and is truncated by
+        the API. Without a date_from of the search, vacancies published
+        before the window form one more shard, which is truncated the
+        same way if it holds too many results.
+
+        Args:
+            parameters (dict): The parameters of the search.
+            url (str): The URL to make the request to.
+
+        Returns:
+            List[Tuple[dict, dict]]: Parameters of every shard with the
+            response to its first page, oldest range first.
+        """
+        date_to = datetime.now(timezone.utc).replace(microsecond=0)
+        if parameters.get('date_from'):
+            date_from = datetime.strptime(
+                parameters['date_from'], HH_DATE_FORMAT
+            )
+            return self._split_shard(parameters, url, date_from, date_to)
+
+        date_from = date_to - timedelta(days=SHARD_WINDOW_DAYS)
+        older = dict(
+            parameters,
+            date_to=(date_from - timedelta(seconds=1)).strftime(
+                HH_DATE_FORMAT
+            ),
+        )
+        first_page = self._request_page(url, older, 0)
+        if first_page['found'] > HH_MAX_RESULTS:
+            logger.warning(
+                '%d results published before %s, only %d can be fetched',
+                first_page['found'], older['date_to'], HH_MAX_RESULTS
+            )
+        shards = [(older, first_page)] if first_page['found'] else []
+        return shards + self._split_shard(
+            parameters, url, date_from, date_to
+        )
+
+    def _split_shard(
+            self,
+            parameters: dict,
+            url: str,
+            date_from: datetime,
+            date_to: datetime
+    ) -> List[Tuple[dict, dict]]:
+        """
+        Probes a published_at range and halves it while it holds more
+        results than the API returns.
+        """
+        shard = dict(
+            parameters,
+            date_from=date_from.strftime(HH_DATE_FORMAT),
+            date_to=date_to.strftime(HH_DATE_FORMAT),
+        )
+        first_page = self._request_page(url, shard, 0)
+        span = date_to - date_from
+
+        if first_page['found'] <= HH_MAX_RESULTS:
+            return [(shard, first_page)]
+        if span <= timedelta(seconds=MIN_SHARD_SECONDS):
+            logger.warning(
+                '%d results published between %s and %s, only %d can '
+                'be fetched',
+                first_page['found'], shard['date_from'], shard['date_to'],
+                HH_MAX_RESULTS
+            )
+            return [(shard, first_page)]
+
+        middle = date_from + timedelta(seconds=span.total_seconds() // 2)
+        return (
+            self._split_shard(parameters, url, date_from, middle)
+            + self._split_shard(
+                parameters, url, middle + timedelta(seconds=1), date_to
+            )
+        )
+
+    def iter_pages(
+            self,
+            pages: int,
+            parameters: dict,
+            url: str,
+            first_page: Optional[dict] = None,
+            start_page: int = 0
+    ) -> Iterator[dict]:
+        """
+        Requests all pages of data from the API and yields the
+        responses in page order.
+
+        The first page is always requested on its own, since only its
+        response tells the real number of pages. When the parser is
+        configured with a concurrency greater than 1, the remaining
+        pages are then requested in parallel, at most
+        ``self.concurrency`` of them ahead of the consumer.
+
+        Args:
+            pages (int): The number of pages to request.
+            parameters (dict): The parameters to include in the request.
+            url (str): The URL to make the request to.
+            first_page (dict, optional): Already received response to
+            the first page. Defaults to None.
+            start_page (int, optional): First page to yield; the first
+            page is requested anyway. Defaults to 0.
+
+        Yields:
+            dict: The JSON response of each page.
+        """
+        if pages < 1:
+            return
+
+        if first_page is None:
+            first_page = self._request_page(url, parameters, 0)
+        if start_page <= 0:
+            yield first_page
+
+        reachable_pages = HH_MAX_RESULTS // parameters.get(
+            'per_page', self.per_page
+        )
+        yield from self._ordered_map(
+            lambda page: self._request_page(url, parameters, page),
+            range(
+                max(1, start_page),
+                min(first_page['pages'], reachable_pages)
+            )
+        )
+
+    def _ordered_map(self, func, iterable) -> Iterator:
+        """
+        Applies a function to every element with up to
+        ``self.concurrency`` calls in flight and yields the results in
+        input order.
+
+        Args:
+            func: Function to apply.
+            iterable: Elements to apply the function to.
+
+        Yields:
+            The results of the calls.
+        """
+        if self.concurrency == 1:
+            yield from map(func, iterable)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            in_flight = deque()
+            for element in iterable:
+                if len(in_flight) == self.concurrency:
+                    yield in_flight.popleft().result()
+                in_flight.append(executor.submit(func, element))
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def _request_page(self, url: str, parameters: dict, page: int) -> dict:
+        """
+        Requests a single page without mutating the shared parameters.
+
+        Args:
+            url (str): The URL to make the request to.
+            parameters (dict): The parameters to include in the request.
+            page (int): The page number to request.
+
+        Returns:
+            dict: The JSON response for the page.
+        """
+        page_parameters = dict(parameters, page=page)
+        response = self.make_request(url, page_parameters, self.headers)
+        PAGES.inc(endpoint=url.rsplit('/', 1)[-1])
+        return response
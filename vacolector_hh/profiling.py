@@ -0,0 +1,156 @@
+""" Profiling and slow call tracing for sync runs. """
+import cProfile
+import logging
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, List, Optional
+
+from vacolector_hh.constants import PROFILE_REPORT_LINES
+
+logger = logging.getLogger(__name__)
+
+# From Python 3.12 cProfile is built on sys.monitoring: one profile
+# sees every thread, and only one profiler may be active per process.
+PROFILES_ALL_THREADS = sys.version_info >= (3, 12)
+
+_slow_threshold: Optional[float] = None
+
+
+def set_slow_threshold(milliseconds: Optional[float]) -> None:
+    """
+    Set the duration above which HTTP calls and SQL statements are
+    logged by trace_if_slow().
+
+    Args:
+        milliseconds (Optional[float]): Threshold in milliseconds, None
+        to disable tracing.
+    """
+    global _slow_threshold
+    _slow_threshold = (
+        milliseconds / 1000 if milliseconds is not None else None
+    )
+
+
+def trace_if_slow(
+        kind: str,
+        started: float,
+        target: str,
+        parameters: Any = None
+) -> None:
+    """
+    Log a call that took longer than the slow threshold.
+
+    Args:
+        kind (str): Kind of the call, e.g. "HTTP" or "SQL".
+        started (float): time.perf_counter() value at the call start.
+        target (str): URL or SQL statement.
+        parameters (Any, optional): Parameters of the call.
+        Defaults to None.
+    """
+    if _slow_threshold is None:
+        return
+    elapsed = time.perf_counter() - started
+    if elapsed < _slow_threshold:
+        return
+    if parameters is None:
+        logger.warning(
+            'Slow %s call (%.1f ms): %s', kind, elapsed * 1000, target
+        )
+    else:
+        logger.warning(
+            'Slow %s call (%.1f ms): %s %r',
+            kind, elapsed * 1000, target, parameters
+        )
+
+
+class ThreadProfiler:
+    """
+    cProfile wrapper that also profiles threads started while it runs,
+    such as the sync producers and the page fetching workers.
+
+    Up to Python 3.11 cProfile only sees the thread it is enabled in,
+    so every new thread gets its own profile through
+    threading.setprofile() and the profiles are merged into one report.
+    From Python 3.12 a single profile covers all threads.
+    """
+
+    def __init__(self):
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def _thread_hook(self, frame, event, arg):
+        if not self._running:
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is active; the thread must still run.
+            return
+        with self._lock:
+            self._profiles.append(profile)
+
+    def start(self) -> None:
+        """
+        Start profiling the calling thread and all new threads.
+        """
+        self._running = True
+        if not PROFILES_ALL_THREADS:
+            threading.setprofile(self._thread_hook)
+        profile = cProfile.Profile()
+        profile.enable()
+        with self._lock:
+            self._profiles.append(profile)
+
+    def stop(self) -> pstats.Stats:
+        """
+        Stop profiling and merge the collected profiles.
+
+        Threads that are still alive keep their profile enabled until
+        they exit, but their calls so far are included. Profiles that
+        recorded no calls are left out.
+
+        Returns:
+            pstats.Stats: Merged statistics.
+        """
+        self._running = False
+        if not PROFILES_ALL_THREADS:
+            threading.setprofile(None)
+        with self._lock:
+            profiles = list(self._profiles)
+        profiles[0].disable()
+        for profile in profiles:
+            profile.create_stats()
+        return pstats.Stats(*[
+            profile for profile in profiles if profile.stats
+        ])
+
+
+@contextmanager
+def profiled(path: Optional[str]):
+    """
+    Profile the enclosed block, dump the statistics for pstats or
+    snakeviz to a file and print the top functions by cumulative time.
+
+    Args:
+        path (Optional[str]): Target file; nothing is profiled if empty.
+    """
+    if not path:
+        yield
+        return
+
+    profiler = ThreadProfiler()
+    profiler.start()
+    try:
+        yield
+    finally:
+        stats = profiler.stop()
+        stats.dump_stats(path)
+        print(f"Profile written to {path}")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+            PROFILE_REPORT_LINES
+        )
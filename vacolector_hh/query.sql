@@ -8,44 +8,48 @@ FROM vacancies v
 INNER JOIN employers e ON v.employer_id = e.id;
 
 -- get_avg_salary()
-SELECT ROUND(
-    AVG(
-        CASE
-            WHEN salary_from > 0 AND salary_to > 0
-                THEN (salary_from + salary_to) / 2.0
-            ELSE GREATEST(salary_from, salary_to)
-        END
-        )
-    )
-FROM vacancies;
+SELECT avg_salary
+FROM salary_stats;
+
+-- refresh_salary_stats()
+REFRESH MATERIALIZED VIEW CONCURRENTLY salary_stats;
 
 -- get_vacancies_with_higher_salary()
 SELECT e.name as employer_name, v.name as vacancy_name, salary_from, salary_to, currency, v.alternate_url
 FROM vacancies v
 INNER JOIN employers e ON e.id = v.employer_id
-WHERE (
-    CASE
-        WHEN salary_from > 0 AND salary_to > 0
-            THEN (salary_from + salary_to) / 2.0
-        ELSE GREATEST(salary_from, salary_to)
-    END
-    ) > (
-        SELECT ROUND(
-            AVG(
-                CASE
-                    WHEN salary_from > 0 AND salary_to > 0
-                        THEN (salary_from + salary_to) / 2.0
-                    ELSE GREATEST(salary_from, salary_to)
-                END
-                )
-            )
-        FROM vacancies
-    );
+WHERE v.salary_normalized > (SELECT avg_salary FROM salary_stats);
 
--- get_vacancies_with_keyword()
-SELECT e.name as employer_name, v.name as vacancy_name, salary_from, salary_to, currency, v.alternate_url
+-- search_vacancies(mode='fts')
+SELECT e.name AS employer_name, v.name AS vacancy_name, v.salary_from, v.salary_to, v.currency, v.alternate_url
+FROM vacancies v
+INNER JOIN employers e ON e.id = v.employer_id
+CROSS JOIN (
+    SELECT websearch_to_tsquery('russian', 'python')
+        || websearch_to_tsquery('english', 'python') AS q
+) search
+WHERE v.search_vector @@ search.q
+ORDER BY ts_rank(v.search_vector, search.q) DESC
+LIMIT 50;
+
+-- get_vacancies_with_keyword(), с pg_trgm по триграммным индексам
+SELECT e.name AS employer_name, v.name AS vacancy_name, v.salary_from, v.salary_to, v.currency, v.alternate_url
+FROM vacancies v
+INNER JOIN employers e ON e.id = v.employer_id
+WHERE v.name ILIKE ('%dev%')
+    OR requirement ILIKE ('%dev%')
+    OR responsibility ILIKE ('%dev%');
+
+-- search_vacancies(mode='trgm')
+SELECT e.name AS employer_name, v.name AS vacancy_name, v.salary_from, v.salary_to, v.currency, v.alternate_url
 FROM vacancies v
 INNER JOIN employers e ON e.id = v.employer_id
 WHERE v.name ILIKE ('%python%')
     OR requirement ILIKE ('%python%')
-    OR responsibility ILIKE ('%python%');
\ No newline at end of file
+    OR responsibility ILIKE ('%python%')
+ORDER BY GREATEST(
+    word_similarity('python', v.name),
+    word_similarity('python', v.requirement),
+    word_similarity('python', v.responsibility)
+) DESC
+LIMIT 50;
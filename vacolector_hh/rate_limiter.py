@@ -0,0 +1,131 @@
+""" Request throttling for the HH API client. """
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket limiting the request rate.
+
+    Tokens are added at ``rate`` per second up to ``capacity``; every
+    request takes one token and waits when the bucket is empty.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1) -> float:
+        """
+        Take tokens from the bucket, waiting until enough are
+        available.
+
+        Args:
+            tokens (float, optional): Number of tokens. Defaults to 1.
+
+        Returns:
+            float: Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                delay = (tokens - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def refund(self, tokens: float) -> None:
+        """
+        Return unused tokens to the bucket, up to its capacity.
+
+        Args:
+            tokens (float): Number of tokens.
+        """
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limits the number of requests in flight and adapts the limit with
+    AIMD (additive increase, multiplicative decrease).
+
+    Every successful response raises the limit by ``1 / limit``, i.e.
+    by about one per round of ``limit`` requests. A throttled response
+    (429/503) halves it, at most once per ``cooldown`` seconds so that a
+    burst of rejections counts as one congestion event, and pauses all
+    requests for the server's Retry-After.
+    """
+
+    def __init__(
+            self,
+            initial: int,
+            minimum: int = 1,
+            maximum: Optional[int] = None,
+            cooldown: float = 1.0
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum or initial)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.throttled = 0
+        self._resume_at = 0.0
+        self._decreased_at = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """
+        Wait until a request may be sent.
+        """
+        with self._condition:
+            while True:
+                pause = self._resume_at - time.monotonic()
+                if pause <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                self._condition.wait(timeout=pause if pause > 0 else None)
+
+    def release(
+            self,
+            throttled: Optional[bool] = False,
+            retry_after: Optional[float] = None
+    ) -> None:
+        """
+        Report the outcome of a request sent after acquire().
+
+        Args:
+            throttled (Optional[bool], optional): True if the server
+            rejected the request because of its rate limits, False on
+            success, None if the outcome says nothing about the server
+            load (e.g. a network error). Defaults to False.
+            retry_after (Optional[float], optional): Seconds the server
+            asked to wait. Defaults to None.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+
+            if throttled:
+                self.throttled += 1
+                if now - self._decreased_at >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self._decreased_at = now
+                if retry_after:
+                    self._resume_at = max(self._resume_at, now + retry_after)
+            elif throttled is not None:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+            self._condition.notify_all()
@@ -0,0 +1,234 @@
+""" Rebuild of the vacancies table from the raw page archive. """
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from vacolector_hh.archive import ResponseArchive, read_segment
+from vacolector_hh.constants import REPLAY_PROCESSES, WRITE_BATCH_SIZE
+from vacolector_hh.data_classes import UpsertStats
+from vacolector_hh.hh_structs import (
+    ARCHIVED_PAGE_DECODER,
+    HAS_STRUCTS,
+    batch_from_items,
+)
+from vacolector_hh.parser_hh import HHParser
+from vacolector_hh.vacancy_batch import VacancyBatch
+
+
+@dataclass
+class ReplayResult:
+    pages: int = 0
+    parsed: int = 0
+    batches: int = 0
+    stats: UpsertStats = field(default_factory=UpsertStats)
+    skipped_employers: List[int] = field(default_factory=list)
+    skipped_vacancies: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the replay result.
+
+        Returns:
+            str: String representation of the replay result.
+        """
+        rate = self.parsed / self.elapsed if self.elapsed else 0.0
+        return f"Replayed {self.pages} pages, {self.parsed} vacancies " \
+               f"in {self.batches} batches ({rate:,.0f} vacancies/s). " \
+               f"{self.stats}" + (
+                   f". Skipped {len(self.skipped_employers)} employers "
+                   f"that are not subscribed"
+                   if self.skipped_employers else ""
+               ) + (
+                   f". Skipped {self.skipped_vacancies} vacancies without "
+                   f"an employer"
+                   if self.skipped_vacancies else ""
+               )
+
+
+def parse_segment(
+        task: Tuple[str, List[int]]
+) -> Dict[int, VacancyBatch]:
+    """
+    Decode archived pages of a segment and build their vacancies.
+    Runs in the replay worker processes.
+
+    With msgspec installed, pages are decoded straight into the typed
+    structs of hh_structs, otherwise into dicts. Vacancies are returned
+    as columnar batches, which are much cheaper to send back to the
+    main process than Vacancy objects.
+
+    Args:
+        task (Tuple[str, List[int]]): Segment path and the line
+        numbers of the pages to parse.
+
+    Returns:
+        Dict[int, VacancyBatch]: Vacancies of every page by its line
+        number.
+    """
+    path, lines = task
+    if HAS_STRUCTS:
+        return {
+            number: batch_from_items(record.response.items)
+            for number, record in read_segment(
+                path, set(lines), ARCHIVED_PAGE_DECODER.decode
+            )
+        }
+    return {
+        number: HHParser.build_vacancy_batch(record['response']['items'])
+        for number, record in read_segment(path, set(lines))
+    }
+
+
+class ArchiveReplay:
+    """
+    Streams archived vacancy pages through the parser and the bulk
+    upsert used by syncs, without requests to the HH API.
+
+    Segments are decoded and parsed by a pool of ``processes`` worker
+    processes. Their pages are written by the calling process in the
+    order they were fetched, across segments, in batches of
+    ``batch_size`` vacancies, so a vacancy archived several times ends
+    up with its latest version even if several processes archived it.
+    At most two segments per process are parsed ahead of the writer, so
+    parsed pages do not pile up in memory when writing is slower.
+    Vacancies without an employer ID cannot be stored and are skipped.
+    Without a ``db_manager`` pages are only parsed, e.g. to benchmark
+    the parser.
+    """
+
+    def __init__(
+            self,
+            archive: ResponseArchive,
+            db_manager=None,
+            processes: int = REPLAY_PROCESSES,
+            batch_size: int = WRITE_BATCH_SIZE
+    ):
+        self.archive = archive
+        self.db_manager = db_manager
+        self.processes = max(1, processes)
+        self.batch_size = batch_size
+
+    def run(
+            self,
+            employer_ids: Optional[Iterable[int]] = None,
+            since: Optional[datetime] = None,
+            until: Optional[datetime] = None,
+            latest: bool = False
+    ) -> ReplayResult:
+        """
+        Replay archived pages into the vacancies table.
+
+        Pages of employers that are not subscribed are skipped, since
+        their vacancies cannot be stored.
+
+        Args:
+            employer_ids (Iterable[int], optional): Only pages of these
+            employers. Defaults to all employers.
+            since (datetime, optional): Only pages fetched at or after
+            this moment.
+            until (datetime, optional): Only pages fetched before this
+            moment.
+            latest (bool, optional): Per employer, only pages since its
+            last full search, see ResponseArchive.records().
+            Defaults to False.
+
+        Returns:
+            ReplayResult: Replay statistics.
+        """
+        started = time.perf_counter()
+        result = ReplayResult()
+        records = self.archive.records(employer_ids, since, until, latest)
+
+        if self.db_manager is not None:
+            subscribed = set(self.db_manager.get_employers() or [])
+            result.skipped_employers = sorted({
+                record.employer_id for record in records
+                if record.employer_id not in subscribed
+            })
+            records = [
+                record for record in records
+                if record.employer_id in subscribed
+            ]
+
+        segments: Dict[str, List[int]] = {}
+        for record in records:
+            segments.setdefault(record.segment, []).append(record.line)
+        tasks = [
+            (self.archive.segment_path(segment), lines)
+            for segment, lines in segments.items()
+        ]
+
+        # Segments are parsed in the order of their first page, so the
+        # segment of the next page in fetch order is either parsed
+        # already or the next one to arrive. A segment is kept until
+        # all its pages are written.
+        remaining = {
+            segment: len(lines) for segment, lines in segments.items()
+        }
+        parsing = self._map(tasks)
+        parsed = zip(segments, parsing)
+        pages: Dict[str, Dict[int, VacancyBatch]] = {}
+        batch = VacancyBatch()
+        for record in records:
+            while record.segment not in pages:
+                segment, segment_pages = next(parsed)
+                pages[segment] = segment_pages
+            vacancies = pages[record.segment].pop(record.line, None)
+            remaining[record.segment] -= 1
+            if not remaining[record.segment]:
+                del pages[record.segment]
+            if vacancies is None:
+                continue  # page cut short by a crash
+            employed = [
+                index for index, employer_id
+                in enumerate(vacancies.employer_ids) if employer_id
+            ]
+            if len(employed) < len(vacancies):
+                result.skipped_vacancies += len(vacancies) - len(employed)
+                vacancies = vacancies.take(employed)
+            result.pages += 1
+            result.parsed += len(vacancies)
+            batch.extend(vacancies)
+            if len(batch) >= self.batch_size:
+                self._flush(batch, result)
+        parsing.close()
+        self._flush(batch, result)
+
+        if self.db_manager is not None and result.batches:
+            self.db_manager.refresh_salary_stats()
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    def _map(self, tasks: List[Tuple[str, List[int]]]):
+        """
+        Parse segments in worker processes, yielding them in order,
+        with at most two segments per process parsed ahead.
+        """
+        if self.processes == 1 or len(tasks) <= 1:
+            yield from map(parse_segment, tasks)
+            return
+        processes = min(self.processes, len(tasks))
+        with Pool(processes) as pool:
+            in_flight = deque()
+            for task in tasks:
+                if len(in_flight) == 2 * processes:
+                    yield in_flight.popleft().get()
+                in_flight.append(pool.apply_async(parse_segment, (task,)))
+            while in_flight:
+                yield in_flight.popleft().get()
+
+    def _flush(self, batch: VacancyBatch, result: ReplayResult) -> None:
+        if not batch:
+            return
+        if self.db_manager is not None:
+            with self.db_manager.transaction():
+                result.stats += self.db_manager.upsert_vacancies(
+                    batch.latest()
+                )
+        result.batches += 1
+        batch.clear()
+
@@ -0,0 +1,290 @@
+""" Long-running daemon keeping vacancies of all employers fresh. """
+import heapq
+import math
+import random
+import signal
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from vacolector_hh.constants import (
+    SCHEDULER_CHANGE_RATE_SMOOTHING,
+    SCHEDULER_EMPLOYERS_RELOAD_SECONDS,
+    SCHEDULER_JITTER,
+    SCHEDULER_MAX_INTERVAL_SECONDS,
+    SCHEDULER_MIN_INTERVAL_SECONDS,
+    SCHEDULER_REQUESTS_PER_HOUR,
+    SCHEDULER_STATS_REFRESH_SECONDS,
+    SCHEDULER_TARGET_CHANGES,
+)
+from vacolector_hh.metrics import HTTP_REQUESTS, REGISTRY
+from vacolector_hh.parser_hh import HHParser
+from vacolector_hh.rate_limiter import TokenBucket
+from vacolector_hh.sync import SyncResult, VacancySync
+
+
+@dataclass
+class EmployerSchedule:
+    employer_id: int
+    next_run: float
+    open_vacancies: Optional[int] = None
+    change_rate: float = 0.0
+    last_run: Optional[float] = None
+    refreshes: int = 0
+    failures: int = 0
+
+
+class RefreshScheduler:
+    """
+    Refreshes employers one at a time from a priority queue ordered by
+    their next due time.
+
+    After every refresh the employer's change rate (changed vacancies
+    per hour) is updated from the vacancies inserted, updated or
+    deleted, or from the change of its open vacancies count if that is
+    larger, smoothed exponentially. The next refresh is planned when about
+    ``target_changes`` changes are expected, within the minimum and
+    maximum interval, so busy employers are refreshed often and static
+    ones rarely. Intervals get a random jitter so that employers added
+    together do not stay in lockstep, and the first refresh of every
+    employer is spread over the minimum interval.
+
+    All HH requests, including retries, are paid from a token bucket
+    refilled at ``requests_per_hour``. A refresh costing more than the
+    bucket holds delays the next one until the budget recovers.
+
+    SIGINT and SIGTERM stop the daemon after the refresh in progress.
+    """
+
+    def __init__(
+            self,
+            hh_parser: HHParser,
+            db_manager,
+            requests_per_hour: float = SCHEDULER_REQUESTS_PER_HOUR,
+            min_interval: float = SCHEDULER_MIN_INTERVAL_SECONDS,
+            max_interval: float = SCHEDULER_MAX_INTERVAL_SECONDS,
+            target_changes: float = SCHEDULER_TARGET_CHANGES,
+            jitter: float = SCHEDULER_JITTER,
+            seed: Optional[int] = None
+    ):
+        self.hh_parser = hh_parser
+        self.db_manager = db_manager
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.target_changes = target_changes
+        self.jitter = jitter
+        self.budget = TokenBucket(
+            requests_per_hour / 3600,
+            capacity=max(1.0, requests_per_hour / 12)
+        )
+        self.schedules: Dict[int, EmployerSchedule] = {}
+        self._queue: List[Tuple[float, int]] = []
+        self._random = random.Random(seed)
+        self._stop = threading.Event()
+        self._employers_loaded_at = -math.inf
+        self._stats_refreshed_at = time.monotonic()
+        self._stats_dirty = False
+
+    def stop(self, *args) -> None:
+        """
+        Ask the daemon to stop after the refresh in progress. Usable as
+        a signal handler.
+        """
+        self._stop.set()
+
+    def install_signal_handlers(self) -> None:
+        """
+        Stop gracefully on SIGINT and SIGTERM.
+        """
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+
+    def run_forever(self) -> None:
+        """
+        Refresh due employers until stopped.
+        """
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now - self._employers_loaded_at \
+                    >= SCHEDULER_EMPLOYERS_RELOAD_SECONDS:
+                self.load_employers(now)
+
+            employer_id = self._pop_due(now)
+            if employer_id is None:
+                self._refresh_stats_if_due(now)
+                self._stop.wait(self._seconds_to_next(now))
+                continue
+
+            schedule = self.schedules[employer_id]
+            self.refresh(schedule)
+            self._push(schedule, self.next_interval(schedule))
+            self._refresh_stats_if_due(time.monotonic())
+            REGISTRY.write_textfile()
+
+        if self._stats_dirty:
+            self.db_manager.refresh_salary_stats()
+
+    def load_employers(self, now: float) -> None:
+        """
+        Start scheduling new employers and forget deleted ones.
+
+        Args:
+            now (float): Current time.monotonic() value.
+        """
+        self._employers_loaded_at = now
+        employer_ids = self.db_manager.get_employers()
+        if employer_ids is None:
+            return
+        employer_ids = set(employer_ids)
+        for employer_id in list(self.schedules):
+            if employer_id not in employer_ids:
+                del self.schedules[employer_id]
+        for employer_id in employer_ids - set(self.schedules):
+            schedule = EmployerSchedule(employer_id=employer_id, next_run=0)
+            self.schedules[employer_id] = schedule
+            self._push(
+                schedule,
+                self._random.uniform(0, self.min_interval),
+                now
+            )
+
+    def refresh(self, schedule: EmployerSchedule) -> Optional[SyncResult]:
+        """
+        Check an employer's open vacancies count, sync its vacancies
+        and update its change rate.
+
+        Args:
+            schedule (EmployerSchedule): Employer to refresh.
+
+        Returns:
+            Optional[SyncResult]: Sync statistics or None on failure.
+        """
+        estimate = 2
+        requests_before = HTTP_REQUESTS.total()
+        self.budget.acquire(estimate)
+        try:
+            employer = self.hh_parser.parse_employer(schedule.employer_id)
+            vacancy_sync = VacancySync(
+                self.hh_parser, 1, self.db_manager, checkpoints=False
+            )
+            result = vacancy_sync.run(
+                [schedule.employer_id], refresh_stats=False
+            )
+        except Exception:
+            traceback.print_exc()
+            result = None
+        finally:
+            self._settle(
+                estimate, HTTP_REQUESTS.total() - requests_before
+            )
+
+        now = time.monotonic()
+        if result is None or result.errors:
+            schedule.failures += 1
+            for error in (result.errors.values() if result else ()):
+                print(f"Failed to refresh employer {schedule.employer_id}: "
+                      f"{error}")
+            return result
+
+        changes = result.stats.inserted + result.stats.updated \
+            + result.deleted
+        if schedule.open_vacancies is not None:
+            changes = max(
+                changes,
+                abs(employer.open_vacancies - schedule.open_vacancies)
+            )
+        if employer.open_vacancies != schedule.open_vacancies:
+            self.db_manager.update_open_vacancies(
+                employer.id, employer.open_vacancies
+            )
+        if schedule.last_run is not None:
+            hours = max(now - schedule.last_run, 1.0) / 3600
+            schedule.change_rate = (
+                SCHEDULER_CHANGE_RATE_SMOOTHING * changes / hours
+                + (1 - SCHEDULER_CHANGE_RATE_SMOOTHING)
+                * schedule.change_rate
+            )
+        schedule.open_vacancies = employer.open_vacancies
+        schedule.last_run = now
+        schedule.refreshes += 1
+        schedule.failures = 0
+        self._stats_dirty = self._stats_dirty or bool(changes)
+        return result
+
+    def next_interval(self, schedule: EmployerSchedule) -> float:
+        """
+        Return the seconds until the next refresh of an employer.
+
+        Failing employers back off exponentially from the minimum
+        interval.
+
+        Args:
+            schedule (EmployerSchedule): Employer schedule.
+
+        Returns:
+            float: Interval with jitter applied.
+        """
+        if schedule.failures:
+            interval = self.min_interval * 2 ** min(schedule.failures, 16)
+        elif schedule.change_rate > 0:
+            interval = self.target_changes / schedule.change_rate * 3600
+        else:
+            interval = self.max_interval
+        interval = min(max(interval, self.min_interval), self.max_interval)
+        return interval * self._random.uniform(
+            1 - self.jitter, 1 + self.jitter
+        )
+
+    def _settle(self, estimate: float, used: float) -> None:
+        """
+        Charge the budget for the requests a refresh actually made.
+        """
+        if used < estimate:
+            self.budget.refund(estimate - used)
+        debt = used - estimate
+        while debt > 0 and not self._stop.is_set():
+            tokens = min(debt, 1)
+            self.budget.acquire(tokens)
+            debt -= tokens
+
+    def _push(
+            self,
+            schedule: EmployerSchedule,
+            delay: float,
+            now: Optional[float] = None
+    ) -> None:
+        now = time.monotonic() if now is None else now
+        schedule.next_run = now + delay
+        heapq.heappush(self._queue, (schedule.next_run, schedule.employer_id))
+
+    def _pop_due(self, now: float) -> Optional[int]:
+        """
+        Pop the most overdue employer, skipping entries of deleted
+        employers.
+        """
+        while self._queue:
+            next_run, employer_id = self._queue[0]
+            schedule = self.schedules.get(employer_id)
+            if schedule is None or schedule.next_run != next_run:
+                heapq.heappop(self._queue)
+                continue
+            if next_run > now:
+                return None
+            heapq.heappop(self._queue)
+            return employer_id
+        return None
+
+    def _seconds_to_next(self, now: float) -> float:
+        wait = SCHEDULER_EMPLOYERS_RELOAD_SECONDS
+        if self._queue:
+            wait = min(wait, self._queue[0][0] - now)
+        return max(wait, 0.0)
+
+    def _refresh_stats_if_due(self, now: float) -> None:
+        if self._stats_dirty and now - self._stats_refreshed_at \
+                >= SCHEDULER_STATS_REFRESH_SECONDS:
+            self.db_manager.refresh_salary_stats()
+            self._stats_dirty = False
+            self._stats_refreshed_at = now
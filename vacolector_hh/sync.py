@@ -0,0 +1,460 @@
+""" Parallel synchronisation of vacancies for subscribed employers. """
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from vacolector_hh.constants import (
+    CHECKPOINT_DONE,
+    CHECKPOINT_FAILED,
+    CHECKPOINT_RUNNING,
+    FULL_RESYNC_INTERVAL_HOURS,
+    HH_DATE_FORMAT,
+    PIPELINE_QUEUE_SIZE,
+    SYNC_RESUME_MAX_AGE_HOURS,
+    SYNC_WORKERS,
+    WRITE_BATCH_SIZE,
+)
+from vacolector_hh.data_classes import (
+    SyncCheckpoint,
+    SyncState,
+    UpsertStats,
+    Vacancy,
+)
+from vacolector_hh.parser_hh import HHParser
+from vacolector_hh.vacancy_batch import VacancyBatch
+
+
+@dataclass
+class SyncResult:
+    synced: List[int] = field(default_factory=list)
+    errors: Dict[int, Exception] = field(default_factory=dict)
+    full_synced: List[int] = field(default_factory=list)
+    fetched: int = 0
+    batches: int = 0
+    stats: UpsertStats = field(default_factory=UpsertStats)
+    deleted: int = 0
+    run_id: Optional[int] = None
+    skipped: List[int] = field(default_factory=list)
+
+    @property
+    def failed_employers(self) -> List[int]:
+        """
+        Return the IDs of employers whose vacancies could not be
+        fetched.
+
+        Returns:
+            List[int]: IDs of the failed employers.
+        """
+        return list(self.errors)
+
+    def __str__(self) -> str:
+        """
+        Return a string representation of the sync result.
+
+        Returns:
+            str: String representation of the sync result.
+        """
+        return f"Employers synced: {len(self.synced)}, " \
+               f"full resyncs: {len(self.full_synced)}, " \
+               f"failed: {len(self.errors)}. " \
+               f"Fetched: {self.fetched} in {self.batches} batches. " \
+               f"{self.stats}, Deleted: {self.deleted}" + (
+                   f". Resumed run {self.run_id}, skipped "
+                   f"{len(self.skipped)} employers already synced"
+                   if self.skipped else ""
+               )
+
+
+@dataclass
+class _Page:
+    employer_id: int
+    vacancies: List[Vacancy]
+    number: int = 0
+
+
+@dataclass
+class _Done:
+    employer_id: int
+    vacancy_ids: List[int]
+    last_published_at: Optional[datetime]
+    resumed: bool = False
+
+
+@dataclass
+class _Failed:
+    employer_id: int
+    error: Exception
+
+
+class _Stopped(Exception):
+    """ Raised in producers once the writer has given up. """
+
+
+def parse_published_at(value) -> Optional[datetime]:
+    """
+    Convert a "published_at" value of the HH API to a datetime.
+
+    Args:
+        value: ISO formatted string, datetime or None.
+
+    Returns:
+        Optional[datetime]: Parsed value or None if it is empty.
+    """
+    if not value or isinstance(value, datetime):
+        return value or None
+    return datetime.strptime(value, HH_DATE_FORMAT)
+
+
+class VacancySync:
+    """
+    Streams vacancies of many employers from the HH API into the
+    database.
+
+    Employers are fetched by a pool of producer threads that put parsed
+    pages into a bounded queue. The calling thread writes them to the
+    database in batches of ``batch_size`` vacancies while fetching goes
+    on. A full queue blocks the producers, which keeps memory bounded
+    when the database is slower than the network.
+
+    With ``checkpoints`` enabled, the progress of every employer is
+    stored in the sync_checkpoints table together with each committed
+    batch. A run that was interrupted is resumed by the next one:
+    employers it completed are skipped, and the others continue after
+    their last committed page.
+    """
+
+    def __init__(
+            self,
+            hh_parser: HHParser,
+            workers: int = SYNC_WORKERS,
+            db_manager=None,
+            full_resync_interval: timedelta = timedelta(
+                hours=FULL_RESYNC_INTERVAL_HOURS
+            ),
+            batch_size: int = WRITE_BATCH_SIZE,
+            queue_size: int = PIPELINE_QUEUE_SIZE,
+            checkpoints: bool = True,
+            resume_max_age: timedelta = timedelta(
+                hours=SYNC_RESUME_MAX_AGE_HOURS
+            )
+    ):
+        self.hh_parser = hh_parser
+        self.workers = max(1, workers)
+        self.db_manager = db_manager
+        self.full_resync_interval = full_resync_interval
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self.checkpoints = checkpoints
+        self.resume_max_age = resume_max_age
+
+    def plan(
+            self,
+            employer_ids: Iterable[int],
+            states: Dict[int, SyncState],
+            now: datetime
+    ) -> Dict[int, datetime]:
+        """
+        Choose the incremental lower bound for every employer.
+
+        Employers without a watermark, or whose last full resync is
+        older than ``full_resync_interval``, are left out, which makes
+        them fetched in full.
+
+        Args:
+            employer_ids (Iterable[int]): IDs of the employers to sync.
+            states (Dict[int, SyncState]): Stored sync states.
+            now (datetime): Current time.
+
+        Returns:
+            Dict[int, datetime]: Lower bound per incremental employer.
+        """
+        date_from = {}
+        for employer_id in employer_ids:
+            state = states.get(employer_id)
+            if (
+                    state is None
+                    or state.last_published_at is None
+                    or state.last_full_sync_at is None
+                    or now - state.last_full_sync_at
+                    >= self.full_resync_interval
+            ):
+                continue
+            date_from[employer_id] = state.last_published_at
+        return date_from
+
+    def run(
+            self,
+            employer_ids: Iterable[int],
+            incremental: bool = True,
+            refresh_stats: bool = True
+    ) -> SyncResult:
+        """
+        Fetch vacancies of the given employers and store them.
+
+        In incremental mode only vacancies published since the stored
+        watermark are fetched. Employers that get a full resync also
+        have their closed vacancies deleted. A failing employer does
+        not abort the run: its exception is stored in
+        ``SyncResult.errors`` and the remaining employers are still
+        processed.
+
+        Vacancies are committed batch by batch. The deletions and the
+        sync state of an employer are committed, together with its last
+        vacancies, as soon as all of its pages are fetched.
+
+        An employer resumed from a page checkpoint may miss vacancies
+        that moved to earlier pages meanwhile, so neither its closed
+        vacancies are deleted nor its full resync is recorded; the next
+        run fetches it in full again.
+
+        Args:
+            employer_ids (Iterable[int]): IDs of the employers to sync.
+            incremental (bool, optional): Use the stored watermarks.
+            Defaults to True.
+            refresh_stats (bool, optional): Recompute the cached salary
+            statistics afterwards. Defaults to True.
+
+        Returns:
+            SyncResult: Write statistics and per-employer errors.
+        """
+        employer_ids = list(employer_ids)
+        now = datetime.now(timezone.utc)
+        date_from = {}
+        if incremental:
+            date_from = self.plan(
+                employer_ids, self.db_manager.get_sync_states() or {}, now
+            )
+
+        result = SyncResult()
+        start_pages = {}
+        if self.checkpoints:
+            result.run_id, checkpoints = self.db_manager.begin_sync_run(
+                incremental, self.resume_max_age
+            ) or (None, {})
+            for employer_id in employer_ids:
+                checkpoint = checkpoints.get(employer_id)
+                if checkpoint is None:
+                    continue
+                if checkpoint.status == CHECKPOINT_DONE:
+                    result.skipped.append(employer_id)
+                elif checkpoint.status == CHECKPOINT_RUNNING:
+                    start_pages[employer_id] = checkpoint.pages_done
+            employer_ids = [
+                employer_id for employer_id in employer_ids
+                if employer_id not in result.skipped
+            ]
+
+        pages = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for employer_id in employer_ids:
+                executor.submit(
+                    self._produce,
+                    employer_id,
+                    date_from.get(employer_id),
+                    start_pages.get(employer_id, 0),
+                    pages,
+                    stop
+                )
+            try:
+                self._consume(
+                    pages, len(employer_ids), date_from, now, result
+                )
+            finally:
+                stop.set()
+                executor.shutdown(cancel_futures=True)
+
+        if result.run_id is not None:
+            self.db_manager.finish_sync_run(
+                result.run_id,
+                CHECKPOINT_FAILED if result.errors else CHECKPOINT_DONE
+            )
+
+        if refresh_stats:
+            self.db_manager.refresh_salary_stats()
+        return result
+
+    def _produce(
+            self,
+            employer_id: int,
+            date_from: Optional[datetime],
+            start_page: int,
+            pages: queue.Queue,
+            stop: threading.Event
+    ) -> None:
+        """
+        Fetch an employer's vacancies page by page into the queue,
+        followed by a _Done or _Failed message. Nothing is fetched once
+        the writer has stopped.
+        """
+        if stop.is_set():
+            return
+        vacancy_ids = []
+        last_published_at = None
+        resumed = start_page > 0
+        try:
+            for number, vacancies in \
+                    self.hh_parser.iter_numbered_vacancy_pages(
+                        employer_id,
+                        date_from=date_from,
+                        start_page=start_page
+                    ):
+                if number == 0:
+                    resumed = False
+                for vacancy in vacancies:
+                    vacancy_ids.append(int(vacancy.id))
+                    published_at = parse_published_at(vacancy.published_at)
+                    if published_at and (
+                            last_published_at is None
+                            or published_at > last_published_at
+                    ):
+                        last_published_at = published_at
+                self._put(
+                    pages, _Page(employer_id, vacancies, number), stop
+                )
+            self._put(
+                pages,
+                _Done(employer_id, vacancy_ids, last_published_at, resumed),
+                stop
+            )
+        except _Stopped:
+            pass
+        except Exception as e:
+            try:
+                self._put(pages, _Failed(employer_id, e), stop)
+            except _Stopped:
+                pass
+
+    @staticmethod
+    def _put(pages: queue.Queue, item, stop: threading.Event) -> None:
+        """
+        Put an item into the queue, waiting while it is full unless the
+        writer has stopped.
+
+        Raises:
+            _Stopped: If the writer has stopped.
+        """
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        raise _Stopped()
+
+    def _consume(
+            self,
+            pages: queue.Queue,
+            employers_count: int,
+            date_from: Dict[int, datetime],
+            now: datetime,
+            result: SyncResult
+    ) -> None:
+        """
+        Write queued pages in batches until every employer reported
+        completion or failure.
+
+        Pages are copied into a columnar VacancyBatch, so their Vacancy
+        objects are freed while the batch fills up.
+        """
+        batch = VacancyBatch()
+        pages_done = {}
+        touched = set()
+        pending = employers_count
+
+        while pending:
+            item = pages.get()
+
+            if isinstance(item, _Page):
+                batch.extend(item.vacancies)
+                result.fetched += len(item.vacancies)
+                pages_done[item.employer_id] = item.number + 1
+                touched.add(item.employer_id)
+                if len(batch) >= self.batch_size:
+                    with self.db_manager.transaction():
+                        self._flush(batch, result)
+                        self._checkpoint(
+                            result, pages_done, touched, CHECKPOINT_RUNNING
+                        )
+                    batch = VacancyBatch()
+                    touched = set()
+                continue
+
+            pending -= 1
+            touched.discard(item.employer_id)
+            if isinstance(item, _Failed):
+                result.errors[item.employer_id] = item.error
+                self._checkpoint(
+                    result, pages_done, {item.employer_id}, CHECKPOINT_FAILED
+                )
+                continue
+
+            is_full_sync = item.employer_id not in date_from \
+                and not item.resumed
+            with self.db_manager.transaction():
+                self._flush(batch, result)
+                self._checkpoint(
+                    result, pages_done, touched, CHECKPOINT_RUNNING
+                )
+                self._checkpoint(
+                    result, pages_done, {item.employer_id}, CHECKPOINT_DONE
+                )
+                batch = VacancyBatch()
+                touched = set()
+                if is_full_sync:
+                    result.deleted += \
+                        self.db_manager.delete_stale_vacancies(
+                            item.employer_id, item.vacancy_ids
+                        )
+                self.db_manager.set_sync_states([
+                    SyncState(
+                        employer_id=item.employer_id,
+                        last_published_at=item.last_published_at,
+                        last_synced_at=now,
+                        last_full_sync_at=now if is_full_sync else None,
+                    )
+                ])
+            result.synced.append(item.employer_id)
+            if is_full_sync:
+                result.full_synced.append(item.employer_id)
+
+        with self.db_manager.transaction():
+            self._flush(batch, result)
+
+    def _checkpoint(
+            self,
+            result: SyncResult,
+            pages_done: Dict[int, int],
+            employer_ids: Iterable[int],
+            status: str
+    ) -> None:
+        """
+        Store the progress of employers in the current run, in the
+        enclosing transaction if there is one.
+        """
+        if result.run_id is None or not employer_ids:
+            return
+        self.db_manager.set_sync_checkpoints(
+            result.run_id,
+            [
+                SyncCheckpoint(
+                    employer_id, status, pages_done.get(employer_id, 0)
+                )
+                for employer_id in employer_ids
+            ]
+        )
+
+    def _flush(self, batch: VacancyBatch, result: SyncResult) -> None:
+        """
+        Upsert a batch of vacancies in its own transaction, or in the
+        enclosing one.
+        """
+        if not batch:
+            return
+        with self.db_manager.transaction():
+            result.stats += self.db_manager.upsert_vacancies(batch)
+        result.batches += 1
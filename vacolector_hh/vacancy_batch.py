@@ -0,0 +1,286 @@
+""" Columnar container of vacancies for bulk loads and analytics. """
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from vacolector_hh.data_classes import Vacancy, intern_value
+
+# Stored in a salary column for a bound the API sent as null
+NO_SALARY = float('nan')
+
+
+def _salary(value: float) -> Optional[int]:
+    return None if value != value else int(value)
+
+
+class VacancyBatch:
+    """
+    Vacancies stored column by column instead of as Vacancy objects.
+
+    IDs and employer IDs are kept in arrays of 64-bit integers,
+    salaries in arrays of doubles holding NO_SALARY for a missing bound,
+    and currencies as indexes into the list of distinct currencies, so
+    a row costs a few dozen bytes besides its text fields. rows() feeds
+    the rows to COPY without building a Vacancy per row; iterating a
+    batch builds them, for the callers that need objects.
+    """
+
+    __slots__ = (
+        'ids',
+        'names',
+        'salary_from',
+        'salary_to',
+        'currency_codes',
+        'currencies',
+        'published_at',
+        'alternate_urls',
+        'employer_ids',
+        'requirements',
+        'responsibilities',
+        '_currency_index',
+    )
+
+    def __init__(self, vacancies: Iterable[Vacancy] = ()):
+        """
+        Args:
+            vacancies (Iterable[Vacancy], optional): Initial vacancies.
+            Defaults to none.
+        """
+        self.ids = array('q')
+        self.names: List[str] = []
+        self.salary_from = array('d')
+        self.salary_to = array('d')
+        self.currency_codes = array('H')
+        self.currencies: List[str] = []
+        self.published_at: list = []
+        self.alternate_urls: List[str] = []
+        self.employer_ids = array('q')
+        self.requirements: List[str] = []
+        self.responsibilities: List[str] = []
+        self._currency_index: Dict[str, int] = {}
+        self.extend(vacancies)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator[Vacancy]:
+        for row in self.rows():
+            yield Vacancy(*row)
+
+    def append_row(self, row: Sequence) -> None:
+        """
+        Append a vacancy given as its values in the order of the Vacancy
+        fields.
+
+        Args:
+            row (Sequence): ID, name, salary from, salary to, currency,
+            publication time, URL, employer ID, requirement and
+            responsibility. A missing employer ID is stored as 0.
+        """
+        (vacancy_id, name, salary_from, salary_to, currency, published_at,
+         alternate_url, employer_id, requirement, responsibility) = row
+        self.ids.append(int(vacancy_id))
+        self.names.append(name)
+        self.salary_from.append(
+            NO_SALARY if salary_from is None else salary_from
+        )
+        self.salary_to.append(NO_SALARY if salary_to is None else salary_to)
+        self.currency_codes.append(self._currency_code(currency))
+        self.published_at.append(published_at)
+        self.alternate_urls.append(alternate_url)
+        self.employer_ids.append(int(employer_id or 0))
+        self.requirements.append(requirement)
+        self.responsibilities.append(responsibility)
+
+    def append(self, vacancy: Vacancy) -> None:
+        """
+        Append a vacancy.
+
+        Args:
+            vacancy (Vacancy): Vacancy to append.
+        """
+        self.append_row((
+            vacancy.id,
+            vacancy.name,
+            vacancy.salary_from,
+            vacancy.salary_to,
+            vacancy.currency,
+            vacancy.published_at,
+            vacancy.alternate_url,
+            vacancy.employer_id,
+            vacancy.requirement,
+            vacancy.responsibility,
+        ))
+
+    def extend(self, vacancies: Iterable[Vacancy]) -> None:
+        """
+        Append vacancies; another batch is copied column by column.
+
+        Args:
+            vacancies (Iterable[Vacancy]): Vacancies or a VacancyBatch.
+        """
+        if not isinstance(vacancies, VacancyBatch):
+            for vacancy in vacancies:
+                self.append(vacancy)
+            return
+        codes = [
+            self._currency_code(currency) for currency in vacancies.currencies
+        ]
+        self.ids.extend(vacancies.ids)
+        self.names.extend(vacancies.names)
+        self.salary_from.extend(vacancies.salary_from)
+        self.salary_to.extend(vacancies.salary_to)
+        self.currency_codes.extend(
+            codes[code] for code in vacancies.currency_codes
+        )
+        self.published_at.extend(vacancies.published_at)
+        self.alternate_urls.extend(vacancies.alternate_urls)
+        self.employer_ids.extend(vacancies.employer_ids)
+        self.requirements.extend(vacancies.requirements)
+        self.responsibilities.extend(vacancies.responsibilities)
+
+    def rows(self) -> Iterator[tuple]:
+        """
+        Return the vacancies as tuples in the order of the Vacancy
+        fields, as db_copy.vacancy_rows() does for Vacancy objects.
+
+        Returns:
+            Iterator[tuple]: Row tuples.
+        """
+        currencies = self.currencies
+        for (vacancy_id, name, salary_from, salary_to, code, published_at,
+             alternate_url, employer_id, requirement, responsibility) in zip(
+                self.ids, self.names, self.salary_from, self.salary_to,
+                self.currency_codes, self.published_at, self.alternate_urls,
+                self.employer_ids, self.requirements, self.responsibilities
+        ):
+            yield (
+                vacancy_id,
+                name,
+                _salary(salary_from),
+                _salary(salary_to),
+                currencies[code],
+                published_at,
+                alternate_url,
+                employer_id or None,
+                requirement,
+                responsibility,
+            )
+
+    def latest(self) -> 'VacancyBatch':
+        """
+        Return the batch without the earlier copies of vacancies that
+        appear several times, keeping the last one.
+
+        Returns:
+            VacancyBatch: A new batch, or this one if its IDs are
+            unique.
+        """
+        positions = {
+            vacancy_id: index for index, vacancy_id in enumerate(self.ids)
+        }
+        if len(positions) == len(self):
+            return self
+        return self.take(sorted(positions.values()))
+
+    def take(self, indexes: Sequence[int]) -> 'VacancyBatch':
+        """
+        Return a new batch with the rows at the given positions.
+
+        Args:
+            indexes (Sequence[int]): Row positions.
+
+        Returns:
+            VacancyBatch: The selected rows.
+        """
+        batch = VacancyBatch()
+        batch.ids = array('q', (self.ids[i] for i in indexes))
+        batch.names = [self.names[i] for i in indexes]
+        batch.salary_from = array('d', (self.salary_from[i] for i in indexes))
+        batch.salary_to = array('d', (self.salary_to[i] for i in indexes))
+        batch.currency_codes = array(
+            'H', (self.currency_codes[i] for i in indexes)
+        )
+        batch.currencies = list(self.currencies)
+        batch.published_at = [self.published_at[i] for i in indexes]
+        batch.alternate_urls = [self.alternate_urls[i] for i in indexes]
+        batch.employer_ids = array(
+            'q', (self.employer_ids[i] for i in indexes)
+        )
+        batch.requirements = [self.requirements[i] for i in indexes]
+        batch.responsibilities = [self.responsibilities[i] for i in indexes]
+        batch._currency_index = dict(self._currency_index)
+        return batch
+
+    def clear(self) -> None:
+        """
+        Remove all vacancies.
+        """
+        self.__init__()
+
+    def salary_normalized(self) -> array:
+        """
+        Return the salary of every vacancy computed as the
+        salary_normalized column of the vacancies table: the middle of
+        the range when both bounds are positive, the larger bound
+        otherwise, NO_SALARY when both are missing.
+
+        Returns:
+            array: Salaries as doubles.
+        """
+        salaries = array('d')
+        for salary_from, salary_to in zip(self.salary_from, self.salary_to):
+            if salary_from > 0 and salary_to > 0:
+                salaries.append((salary_from + salary_to) / 2)
+            elif salary_from != salary_from:
+                salaries.append(salary_to)
+            elif salary_to != salary_to:
+                salaries.append(salary_from)
+            else:
+                salaries.append(max(salary_from, salary_to))
+        return salaries
+
+    def average_salary(
+            self, currency: Optional[str] = None
+    ) -> Optional[float]:
+        """
+        Return the average normalized salary, like the salary_stats
+        view does for the whole table.
+
+        Args:
+            currency (str, optional): Only vacancies paid in this
+            currency. Defaults to all vacancies.
+
+        Returns:
+            Optional[float]: The average or None if no vacancy has a
+            salary.
+        """
+        salaries = self.salary_normalized()
+        if currency is not None:
+            code = self._currency_index.get(currency)
+            salaries = [
+                salary for salary, salary_code
+                in zip(salaries, self.currency_codes) if salary_code == code
+            ]
+        salaries = [salary for salary in salaries if salary == salary]
+        return sum(salaries) / len(salaries) if salaries else None
+
+    def currency_counts(self) -> Dict[str, int]:
+        """
+        Count the vacancies by salary currency.
+
+        Returns:
+            Dict[str, int]: Number of vacancies by currency, '' or None
+            for vacancies without a salary.
+        """
+        return {
+            self.currencies[code]: count
+            for code, count in Counter(self.currency_codes).items()
+        }
+
+    def _currency_code(self, currency: Optional[str]) -> int:
+        code = self._currency_index.get(currency)
+        if code is None:
+            code = self._currency_index[currency] = len(self.currencies)
+            self.currencies.append(intern_value(currency))
+        return code